@@ -1 +1,27 @@
 # Pacote de agentes
+#
+# Os agentes são expostos de forma preguiçosa (PEP 562): ``from ai_vr.agents
+# import ExportAgent`` só importa o módulo do agente pedido, e o DatabaseAgent
+# (LangChain/OpenAI) só é carregado quando realmente utilizado.
+from importlib import import_module
+
+_AGENTES = {
+	"DatabaseAgent": "ai_vr.agents.db_agent",
+	"ConvencaoAgent": "ai_vr.agents.convencao_agent",
+	"ExportAgent": "ai_vr.agents.export_agent",
+}
+
+__all__ = list(_AGENTES)
+
+
+def __getattr__(nome: str):
+	modulo = _AGENTES.get(nome)
+	if modulo is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+	valor = getattr(import_module(modulo), nome)
+	globals()[nome] = valor
+	return valor
+
+
+def __dir__():
+	return sorted(list(globals()) + __all__)
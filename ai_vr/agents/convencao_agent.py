@@ -1,7 +1,181 @@
 from __future__ import annotations
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, FrozenSet, Optional, Tuple, Union, TYPE_CHECKING
+import hashlib
 import json
-import pandas as pd
+
+if TYPE_CHECKING:
+	import numpy as np
+	import pandas as pd
+
+
+_CHAVES_CONVENCAO = {
+	"valor_vr_diario_padrao",
+	"percentual_desconto_colaborador",
+	"percentual_custo_empresa",
+	"limites",
+	"excecoes",
+}
+_CHAVES_LIMITES = {"max_desconto"}
+_CHAVES_EXCECOES = {"por_categoria", "por_sindicato"}
+_CHAVES_POR_CATEGORIA = {"excluir"}
+_CHAVES_POR_SINDICATO = {"valor_vr_diario"}
+
+# Planos já compilados, indexados pelo hash do conteúdo da convenção
+_PLANOS_COMPILADOS: Dict[str, "PlanoConvencao"] = {}
+
+
+@dataclass(frozen=True, eq=False)
+class PlanoConvencao:
+	"""Convenção coletiva compilada: valores validados e tabelas prontas para aplicação.
+
+	É imutável e pode ser reaplicado a quantos shards/períodos forem necessários
+	sem reler ou revalidar o JSON de origem.
+	"""
+	hash: str
+	valor_vr_diario_padrao: float
+	percentual_desconto_colaborador: float
+	percentual_custo_empresa: float
+	max_desconto: Optional[float]
+	categorias_excluidas: FrozenSet[str]
+	sindicatos: Tuple[str, ...]
+	valores_sindicato: np.ndarray  # alinhado a ``sindicatos``, somente leitura
+
+
+def _erro(msg: str) -> ValueError:
+	return ValueError(f"Convenção inválida: {msg}")
+
+
+def _numero(valor: Any, campo: str, minimo: float = 0.0, maximo: Optional[float] = None) -> float:
+	if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+		raise _erro(f"'{campo}' deve ser numérico (recebido {valor!r})")
+	valor = float(valor)
+	if valor != valor or valor < minimo or (maximo is not None and valor > maximo):
+		limite = f"[{minimo}, {maximo}]" if maximo is not None else f">= {minimo}"
+		raise _erro(f"'{campo}' fora do intervalo {limite} (recebido {valor})")
+	return valor
+
+
+def _objeto(valor: Any, campo: str, chaves: Optional[set] = None) -> Dict[str, Any]:
+	if valor is None:
+		return {}
+	if not isinstance(valor, dict):
+		raise _erro(f"'{campo}' deve ser um objeto JSON")
+	if chaves is not None:
+		desconhecidas = sorted(set(valor) - chaves)
+		if desconhecidas:
+			raise _erro(f"chaves desconhecidas em '{campo}': {', '.join(desconhecidas)}")
+	return valor
+
+
+def _compilar(convencao: Any, digest: str) -> PlanoConvencao:
+	import numpy as np
+
+	convencao = _objeto(convencao, "convenção", _CHAVES_CONVENCAO)
+	limites = _objeto(convencao.get("limites"), "limites", _CHAVES_LIMITES)
+	excecoes = _objeto(convencao.get("excecoes"), "excecoes", _CHAVES_EXCECOES)
+
+	max_desconto = limites.get("max_desconto")
+	if max_desconto is not None:
+		max_desconto = _numero(max_desconto, "limites.max_desconto")
+
+	categorias_excluidas = set()
+	for categoria, regra in _objeto(excecoes.get("por_categoria"), "excecoes.por_categoria").items():
+		campo = f"excecoes.por_categoria.{categoria}"
+		regra = _objeto(regra, campo, _CHAVES_POR_CATEGORIA)
+		excluir = regra.get("excluir", False)
+		if not isinstance(excluir, bool):
+			raise _erro(f"'{campo}.excluir' deve ser booleano (recebido {excluir!r})")
+		if excluir:
+			categorias_excluidas.add(categoria)
+
+	sindicatos = []
+	valores = []
+	for sindicato, regra in _objeto(excecoes.get("por_sindicato"), "excecoes.por_sindicato").items():
+		campo = f"excecoes.por_sindicato.{sindicato}"
+		regra = _objeto(regra, campo, _CHAVES_POR_SINDICATO)
+		if "valor_vr_diario" in regra:
+			sindicatos.append(sindicato)
+			valores.append(_numero(regra["valor_vr_diario"], f"{campo}.valor_vr_diario"))
+
+	valores_sindicato = np.asarray(valores, dtype=float)
+	valores_sindicato.flags.writeable = False
+
+	return PlanoConvencao(
+		hash=digest,
+		valor_vr_diario_padrao=_numero(convencao.get("valor_vr_diario_padrao", 0.0), "valor_vr_diario_padrao"),
+		percentual_desconto_colaborador=_numero(
+			convencao.get("percentual_desconto_colaborador", 0.2), "percentual_desconto_colaborador", maximo=1.0
+		),
+		percentual_custo_empresa=_numero(
+			convencao.get("percentual_custo_empresa", 0.8), "percentual_custo_empresa", maximo=1.0
+		),
+		max_desconto=max_desconto,
+		categorias_excluidas=frozenset(categorias_excluidas),
+		sindicatos=tuple(sindicatos),
+		valores_sindicato=valores_sindicato,
+	)
+
+
+def compilar_convencao(convencao: Union[str, Dict[str, Any]]) -> PlanoConvencao:
+	"""Compila uma convenção (texto JSON, caminho de arquivo ou dict) em um PlanoConvencao.
+
+	O resultado é cacheado pelo hash SHA-256 do conteúdo: compilar de novo o mesmo
+	conteúdo não reparseia nem revalida nada. Convenções inválidas levantam
+	``ValueError`` aqui, antes de qualquer processamento.
+	"""
+	if isinstance(convencao, dict):
+		texto = json.dumps(convencao, sort_keys=True, ensure_ascii=False)
+	elif convencao.strip().startswith("{"):
+		texto = convencao
+	else:
+		# pode ser caminho para arquivo
+		with open(convencao, "r", encoding="utf-8") as f:
+			texto = f.read()
+
+	digest = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+	plano = _PLANOS_COMPILADOS.get(digest)
+	if plano is None:
+		try:
+			dados = convencao if isinstance(convencao, dict) else json.loads(texto)
+		except json.JSONDecodeError as e:
+			raise _erro(f"JSON malformado ({e})") from e
+		plano = _compilar(dados, digest)
+		_PLANOS_COMPILADOS[digest] = plano
+	return plano
+
+
+def valores_por_sindicato(plano: PlanoConvencao, sindicatos, valores_base) -> np.ndarray:
+	"""Aplica as exceções ``por_sindicato`` do plano a um vetor de valores diários.
+
+	``sindicatos`` e ``valores_base`` são alinhados por linha. A troca é um join
+	vetorizado: cada sindicato vira um índice no array de valores do plano.
+	"""
+	import numpy as np
+	import pandas as pd
+
+	valores = np.array(valores_base, dtype=float)
+	if plano.sindicatos:
+		idx = pd.Index(plano.sindicatos).get_indexer(sindicatos)
+		encontrados = idx >= 0
+		valores[encontrados] = plano.valores_sindicato[idx[encontrados]]
+	return valores
+
+
+def repartir_total(plano: PlanoConvencao, total):
+	"""Divide o TOTAL em (custo empresa, desconto profissional) conforme o plano.
+
+	O desconto do colaborador é limitado por ``limites.max_desconto``; o que
+	exceder o limite passa a ser custo da empresa.
+	"""
+	import numpy as np
+
+	desconto_bruto = total * plano.percentual_desconto_colaborador
+	desconto = desconto_bruto
+	if plano.max_desconto is not None:
+		desconto = np.clip(desconto_bruto, None, plano.max_desconto)
+	custo_empresa = total * plano.percentual_custo_empresa + (desconto_bruto - desconto)
+	return custo_empresa.round(2), desconto.round(2)
 
 
 class ConvencaoAgent:
@@ -16,17 +190,26 @@ class ConvencaoAgent:
 		"por_categoria": {"ESTAGIARIO": {"excluir": true}},
 		"por_sindicato": {"SINDPD SP": {"valor_vr_diario": 40.0}}
 	  }
+
+	Também aceita um PlanoConvencao já compilado (ver ``compilar_convencao``).
 	"""
 
-	def __init__(self, convencao_json: str):
-		if convencao_json.strip().startswith("{"):
-			self.convencao = json.loads(convencao_json)
+	def __init__(self, convencao_json: Union[str, Dict[str, Any], PlanoConvencao]):
+		if isinstance(convencao_json, PlanoConvencao):
+			self.plano = convencao_json
 		else:
-			# pode ser caminho para arquivo
-			with open(convencao_json, "r", encoding="utf-8") as f:
-				self.convencao = json.load(f)
+			self.plano = compilar_convencao(convencao_json)
+
+	def aplicar(self, df_base: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+		"""Aplica o plano da convenção e retorna a base com TOTAL e rateio calculados.
+
+		Por padrão ``df_base`` não é alterado (uma única cópia das linhas mantidas).
+		Com ``inplace=True`` o próprio ``df_base`` é modificado e retornado: sem
+		exclusões por categoria não há cópia alguma da base; havendo linhas a
+		remover, o pandas ainda realoca os blocos restantes uma vez.
+		"""
+		import numpy as np
 
-	def aplicar(self, df_base: pd.DataFrame) -> pd.DataFrame:
 		print(f"[DEBUG] ConvencaoAgent.aplicar: df_base is None? {df_base is None}")
 		if df_base is None:
 			print("[ERRO] df_base recebido é None!")
@@ -34,34 +217,49 @@ class ConvencaoAgent:
 		print(f"[DEBUG] ConvencaoAgent.aplicar: df_base shape: {df_base.shape}")
 		if df_base.empty:
 			print("[AVISO] df_base está vazio!")
-			return df_base.copy()
+			return df_base if inplace else df_base.copy()
 
-		df = df_base.copy()
+		plano = self.plano
 
-		valor_padrao = float(self.convencao.get("valor_vr_diario_padrao", 0.0))
-		pct_desc = float(self.convencao.get("percentual_desconto_colaborador", 0.2))
-		pct_empresa = float(self.convencao.get("percentual_custo_empresa", 0.8))
-		limites = self.convencao.get("limites", {})
-		excecoes = self.convencao.get("excecoes", {})
+		# Aplicar exclusões por categoria (máscara booleana, sem cópia intermediária)
+		excluir = None
+		if plano.categorias_excluidas and "categoria_cargo" in df_base.columns:
+			excluir = df_base["categoria_cargo"].isin(plano.categorias_excluidas).to_numpy()
+			if not excluir.any():
+				excluir = None
 
-		# Ajuste de valor por sindicato, se houver
-		mapa_por_sindicato = (excecoes.get("por_sindicato", {}) or {})
-		df["VALOR DIÁRIO VR"] = df.get("VALOR DIÁRIO VR", pd.Series([valor_padrao] * len(df)))
-		# Usa sempre o valor do banco de dados
+		if inplace:
+			df = df_base
+			if excluir is not None:
+				df.drop(index=df.index[excluir], inplace=True)
+		elif excluir is not None:
+			df = df_base.take(np.flatnonzero(~excluir))
+		else:
+			df = df_base.copy()
+
+		# Usa sempre o valor do banco de dados; sem ele, o padrão da convenção
+		# (atribuição escalar, sem materializar uma lista por linha)
+		if "VALOR DIÁRIO VR" not in df.columns:
+			df["VALOR DIÁRIO VR"] = plano.valor_vr_diario_padrao
 		# Não adiciona coluna extra, mantém apenas 'VALOR DIÁRIO VR'
 		if "valor_vr_diario" in df.columns:
-			df = df.drop(columns=["valor_vr_diario"])
+			df.drop(columns=["valor_vr_diario"], inplace=True)
+
 		# Substituir zeros pelo padrão
-		df["VALOR DIÁRIO VR"] = df["VALOR DIÁRIO VR"].fillna(0).astype(float)
-		df.loc[df["VALOR DIÁRIO VR"] <= 0, "VALOR DIÁRIO VR"] = valor_padrao
+		valores = df["VALOR DIÁRIO VR"].to_numpy(dtype=float, na_value=0.0)
+		valores = np.where(valores > 0, valores, plano.valor_vr_diario_padrao)
 
-		# Aplicar exclusões por categoria
-		mapa_por_categoria = (excecoes.get("por_categoria", {}) or {})
-		categorias_excluir = [k for k, v in mapa_por_categoria.items() if v.get("excluir")]
-		if categorias_excluir and "categoria_cargo" in df.columns:
-			df = df[~df["categoria_cargo"].isin(categorias_excluir)].copy()
+		# Ajuste de valor por sindicato (excecoes.por_sindicato)
+		if plano.sindicatos and "Sindicato do Colaborador" in df.columns:
+			valores = valores_por_sindicato(plano, df["Sindicato do Colaborador"], valores)
+		df["VALOR DIÁRIO VR"] = valores
 
 		# Cálculos finais conforme percentuais e limites
-		df["TOTAL"] = (df["Dias"].fillna(0).astype(int) * df["VALOR DIÁRIO VR"].astype(float)).round(2)
+		dias = df["Dias"].to_numpy(dtype=float, na_value=0.0).astype(int)
+		total = (dias * valores).round(2)
+		custo_empresa, desconto = repartir_total(plano, total)
+		df["TOTAL"] = total
+		df["Custo empresa"] = custo_empresa
+		df["Desconto profissional"] = desconto
 		print(f"[DEBUG] ConvencaoAgent.aplicar: df final shape: {df.shape}")
 		return df
@@ -1,6 +1,5 @@
 from __future__ import annotations
-from typing import Tuple
-import pandas as pd
+from typing import Tuple, TYPE_CHECKING
 from ai_vr.scripts.generate_vr_planilha import (
 	PeriodoReferencia,
 	carregar_bases,
@@ -10,6 +9,9 @@ from ai_vr.scripts.generate_vr_planilha import (
 )
 import sqlite3
 
+if TYPE_CHECKING:
+	import pandas as pd
+
 
 class ExportAgent:
 	"""Consolida cálculos e exporta a planilha utilizando o script existente."""
@@ -17,18 +19,25 @@ class ExportAgent:
 	def __init__(self, db_path: str):
 		self.db_path = db_path
 
-	def gerar_base(self, periodo: PeriodoReferencia) -> pd.DataFrame:
+	def gerar_base(self, periodo: PeriodoReferencia, modo_dias: str = "proporcional") -> pd.DataFrame:
 		conn = sqlite3.connect(self.db_path)
 		try:
 			conn.row_factory = sqlite3.Row
 			bases = carregar_bases(conn, periodo)
 			elegiveis = montar_base_elegivel(bases, periodo)
-			df = calcular_dias_valores(elegiveis, bases, periodo)
+			df = calcular_dias_valores(elegiveis, bases, periodo, modo=modo_dias)
 			return df
 		finally:
 			conn.close()
 
-	def exportar(self, df_saida: pd.DataFrame, output_path: str, competencia: str) -> None:
+	def exportar(self, df_saida: pd.DataFrame, output_path: str, competencia: str, forcar: bool = False) -> bool:
+		"""Exporta a planilha; se a saída não mudou desde a última exportação, não regrava.
+
+		Retorna True se o arquivo foi gravado.
+		"""
+		from ai_vr.core.assinaturas import salvar_se_alterado
+		import pandas as pd
+
 		if df_saida is None:
 			print("[ERRO] DataFrame de saída está None! Nada será exportado.")
 			raise ValueError("DataFrame de saída está None. Verifique o pipeline de geração de dados.")
@@ -37,4 +46,8 @@ class ExportAgent:
 		else:
 			print(f"[INFO] Exportando planilha: {output_path} | Linhas: {len(df_saida)} | Colunas: {len(df_saida.columns)}")
 		# Sem a aba de validações, conforme edição do script
-		salvar_planilha(df_saida, pd.DataFrame(), output_path, competencia)
+		return salvar_se_alterado(
+			df_saida, output_path, competencia,
+			lambda: salvar_planilha(df_saida, pd.DataFrame(), output_path, competencia),
+			forcar=forcar,
+		)
@@ -0,0 +1,290 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TYPE_CHECKING
+import hashlib
+import json
+import os
+
+if TYPE_CHECKING:
+	import numpy as np
+	import pandas as pd
+
+# Colunas de saída de calcular_dias_valores, na ordem em que entram no hash
+COLUNAS_ASSINATURA = [
+	"MATRICULA",
+	"Admissão",
+	"Sindicato do Colaborador",
+	"Competência",
+	"Dias",
+	"VALOR DIÁRIO VR",
+	"TOTAL",
+	"Custo empresa",
+	"Desconto profissional",
+	"OBS GERAL",
+]
+VERSAO_ASSINATURA = 1
+
+
+@dataclass
+class Assinatura:
+	"""Impressão digital de uma competência exportada.
+
+	``matriculas``/``hashes`` ficam ordenados por matrícula (um hash de 64 bits
+	por linha); ``sindicatos`` guarda o digest Merkle de cada sindicato e
+	``digest`` é a raiz, calculada sobre os digests dos sindicatos e das
+	partes extras (ex.: a aba de validações).
+	"""
+	competencia: str
+	digest: str
+	sindicatos: Dict[str, str]
+	extras: Dict[str, str]
+	matriculas: np.ndarray
+	hashes: np.ndarray
+
+
+@dataclass
+class DiffAssinatura:
+	novas: np.ndarray
+	removidas: np.ndarray
+	alteradas: np.ndarray
+
+	@property
+	def vazio(self) -> bool:
+		return not (len(self.novas) or len(self.removidas) or len(self.alteradas))
+
+
+def hash_linhas(df: pd.DataFrame) -> np.ndarray:
+	"""Hash estável (uint64) de cada linha sobre ``COLUNAS_ASSINATURA``.
+
+	Os tipos são normalizados antes (inteiros int64, valores float64, textos
+	str) para que a mesma saída gere os mesmos hashes em qualquer execução.
+	"""
+	import numpy as np
+	import pandas as pd
+
+	normalizado = pd.DataFrame({
+		"MATRICULA": df["MATRICULA"].to_numpy(dtype=np.int64),
+		"Dias": df["Dias"].to_numpy(dtype=np.int64),
+		**{c: df[c].to_numpy(dtype=float) for c in ("VALOR DIÁRIO VR", "TOTAL", "Custo empresa", "Desconto profissional")},
+		**{c: df[c].fillna("").astype(str).to_numpy() for c in
+		   ("Admissão", "Sindicato do Colaborador", "Competência", "OBS GERAL")},
+	})[COLUNAS_ASSINATURA]
+	return pd.util.hash_pandas_object(normalizado, index=False).to_numpy()
+
+
+def _digest_bytes(*partes: bytes) -> str:
+	h = hashlib.sha256()
+	for parte in partes:
+		h.update(parte)
+	return h.hexdigest()
+
+
+def _digest_quadro(df: pd.DataFrame) -> str:
+	import pandas as pd
+
+	hashes = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+	return _digest_bytes("\x1f".join(map(str, df.columns)).encode("utf-8"), hashes.tobytes())
+
+
+def calcular_assinatura(df_saida: pd.DataFrame, competencia: str,
+						extras: Optional[Dict[str, pd.DataFrame]] = None) -> Assinatura:
+	"""Calcula hashes por linha, digests por sindicato e o digest do arquivo.
+
+	As linhas são ordenadas por (sindicato, matrícula), então a ordem de saída
+	do cálculo não altera a assinatura. ``extras`` são outras abas do arquivo
+	(cada uma vira uma folha a mais na árvore).
+	"""
+	import numpy as np
+
+	if df_saida.empty:
+		df_saida = df_saida.reindex(columns=COLUNAS_ASSINATURA)
+	return _montar_assinatura(
+		df_saida["MATRICULA"].to_numpy(dtype=np.int64),
+		df_saida["Sindicato do Colaborador"].fillna("").astype(str).to_numpy(dtype=object),
+		hash_linhas(df_saida),
+		competencia,
+		extras,
+	)
+
+
+def _montar_assinatura(matriculas: np.ndarray, sindicato_linhas: np.ndarray, hashes: np.ndarray, competencia: str,
+					   extras: Optional[Dict[str, pd.DataFrame]] = None) -> Assinatura:
+	"""Assinatura a partir de matrícula, sindicato e hash de cada linha (em qualquer ordem)."""
+	import numpy as np
+	import pandas as pd
+
+	cod_sind, nomes = pd.factorize(sindicato_linhas, sort=True)
+
+	ordem = np.lexsort((matriculas, cod_sind))
+	cod_ordenado = cod_sind[ordem]
+	mat_ordenadas = matriculas[ordem]
+	hash_ordenados = hashes[ordem]
+	limites = np.searchsorted(cod_ordenado, np.arange(len(nomes) + 1))
+
+	sindicatos = {}
+	for i, nome in enumerate(nomes):
+		fatia = slice(limites[i], limites[i + 1])
+		sindicatos[nome] = _digest_bytes(mat_ordenadas[fatia].tobytes(), hash_ordenados[fatia].tobytes())
+
+	digests_extras = {nome: _digest_quadro(quadro) for nome, quadro in sorted((extras or {}).items())}
+	folhas = [f"competencia\t{competencia}", f"colunas\t{chr(31).join(COLUNAS_ASSINATURA)}"]
+	folhas += [f"sindicato\t{nome}\t{d}" for nome, d in sindicatos.items()]
+	folhas += [f"extra\t{nome}\t{d}" for nome, d in digests_extras.items()]
+
+	por_matricula = np.argsort(matriculas, kind="stable")
+	return Assinatura(
+		competencia=competencia,
+		digest=_digest_bytes("\n".join(folhas).encode("utf-8")),
+		sindicatos=sindicatos,
+		extras=digests_extras,
+		matriculas=matriculas[por_matricula],
+		hashes=hashes[por_matricula],
+	)
+
+
+def comparar_assinaturas(anterior: Assinatura, atual: Assinatura) -> DiffAssinatura:
+	"""Matrículas novas, removidas e alteradas entre duas assinaturas, em O(n).
+
+	O join é por hash (``Index.get_indexer``); nenhuma planilha é relida.
+	"""
+	import numpy as np
+	import pandas as pd
+
+	idx = pd.Index(anterior.matriculas).get_indexer(atual.matriculas)
+	existentes = idx >= 0
+	presentes = np.zeros(len(anterior.matriculas), dtype=bool)
+	presentes[idx[existentes]] = True
+
+	alteradas = existentes.copy()
+	alteradas[existentes] = anterior.hashes[idx[existentes]] != atual.hashes[existentes]
+	return DiffAssinatura(
+		novas=atual.matriculas[~existentes],
+		removidas=anterior.matriculas[~presentes],
+		alteradas=atual.matriculas[alteradas],
+	)
+
+
+def caminhos_assinatura(saida: str):
+	"""Arquivos da assinatura gravados ao lado da planilha: (.json, .npz)."""
+	return f"{saida}.assinatura.json", f"{saida}.assinatura.npz"
+
+
+def gravar_assinatura(assinatura: Assinatura, saida: str) -> None:
+	import numpy as np
+
+	caminho_json, caminho_npz = caminhos_assinatura(saida)
+	# Grava em temporários e troca no fim: nunca deixa um par json/npz inconsistente
+	with open(caminho_npz + ".tmp", "wb") as f:
+		np.savez(f, matriculas=assinatura.matriculas, hashes=assinatura.hashes)
+	with open(caminho_json + ".tmp", "w", encoding="utf-8") as f:
+		json.dump({
+			"versao": VERSAO_ASSINATURA,
+			"competencia": assinatura.competencia,
+			"digest": assinatura.digest,
+			"linhas": int(len(assinatura.matriculas)),
+			"sindicatos": assinatura.sindicatos,
+			"extras": assinatura.extras,
+		}, f, ensure_ascii=False, indent=2)
+	os.replace(caminho_npz + ".tmp", caminho_npz)
+	os.replace(caminho_json + ".tmp", caminho_json)
+
+
+def ler_assinatura(saida: str) -> Optional[Assinatura]:
+	"""Assinatura gravada ao lado de ``saida`` (None se ausente ou de outra versão)."""
+	import numpy as np
+
+	caminho_json, caminho_npz = caminhos_assinatura(saida)
+	if not (os.path.exists(caminho_json) and os.path.exists(caminho_npz)):
+		return None
+	with open(caminho_json, "r", encoding="utf-8") as f:
+		meta = json.load(f)
+	if meta.get("versao") != VERSAO_ASSINATURA:
+		return None
+	with np.load(caminho_npz) as dados:
+		matriculas, hashes = dados["matriculas"], dados["hashes"]
+	return Assinatura(
+		competencia=meta["competencia"],
+		digest=meta["digest"],
+		sindicatos=meta["sindicatos"],
+		extras=meta.get("extras", {}),
+		matriculas=matriculas,
+		hashes=hashes,
+	)
+
+
+def salvar_se_alterado(df_saida: pd.DataFrame, saida: str, competencia: str, escrever: Callable[[], None],
+					   df_violacoes: Optional[pd.DataFrame] = None, forcar: bool = False) -> bool:
+	"""Grava a planilha e a assinatura só se o conteúdo mudou desde a última exportação.
+
+	``escrever`` grava a planilha em ``saida`` (ex.: ``salvar_planilha`` do
+	gerador) e só é chamada quando há o que gravar; ``df_violacoes`` entra
+	na assinatura como a aba "Validações". Retorna True se o arquivo foi
+	(re)gravado. Havendo assinatura anterior, imprime as matrículas
+	novas/removidas/alteradas.
+	"""
+	extras = {"Validações": df_violacoes} if df_violacoes is not None else None
+	atual = calcular_assinatura(df_saida, competencia, extras)
+	if not _precisa_gravar(atual, saida, forcar):
+		return False
+
+	escrever()
+	gravar_assinatura(atual, saida)
+	return True
+
+
+def _precisa_gravar(atual: Assinatura, saida: str, forcar: bool) -> bool:
+	"""Compara ``atual`` com a assinatura gravada ao lado de ``saida`` e imprime as alterações."""
+	anterior = ler_assinatura(saida)
+	if anterior is None:
+		return True
+	if anterior.digest == atual.digest and os.path.exists(saida) and not forcar:
+		print(f"⏭️  Sem alterações desde a última exportação ({atual.digest[:12]}): {saida} mantido")
+		return False
+	diff = comparar_assinaturas(anterior, atual)
+	print(
+		f"🔁 Alterações: {len(diff.novas)} nova(s), {len(diff.removidas)} removida(s), "
+		f"{len(diff.alteradas)} alterada(s)"
+	)
+	sindicatos = sorted(s for s in set(anterior.sindicatos) | set(atual.sindicatos)
+						if anterior.sindicatos.get(s) != atual.sindicatos.get(s))
+	if sindicatos:
+		print(f"   Sindicatos afetados: {', '.join(sindicatos)}")
+	return True
+
+
+def salvar_se_alterado_em_lotes(lotes: Iterable[pd.DataFrame], planilha: Any, competencia: str,
+								forcar: bool = False) -> Tuple[bool, int]:
+	"""``salvar_se_alterado`` para saídas que chegam em lotes (ver calcular_em_lotes).
+
+	Cada lote vai direto para ``planilha`` (ex.: ``PlanilhaEmLotes`` do
+	gerador: ``adicionar``, ``concluir``, ``descartar``, ``saida`` e
+	``linhas``) e da assinatura guarda-se só matrícula, sindicato e hash de
+	cada linha; se nada mudou, a planilha é descartada. A assinatura é a
+	mesma de ``calcular_assinatura`` sobre a saída inteira. Retorna (gravou,
+	linhas).
+	"""
+	import numpy as np
+
+	saida = planilha.saida
+	matriculas, sindicatos, hashes = [], [], []
+	try:
+		for df_saida in lotes:
+			planilha.adicionar(df_saida)
+			matriculas.append(df_saida["MATRICULA"].to_numpy(dtype=np.int64))
+			sindicatos.append(df_saida["Sindicato do Colaborador"].fillna("").astype(str).to_numpy(dtype=object))
+			hashes.append(hash_linhas(df_saida))
+		atual = _montar_assinatura(
+			np.concatenate(matriculas) if matriculas else np.empty(0, dtype=np.int64),
+			np.concatenate(sindicatos) if sindicatos else np.empty(0, dtype=object),
+			np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64),
+			competencia,
+		)
+		if not _precisa_gravar(atual, saida, forcar):
+			planilha.descartar()
+			return False, planilha.linhas
+		planilha.concluir(COLUNAS_ASSINATURA)
+	except BaseException:
+		planilha.descartar()
+		raise
+	gravar_assinatura(atual, saida)
+	return True, planilha.linhas
@@ -0,0 +1,215 @@
+from __future__ import annotations
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+import sqlite3
+
+if TYPE_CHECKING:
+	import numpy as np
+	import pandas as pd
+
+
+# Feriados fixos (mês, dia, descrição)
+FERIADOS_NACIONAIS = [
+	(1, 1, "Confraternização Universal"),
+	(4, 21, "Tiradentes"),
+	(5, 1, "Dia do Trabalho"),
+	(9, 7, "Independência do Brasil"),
+	(10, 12, "Nossa Senhora Aparecida"),
+	(11, 2, "Finados"),
+	(11, 15, "Proclamação da República"),
+	(11, 20, "Dia Nacional de Zumbi e da Consciência Negra"),
+	(12, 25, "Natal"),
+]
+
+FERIADOS_ESTADUAIS = {
+	"PR": [(12, 19, "Emancipação Política do Paraná")],
+	"RJ": [(4, 23, "Dia de São Jorge")],
+	"RS": [(9, 20, "Revolução Farroupilha")],
+	"SP": [(7, 9, "Revolução Constitucionalista")],
+}
+
+# Feriados municipais por (UF, município); Corpus Christi é tratado como móvel
+FERIADOS_MUNICIPAIS = {
+	("PR", "Curitiba"): [(9, 8, "Nossa Senhora da Luz dos Pinhais")],
+	("RJ", "Rio de Janeiro"): [(1, 20, "São Sebastião")],
+	("RS", "Porto Alegre"): [(2, 2, "Nossa Senhora dos Navegantes")],
+	("SP", "São Paulo"): [(1, 25, "Aniversário de São Paulo")],
+}
+
+
+def pascoa(ano: int) -> date:
+	"""Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+	a = ano % 19
+	b, c = divmod(ano, 100)
+	d, e = divmod(b, 4)
+	f = (b + 8) // 25
+	g = (b - f + 1) // 3
+	h = (19 * a + b - d - g + 15) % 30
+	i, k = divmod(c, 4)
+	l = (32 + 2 * e + 2 * i - h - k) % 7
+	m = (a + 11 * h + 22 * l) // 451
+	mes, dia = divmod(h + l - 7 * m + 114, 31)
+	return date(ano, mes, dia + 1)
+
+
+def feriados_padrao(anos: Iterable[int]) -> List[Tuple[date, str, str, Optional[str], Optional[str]]]:
+	"""Gera (data, descrição, escopo, uf, município) dos feriados conhecidos para os anos dados."""
+	feriados = []
+	for ano in anos:
+		for mes, dia, descricao in FERIADOS_NACIONAIS:
+			feriados.append((date(ano, mes, dia), descricao, "NACIONAL", None, None))
+		feriados.append((pascoa(ano) - timedelta(days=2), "Sexta-feira Santa", "NACIONAL", None, None))
+
+		for uf, lista in FERIADOS_ESTADUAIS.items():
+			for mes, dia, descricao in lista:
+				feriados.append((date(ano, mes, dia), descricao, "ESTADUAL", uf, None))
+
+		corpus_christi = pascoa(ano) + timedelta(days=60)
+		for (uf, municipio), lista in FERIADOS_MUNICIPAIS.items():
+			for mes, dia, descricao in lista:
+				feriados.append((date(ano, mes, dia), descricao, "MUNICIPAL", uf, municipio))
+			feriados.append((corpus_christi, "Corpus Christi", "MUNICIPAL", uf, municipio))
+	return feriados
+
+
+def _tabela_existe(conn: sqlite3.Connection, nome: str) -> bool:
+	return conn.execute(
+		"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nome,)
+	).fetchone() is not None
+
+
+class CalendarioUteis:
+	"""Calendário de dias úteis por sindicato sobre um intervalo fixo de datas.
+
+	Mantém, para cada sindicato, a soma acumulada de dias úteis (segunda a sexta
+	sem feriados nacionais, estaduais e municipais). Qualquer contagem em um
+	intervalo [inicio, fim] é uma subtração entre duas posições: O(1) por
+	consulta e totalmente vetorizada para muitos colaboradores de uma vez.
+	"""
+
+	def __init__(self, inicio: date, fim: date, sindicato_ids: Sequence[int],
+				 feriados: Optional[Dict[int, Sequence[date]]] = None):
+		import numpy as np
+
+		if fim < inicio:
+			raise ValueError(f"Intervalo inválido para o calendário: {inicio} > {fim}")
+
+		self.inicio = inicio
+		self.fim = fim
+		self.sindicato_ids = np.asarray(sorted(set(int(s) for s in sindicato_ids)), dtype=np.int64)
+
+		n_dias = (fim - inicio).days + 1
+		dias = np.datetime64(inicio, "D") + np.arange(n_dias)
+		uteis = np.tile(np.is_busday(dias), (len(self.sindicato_ids), 1))
+
+		for sindicato_id, datas in (feriados or {}).items():
+			linha = np.searchsorted(self.sindicato_ids, sindicato_id)
+			if linha >= len(self.sindicato_ids) or self.sindicato_ids[linha] != sindicato_id:
+				continue
+			offsets = (np.asarray(datas, dtype="datetime64[D]") - dias[0]).astype(np.int64)
+			offsets = offsets[(offsets >= 0) & (offsets < n_dias)]
+			uteis[linha, offsets] = False
+
+		self._acumulado = np.zeros((len(self.sindicato_ids), n_dias + 1), dtype=np.int32)
+		np.cumsum(uteis, axis=1, out=self._acumulado[:, 1:])
+
+	@classmethod
+	def do_banco(cls, conn: sqlite3.Connection, inicio: date, fim: date) -> "CalendarioUteis":
+		"""Monta o calendário a partir das tabelas ``sindicatos`` e ``feriados``."""
+		import numpy as np
+
+		sindicato_ids = [r[0] for r in conn.execute("SELECT id FROM sindicatos")]
+		feriados: Dict[int, List[str]] = {}
+		if _tabela_existe(conn, "feriados"):
+			linhas = conn.execute(
+				"""
+				SELECT s.id, f.data
+				FROM sindicatos s
+				JOIN estados e ON s.estado_id = e.id
+				JOIN feriados f
+				  ON f.escopo = 'NACIONAL'
+				  OR (f.escopo = 'ESTADUAL' AND f.uf = e.uf)
+				  OR (f.escopo = 'MUNICIPAL' AND f.uf = e.uf AND f.municipio = s.municipio)
+				WHERE f.data BETWEEN ? AND ?
+				""",
+				(inicio.isoformat(), fim.isoformat()),
+			).fetchall()
+			for sindicato_id, data in linhas:
+				feriados.setdefault(sindicato_id, []).append(str(data)[:10])
+		else:
+			print("[AVISO] Tabela 'feriados' ausente: calendário considera apenas fins de semana.")
+		return cls(inicio, fim, sindicato_ids, {k: np.array(v, dtype="datetime64[D]") for k, v in feriados.items()})
+
+	def _offsets(self, datas) -> np.ndarray:
+		import numpy as np
+
+		datas = np.asarray(datas, dtype="datetime64[D]")
+		return (datas - np.datetime64(self.inicio, "D")).astype(np.int64)
+
+	def dias_uteis(self, sindicato_ids, inicios, fins) -> np.ndarray:
+		"""Dias úteis em [inicio, fim] (inclusive) por elemento, recortado ao calendário.
+
+		Aceita escalares ou arrays alinhados; intervalos vazios ou invertidos
+		resultam em 0. Sindicatos desconhecidos levantam ``KeyError``.
+		"""
+		import numpy as np
+
+		sindicato_ids = np.asarray(sindicato_ids, dtype=np.int64)
+		desconhecidos = np.setdiff1d(sindicato_ids, self.sindicato_ids)
+		if desconhecidos.size:
+			raise KeyError(f"Sindicatos fora do calendário: {desconhecidos.tolist()}")
+		linhas = np.searchsorted(self.sindicato_ids, sindicato_ids)
+
+		n_dias = self._acumulado.shape[1] - 1
+		a = np.clip(self._offsets(inicios), 0, n_dias)
+		b = np.clip(self._offsets(fins) + 1, 0, n_dias)
+		b = np.maximum(a, b)
+		return self._acumulado[linhas, b] - self._acumulado[linhas, a]
+
+	def dias_uteis_ate_fim(self, sindicato_ids, datas_inicio) -> np.ndarray:
+		"""Dias úteis de cada data (ex.: admissão) até o fim do calendário."""
+		import numpy as np
+
+		return self.dias_uteis(sindicato_ids, datas_inicio, np.datetime64(self.fim, "D"))
+
+
+def garantir_dias_uteis(conn: sqlite3.Connection, inicio: date, fim: date,
+						persistir: bool = False) -> pd.DataFrame:
+	"""Retorna (sindicato_id, dias_uteis) do período, calculando o que faltar.
+
+	Linhas já gravadas em ``dias_uteis`` para o período exato têm precedência
+	(ex.: a base oficial do sindicato). Sindicatos sem linha são calculados pelo
+	calendário; por padrão nada é gravado (serve a conexões somente leitura).
+	Com ``persistir`` os valores calculados são inseridos na transação corrente
+	de ``conn``: confirmar ou desfazer fica com quem chamou.
+	"""
+	import pandas as pd
+
+	existentes = pd.read_sql_query(
+		"""
+		SELECT sindicato_id, dias_uteis
+		FROM dias_uteis
+		WHERE periodo_inicio = ? AND periodo_fim = ?
+		""",
+		conn,
+		params=(inicio.isoformat(), fim.isoformat()),
+	)
+	todos = [r[0] for r in conn.execute("SELECT id FROM sindicatos ORDER BY id")]
+	faltantes = sorted(set(todos) - set(existentes["sindicato_id"]))
+	if not faltantes:
+		return existentes
+
+	calendario = CalendarioUteis.do_banco(conn, inicio, fim)
+	dias = calendario.dias_uteis(faltantes, [inicio] * len(faltantes), [fim] * len(faltantes))
+	calculados = pd.DataFrame({"sindicato_id": faltantes, "dias_uteis": dias.astype(int)})
+
+	if persistir:
+		conn.executemany(
+			"""
+			INSERT OR IGNORE INTO dias_uteis (sindicato_id, periodo_inicio, periodo_fim, dias_uteis)
+			VALUES (?, ?, ?, ?)
+			""",
+			[(int(s), inicio.isoformat(), fim.isoformat(), int(d)) for s, d in zip(faltantes, dias)],
+		)
+
+	return pd.concat([existentes, calculados], ignore_index=True)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Sequence, Union, TYPE_CHECKING
+
+from ai_vr.agents.convencao_agent import PlanoConvencao, compilar_convencao
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+LINHA_TOTAL = "TOTAL"
+
+ConvencaoEntrada = Union[str, Dict[str, Any], PlanoConvencao]
+
+
+def _planos(convencoes: Union[Mapping[str, ConvencaoEntrada], Sequence[ConvencaoEntrada]]):
+	if isinstance(convencoes, Mapping):
+		itens = list(convencoes.items())
+	else:
+		itens = [(f"cenario_{i}", c) for i, c in enumerate(convencoes, 1)]
+	nomes = [nome for nome, _ in itens]
+	planos = [c if isinstance(c, PlanoConvencao) else compilar_convencao(c) for _, c in itens]
+	return nomes, planos
+
+
+def avaliar_cenarios(df_base: pd.DataFrame,
+					 convencoes: Union[Mapping[str, ConvencaoEntrada], Sequence[ConvencaoEntrada]]) -> pd.DataFrame:
+	"""Avalia N variantes de convenção sobre a mesma base em uma única passada.
+
+	``df_base`` é a saída de ``ExportAgent.gerar_base`` (calculada uma só vez) e
+	``convencoes`` um dict {nome: convenção} ou uma lista de convenções (JSON,
+	caminho, dict ou PlanoConvencao). Os valores são montados como uma matriz
+	linhas x cenários e o TOTAL sai do broadcasting ``dias[:, None] * valores``,
+	com as mesmas regras de ``ConvencaoAgent.aplicar``.
+
+	Retorna um resumo longo por (cenario, sindicato), incluindo uma linha
+	"TOTAL" por cenário.
+	"""
+	import numpy as np
+	import pandas as pd
+
+	nomes, planos = _planos(convencoes)
+	colunas = ["cenario", "sindicato", "colaboradores", "dias", "total", "custo_empresa", "desconto_profissional"]
+	if not planos or df_base is None or df_base.empty:
+		return pd.DataFrame(columns=colunas)
+
+	n_cen = len(planos)
+	dias = df_base["Dias"].to_numpy(dtype=float, na_value=0.0).astype(int)
+	if "VALOR DIÁRIO VR" in df_base.columns:
+		valor_base = df_base["VALOR DIÁRIO VR"].to_numpy(dtype=float, na_value=0.0)
+	else:
+		valor_base = np.zeros(len(df_base))
+
+	# Parâmetros escalares de cada cenário como vetores (1 x N)
+	padrao = np.array([p.valor_vr_diario_padrao for p in planos])
+	pct_desc = np.array([p.percentual_desconto_colaborador for p in planos])
+	pct_empresa = np.array([p.percentual_custo_empresa for p in planos])
+	max_desc = np.array([np.inf if p.max_desconto is None else p.max_desconto for p in planos])
+
+	# Linhas agrupadas por sindicato uma única vez: as somas por sindicato viram
+	# um reduceat sobre fatias contíguas, para todos os cenários ao mesmo tempo
+	cod_sind, sindicatos = pd.factorize(df_base["Sindicato do Colaborador"], use_na_sentinel=False)
+	ordem = np.argsort(cod_sind, kind="stable")
+	cod_sind = cod_sind[ordem]
+	dias = dias[ordem]
+	valor_base = valor_base[ordem]
+	inicios = np.searchsorted(cod_sind, np.arange(len(sindicatos)))
+
+	# Valores diários: banco (ou padrão do cenário) e exceções por sindicato
+	excecoes = np.full((len(sindicatos), n_cen), np.nan)
+	for j, plano in enumerate(planos):
+		if plano.sindicatos:
+			idx = pd.Index(plano.sindicatos).get_indexer(sindicatos)
+			encontrados = idx >= 0
+			excecoes[encontrados, j] = plano.valores_sindicato[idx[encontrados]]
+	valores = np.where(valor_base[:, None] > 0, valor_base[:, None], padrao[None, :])
+	excecao_linha = excecoes[cod_sind]
+	valores = np.where(np.isnan(excecao_linha), valores, excecao_linha)
+
+	# Exclusões por categoria: máscara linhas x cenários
+	mantidos = np.ones((len(df_base), n_cen), dtype=bool)
+	if "categoria_cargo" in df_base.columns:
+		cod_cat, categorias = pd.factorize(df_base["categoria_cargo"], use_na_sentinel=False)
+		cod_cat = cod_cat[ordem]
+		excluidas = np.array([[c in p.categorias_excluidas for p in planos] for c in categorias], dtype=bool)
+		if len(categorias):
+			mantidos = ~excluidas[cod_cat]
+
+	total = (dias[:, None] * valores).round(2) * mantidos
+	desconto_bruto = total * pct_desc[None, :]
+	desconto = np.minimum(desconto_bruto, max_desc[None, :])
+	custo_empresa = (total * pct_empresa[None, :] + (desconto_bruto - desconto)).round(2)
+	desconto = desconto.round(2)
+
+	def por_sindicato(matriz):
+		return np.add.reduceat(matriz, inicios, axis=0)
+
+	blocos = {
+		"colaboradores": por_sindicato(mantidos.astype(np.int64)),
+		"dias": por_sindicato(dias[:, None] * mantidos),
+		"total": por_sindicato(total),
+		"custo_empresa": por_sindicato(custo_empresa),
+		"desconto_profissional": por_sindicato(desconto),
+	}
+
+	rotulos = list(sindicatos) + [LINHA_TOTAL]
+	dados: Dict[str, List[Any]] = {
+		"cenario": np.repeat(nomes, len(rotulos)),
+		"sindicato": rotulos * n_cen,
+	}
+	for metrica, matriz in blocos.items():
+		com_total = np.vstack([matriz, matriz.sum(axis=0, keepdims=True)])
+		dados[metrica] = com_total.T.reshape(-1)
+
+	resumo = pd.DataFrame(dados, columns=colunas)
+	for metrica in ("total", "custo_empresa", "desconto_profissional"):
+		resumo[metrica] = resumo[metrica].round(2)
+	return resumo
+
+
+if __name__ == "__main__":
+	import argparse
+	from ai_vr.agents.export_agent import ExportAgent
+	from ai_vr.scripts.generate_vr_planilha import PeriodoReferencia, to_date
+
+	parser = argparse.ArgumentParser(description="Avalia vários cenários de convenção sobre a mesma base")
+	parser.add_argument("convencoes", nargs="+", help="Arquivos JSON de convenção (um por cenário)")
+	parser.add_argument("--db", default="ai_vr/db/vr_database.db", help="Arquivo SQLite do banco")
+	parser.add_argument("--inicio", default="2025-04-15", help="Início do período (YYYY-MM-DD)")
+	parser.add_argument("--fim", default="2025-05-15", help="Fim do período (YYYY-MM-DD)")
+	args = parser.parse_args()
+
+	periodo = PeriodoReferencia(inicio=to_date(args.inicio), fim=to_date(args.fim))
+	base = ExportAgent(db_path=args.db).gerar_base(periodo)
+	resumo = avaliar_cenarios(base, {caminho: caminho for caminho in args.convencoes})
+	print(resumo.to_string(index=False))
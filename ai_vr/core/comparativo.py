@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import sqlite3
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+ENTROU = "ENTROU"
+SAIU = "SAIU"
+DIAS_ALTERADOS = "DIAS ALTERADOS"
+VALOR_ALTERADO = "VALOR ALTERADO"
+
+COLUNAS_COMPARATIVO = [
+	"MATRICULA", "Sindicato do Colaborador", "Situação",
+	"Dias anterior", "Dias atual", "TOTAL anterior", "TOTAL atual", "Diferença", "Motivo",
+]
+_COLUNAS_BASE = ["MATRICULA", "Sindicato do Colaborador", "Dias", "TOTAL", "OBS GERAL"]
+
+
+def carregar_planilha(caminho: str) -> pd.DataFrame:
+	"""Lê a aba "VR MENSAL ..." de um arquivo exportado (só as colunas comparadas)."""
+	import pandas as pd
+
+	with pd.ExcelFile(caminho, engine="openpyxl") as arquivo:
+		abas = [a for a in arquivo.sheet_names if a.startswith("VR MENSAL")] or arquivo.sheet_names[:1]
+		return arquivo.parse(abas[0], usecols=lambda c: c in _COLUNAS_BASE)
+
+
+def carregar_calculos_vr(conn: sqlite3.Connection, competencia: str) -> pd.DataFrame:
+	"""Lê uma competência ("MM/AAAA") gravada em ``calculos_vr`` no formato da planilha."""
+	import pandas as pd
+
+	mes, ano = (int(p) for p in competencia.split("/"))
+	return pd.read_sql_query(
+		"""
+		SELECT c.matricula AS "MATRICULA",
+			   s.nome_abreviado AS "Sindicato do Colaborador",
+			   v.dias_vr_calculados AS "Dias",
+			   v.valor_total AS "TOTAL",
+			   COALESCE(v.observacoes, '') AS "OBS GERAL"
+		FROM calculos_vr v
+		JOIN colaboradores c ON c.id = v.colaborador_id
+		JOIN sindicatos s ON s.id = c.sindicato_id
+		WHERE v.periodo_mes = ? AND v.periodo_ano = ?
+		""",
+		conn,
+		params=(mes, ano),
+	)
+
+
+def comparar_competencias(anterior: pd.DataFrame, atual: pd.DataFrame, tolerancia: float = 0.005) -> pd.DataFrame:
+	"""Compara duas competências por matrícula e classifica as diferenças.
+
+	Uma linha por matrícula que entrou, saiu, teve os dias alterados ou só o
+	valor alterado; matrículas iguais nos dois meses não aparecem. O motivo
+	vem da OBS GERAL da competência atual (da anterior para quem saiu).
+
+	O join é por hash (``Index.get_indexer``) sobre arrays NumPy, em uma
+	única passada: meses de 1M linhas comparam em poucos segundos.
+	"""
+	import numpy as np
+	import pandas as pd
+
+	def colunas(df):
+		mat = df["MATRICULA"].to_numpy(dtype=np.int64)
+		return (
+			mat,
+			df["Sindicato do Colaborador"].fillna("").astype(str).to_numpy(),
+			df["Dias"].to_numpy(dtype=float, na_value=0.0),
+			df["TOTAL"].to_numpy(dtype=float, na_value=0.0),
+			df["OBS GERAL"].fillna("").astype(str).to_numpy() if "OBS GERAL" in df.columns else np.full(len(mat), ""),
+		)
+
+	mat_a, sind_a, dias_a, total_a, obs_a = colunas(anterior)
+	mat_b, sind_b, dias_b, total_b, obs_b = colunas(atual)
+
+	idx = pd.Index(mat_a).get_indexer(mat_b)
+	em_ambas = idx >= 0
+	presentes = np.zeros(len(mat_a), dtype=bool)
+	presentes[idx[em_ambas]] = True
+	ia = idx[em_ambas]
+
+	# Atual x anterior para quem está nas duas competências
+	dias_mudou = dias_a[ia] != dias_b[em_ambas]
+	valor_mudou = np.abs(total_a[ia] - total_b[em_ambas]) > tolerancia
+	alterados = dias_mudou | valor_mudou
+	linhas_b = np.flatnonzero(em_ambas)[alterados]
+	linhas_a = ia[alterados]
+
+	entrou = np.flatnonzero(~em_ambas)
+	saiu = np.flatnonzero(~presentes)
+
+	situacao = np.concatenate([
+		np.full(len(entrou), ENTROU, dtype=object),
+		np.full(len(saiu), SAIU, dtype=object),
+		np.where(dias_mudou[alterados], DIAS_ALTERADOS, VALOR_ALTERADO).astype(object),
+	])
+	# Quem está em só uma competência: dias ausentes (NaN) e TOTAL 0 do outro lado
+	nan_e, nan_s = np.full(len(entrou), np.nan), np.full(len(saiu), np.nan)
+	total_ant = np.concatenate([np.zeros(len(entrou)), total_a[saiu], total_a[linhas_a]])
+	total_atu = np.concatenate([total_b[entrou], np.zeros(len(saiu)), total_b[linhas_b]])
+
+	relatorio = pd.DataFrame({
+		"MATRICULA": np.concatenate([mat_b[entrou], mat_a[saiu], mat_b[linhas_b]]),
+		"Sindicato do Colaborador": np.concatenate([sind_b[entrou], sind_a[saiu], sind_b[linhas_b]]),
+		"Situação": situacao,
+		"Dias anterior": np.concatenate([nan_e, dias_a[saiu], dias_a[linhas_a]]),
+		"Dias atual": np.concatenate([dias_b[entrou], nan_s, dias_b[linhas_b]]),
+		"TOTAL anterior": total_ant,
+		"TOTAL atual": total_atu,
+		"Motivo": np.concatenate([obs_b[entrou], obs_a[saiu], obs_b[linhas_b]]),
+	})
+	relatorio["Diferença"] = (relatorio["TOTAL atual"] - relatorio["TOTAL anterior"]).round(2)
+	return relatorio[COLUNAS_COMPARATIVO].sort_values(["Situação", "MATRICULA"], kind="stable", ignore_index=True)
+
+
+def resumo_comparativo(relatorio: pd.DataFrame) -> pd.DataFrame:
+	"""Quantidade de matrículas e diferença de valor por situação."""
+	return (
+		relatorio.groupby("Situação", sort=True)
+		.agg(colaboradores=("MATRICULA", "size"), diferenca=("Diferença", "sum"))
+		.round(2).reset_index()
+	)
+
+
+if __name__ == "__main__":
+	import argparse
+	import os
+
+	parser = argparse.ArgumentParser(description="Compara duas competências de VR (arquivos XLSX ou calculos_vr)")
+	parser.add_argument("anterior", help="Arquivo XLSX exportado ou competência MM/AAAA (lida de calculos_vr)")
+	parser.add_argument("atual", help="Arquivo XLSX exportado ou competência MM/AAAA (lida de calculos_vr)")
+	parser.add_argument("--db", default="ai_vr/db/vr_database.db", help="Banco com calculos_vr")
+	parser.add_argument("--saida", help="Grava o relatório completo (.xlsx ou .csv)")
+	args = parser.parse_args()
+
+	def carregar(origem):
+		if os.path.exists(origem):
+			return carregar_planilha(origem)
+		conn = sqlite3.connect(args.db)
+		try:
+			return carregar_calculos_vr(conn, origem)
+		finally:
+			conn.close()
+
+	relatorio = comparar_competencias(carregar(args.anterior), carregar(args.atual))
+	print(resumo_comparativo(relatorio).to_string(index=False))
+	if args.saida:
+		if args.saida.endswith(".csv"):
+			relatorio.to_csv(args.saida, index=False)
+		else:
+			relatorio.to_excel(args.saida, index=False, sheet_name="Comparativo")
+		print(f"✅ Relatório gravado: {args.saida}")
@@ -0,0 +1,273 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, TYPE_CHECKING
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+# Banco próprio: o banco principal é reconstruído e trocado atomicamente a cada
+# população, o que apagaria o histórico de execuções se ele morasse lá.
+DEFAULT_LEDGER_PATH = "ai_vr/db/vr_execucoes.db"
+
+SCHEMA_LEDGER = """
+CREATE TABLE IF NOT EXISTS runs (
+	id INTEGER PRIMARY KEY,
+	comando TEXT NOT NULL,
+	competencia TEXT,
+	parametros TEXT, -- JSON
+	entradas TEXT, -- JSON {nome: sha256}
+	saida TEXT,
+	linhas INTEGER,
+	status TEXT NOT NULL, -- EM_ANDAMENTO, OK, ERRO
+	erro TEXT,
+	iniciado_em TEXT NOT NULL,
+	finalizado_em TEXT,
+	duracao_ms REAL
+);
+CREATE TABLE IF NOT EXISTS run_stages (
+	id INTEGER PRIMARY KEY,
+	run_id INTEGER NOT NULL REFERENCES runs(id),
+	ordem INTEGER NOT NULL,
+	etapa TEXT NOT NULL,
+	linhas INTEGER,
+	duracao_ms REAL NOT NULL,
+	iniciado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_iniciado_em ON runs(iniciado_em);
+CREATE INDEX IF NOT EXISTS idx_run_stages_etapa ON run_stages(etapa, run_id);
+"""
+
+
+def _agora() -> str:
+	return datetime.now().isoformat(timespec="milliseconds")
+
+
+def hash_arquivo(caminho: str, bloco: int = 1 << 20) -> Optional[str]:
+	"""SHA-256 do arquivo (lido em blocos); None se não existir."""
+	if not os.path.exists(caminho):
+		return None
+	h = hashlib.sha256()
+	with open(caminho, "rb") as f:
+		for parte in iter(lambda: f.read(bloco), b""):
+			h.update(parte)
+	return h.hexdigest()
+
+
+def conectar_ledger(caminho: str = DEFAULT_LEDGER_PATH) -> sqlite3.Connection:
+	diretorio = os.path.dirname(caminho)
+	if diretorio:
+		os.makedirs(diretorio, exist_ok=True)
+	conn = sqlite3.connect(caminho, timeout=10)
+	conn.executescript(SCHEMA_LEDGER)
+	return conn
+
+
+@dataclass
+class Etapa:
+	"""Etapa em andamento; quem executa preenche ``linhas`` ao final."""
+	nome: str
+	linhas: Optional[int] = None
+
+
+class RegistroExecucao:
+	"""Registro de uma execução do pipeline em ``runs``/``run_stages``.
+
+	Uso:
+		with RegistroExecucao("generate_vr_planilha", parametros, competencia="05/2025") as run:
+			run.entrada("banco", args.db)
+			with run.etapa("carregar_bases") as etapa:
+				bases = carregar_bases(conn, periodo)
+				etapa.linhas = len(bases["colaboradores"])
+			run.saida = args.saida
+
+	Falhas ao gravar o registro só geram aviso: o ledger nunca interrompe o
+	cálculo. Com ``caminho=None`` nada é gravado.
+	"""
+
+	def __init__(self, comando: str, parametros: Optional[Dict[str, Any]] = None,
+				 competencia: Optional[str] = None, caminho: Optional[str] = DEFAULT_LEDGER_PATH):
+		self.comando = comando
+		self.parametros = parametros or {}
+		self.competencia = competencia
+		self.caminho = caminho
+		self.entradas: Dict[str, Optional[str]] = {}
+		self.saida: Optional[str] = None
+		self.linhas: Optional[int] = None
+		self.run_id: Optional[int] = None
+		self._ordem = 0
+		self._inicio = 0.0
+
+	def _gravar(self, sql: str, params: tuple) -> Optional[int]:
+		if self.caminho is None:
+			return None
+		try:
+			conn = conectar_ledger(self.caminho)
+			try:
+				with conn:
+					return conn.execute(sql, params).lastrowid
+			finally:
+				conn.close()
+		except sqlite3.Error as e:
+			print(f"[AVISO] Registro de execução não gravado em '{self.caminho}': {e}")
+			return None
+
+	def __enter__(self) -> "RegistroExecucao":
+		self._inicio = time.perf_counter()
+		self.run_id = self._gravar(
+			"""
+			INSERT INTO runs (comando, competencia, parametros, status, iniciado_em)
+			VALUES (?, ?, ?, 'EM_ANDAMENTO', ?)
+			""",
+			(self.comando, self.competencia, json.dumps(self.parametros, ensure_ascii=False, default=str), _agora()),
+		)
+		return self
+
+	def __exit__(self, tipo, erro, _tb) -> None:
+		if self.run_id is None:
+			return
+		status = "OK" if tipo is None or (tipo is SystemExit and not getattr(erro, "code", 1)) else "ERRO"
+		self._gravar(
+			"""
+			UPDATE runs
+			SET entradas = ?, saida = ?, linhas = ?, status = ?, erro = ?, finalizado_em = ?, duracao_ms = ?
+			WHERE id = ?
+			""",
+			(
+				json.dumps(self.entradas, ensure_ascii=False),
+				self.saida,
+				self.linhas,
+				status,
+				None if status == "OK" else f"{tipo.__name__}: {erro}"[:1000],
+				_agora(),
+				(time.perf_counter() - self._inicio) * 1000,
+				self.run_id,
+			),
+		)
+
+	def entrada(self, nome: str, caminho: Optional[str] = None, digest: Optional[str] = None) -> None:
+		"""Registra o hash de um arquivo de entrada (ou um digest já calculado)."""
+		if self.caminho is None:
+			return
+		self.entradas[nome] = digest if digest is not None else hash_arquivo(caminho)
+
+	@contextmanager
+	def etapa(self, nome: str) -> Iterator[Etapa]:
+		"""Cronometra uma etapa e a grava em ``run_stages`` ao terminar (com sucesso)."""
+		etapa = Etapa(nome)
+		iniciado_em = _agora()
+		inicio = time.perf_counter()
+		yield etapa
+		duracao_ms = (time.perf_counter() - inicio) * 1000
+		self._ordem += 1
+		if self.run_id is not None:
+			self._gravar(
+				"""
+				INSERT INTO run_stages (run_id, ordem, etapa, linhas, duracao_ms, iniciado_em)
+				VALUES (?, ?, ?, ?, ?, ?)
+				""",
+				(self.run_id, self._ordem, nome, etapa.linhas, duracao_ms, iniciado_em),
+			)
+
+
+def historico_execucoes(caminho: str = DEFAULT_LEDGER_PATH, comando: Optional[str] = None,
+						limite: int = 50) -> pd.DataFrame:
+	"""Últimas execuções (mais recentes primeiro)."""
+	import pandas as pd
+
+	conn = conectar_ledger(caminho)
+	try:
+		return pd.read_sql_query(
+			"""
+			SELECT id, comando, competencia, status, linhas, duracao_ms, saida, iniciado_em, erro
+			FROM runs
+			WHERE (:comando IS NULL OR comando = :comando)
+			ORDER BY id DESC
+			LIMIT :limite
+			""",
+			conn,
+			params={"comando": comando, "limite": limite},
+		)
+	finally:
+		conn.close()
+
+
+def tendencia_etapas(caminho: str = DEFAULT_LEDGER_PATH, etapa: Optional[str] = None,
+					 comando: Optional[str] = None, desde: Optional[str] = None) -> pd.DataFrame:
+	"""Duração de cada etapa por execução bem-sucedida, em ordem cronológica.
+
+	Inclui ``ms_por_mil_linhas`` para separar lentidão real de crescimento do
+	quadro de colaboradores.
+	"""
+	import pandas as pd
+
+	conn = conectar_ledger(caminho)
+	try:
+		return pd.read_sql_query(
+			"""
+			SELECT r.id AS run_id, r.comando, r.competencia, r.iniciado_em,
+				   s.etapa, s.linhas, s.duracao_ms,
+				   CASE WHEN s.linhas > 0 THEN s.duracao_ms * 1000.0 / s.linhas END AS ms_por_mil_linhas
+			FROM run_stages s
+			JOIN runs r ON r.id = s.run_id
+			WHERE r.status = 'OK'
+			  AND (:etapa IS NULL OR s.etapa = :etapa)
+			  AND (:comando IS NULL OR r.comando = :comando)
+			  AND (:desde IS NULL OR r.iniciado_em >= :desde)
+			ORDER BY r.id, s.ordem
+			""",
+			conn,
+			params={"etapa": etapa, "comando": comando, "desde": desde},
+		)
+	finally:
+		conn.close()
+
+
+def detectar_lentidao(caminho: str = DEFAULT_LEDGER_PATH, janela: int = 10, fator: float = 1.5,
+					  comando: Optional[str] = None) -> pd.DataFrame:
+	"""Etapas cuja última execução ficou ``fator`` vezes acima da mediana das ``janela`` anteriores.
+
+	Compara ms por mil linhas quando há contagem de linhas, senão a duração.
+	"""
+	import pandas as pd
+
+	tendencia = tendencia_etapas(caminho, comando=comando)
+	colunas = ["comando", "etapa", "run_id", "atual", "mediana_anterior", "razao"]
+	if tendencia.empty:
+		return pd.DataFrame(columns=colunas)
+
+	tendencia["metrica"] = tendencia["ms_por_mil_linhas"].fillna(tendencia["duracao_ms"])
+	alertas = []
+	for (cmd, nome), grupo in tendencia.groupby(["comando", "etapa"], sort=True):
+		if len(grupo) < 2:
+			continue
+		atual = grupo.iloc[-1]
+		mediana = grupo["metrica"].iloc[-(janela + 1):-1].median()
+		if mediana > 0 and atual["metrica"] > fator * mediana:
+			alertas.append((cmd, nome, int(atual["run_id"]), atual["metrica"], mediana, atual["metrica"] / mediana))
+	return pd.DataFrame(alertas, columns=colunas)
+
+
+if __name__ == "__main__":
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Consulta o histórico de execuções do pipeline de VR")
+	parser.add_argument("--ledger", default=DEFAULT_LEDGER_PATH, help="Banco do histórico de execuções")
+	parser.add_argument("--etapa", help="Mostra a tendência de uma etapa específica")
+	parser.add_argument("--limite", type=int, default=20, help="Quantidade de execuções listadas")
+	args = parser.parse_args()
+
+	if args.etapa:
+		print(tendencia_etapas(args.ledger, etapa=args.etapa).to_string(index=False))
+	else:
+		print(historico_execucoes(args.ledger, limite=args.limite).to_string(index=False))
+		lentas = detectar_lentidao(args.ledger)
+		if not lentas.empty:
+			print("\n⚠️  Etapas mais lentas que o histórico:")
+			print(lentas.to_string(index=False))
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence, Union, TYPE_CHECKING
+import sqlite3
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+LOTE_PADRAO = 50_000
+
+# Tipos aceitos em ``tipos``: os mesmos de ``compactar`` no gerador, mais float/texto
+TIPOS_LOTE = ("int32", "Int32", "int64", "Int64", "float64", "boolean", "datetime64[s]", "string", "object")
+
+
+def _tipar(df: pd.DataFrame, tipos: Mapping[str, str]) -> pd.DataFrame:
+	import pandas as pd
+
+	for coluna, tipo in tipos.items():
+		if tipo not in TIPOS_LOTE:
+			raise ValueError(f"Tipo de lote inválido para {coluna!r}: {tipo!r} (use {', '.join(TIPOS_LOTE)})")
+		if coluna not in df.columns:
+			continue
+		if tipo == "datetime64[s]":
+			df[coluna] = pd.to_datetime(df[coluna]).astype(tipo)
+		elif tipo in ("int32", "int64", "Int32", "Int64", "float64"):
+			df[coluna] = pd.to_numeric(df[coluna]).astype(tipo)
+		else:
+			df[coluna] = df[coluna].astype(tipo)
+	return df
+
+
+def iterar_lotes(conn: sqlite3.Connection, sql: str, params: Union[Sequence[Any], Dict[str, Any], None] = None,
+				 tamanho: int = LOTE_PADRAO, tipos: Optional[Mapping[str, str]] = None) -> Iterator[pd.DataFrame]:
+	"""Executa ``sql`` e devolve o resultado em DataFrames de até ``tamanho`` linhas (``fetchmany``).
+
+	Diferente de ``pd.read_sql_query(..., chunksize=...)``, cada lote sai com
+	os mesmos tipos (``tipos``: coluna -> dtype de ``TIPOS_LOTE``), mesmo que
+	um lote tenha só ausentes numa coluna; colunas sem tipo ficam como o
+	pandas inferir. No máximo um lote fica em memória por vez; uma consulta
+	sem linhas não gera lotes.
+
+	Exemplo:
+		for lote in iterar_lotes(conn, "SELECT id, matricula FROM colaboradores", tipos={"matricula": "int32"}):
+			...
+	"""
+	import pandas as pd
+
+	if tamanho < 1:
+		raise ValueError(f"Tamanho de lote inválido: {tamanho}")
+	cursor = conn.execute(sql, params if params is not None else ())
+	try:
+		colunas = [d[0] for d in cursor.description]
+		while True:
+			linhas = cursor.fetchmany(tamanho)
+			if not linhas:
+				return
+			yield _tipar(pd.DataFrame.from_records(linhas, columns=colunas), tipos or {})
+	finally:
+		cursor.close()
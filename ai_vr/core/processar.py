@@ -3,19 +3,13 @@ from __future__ import annotations
 from typing import Optional
 from datetime import date
 import json
-import pandas as pd
 import os
 import subprocess
-try:
-	from dotenv import load_dotenv
-	load_dotenv()
-except ImportError:
-	pass
 
-from ai_vr.scripts.generate_vr_planilha import PeriodoReferencia
-from ai_vr.agents.db_agent import DatabaseAgent
-from ai_vr.agents.convencao_agent import ConvencaoAgent
-from ai_vr.agents.export_agent import ExportAgent
+# Dependências pesadas (pandas, langchain, dotenv) são carregadas sob demanda
+# pelos agentes; importar este módulo precisa ser barato para a CLI.
+from ai_vr.core.execucoes import DEFAULT_LEDGER_PATH, RegistroExecucao
+from ai_vr.scripts.generate_vr_planilha import PeriodoReferencia, to_date
 
 def criar_banco_se_necessario(db_path: str):
 	if not os.path.exists(db_path):
@@ -31,44 +25,77 @@ def criar_banco_se_necessario(db_path: str):
 		print(f"[INFO] Banco '{db_path}' já existe.")
 
 def popular_banco(db_path: str):
-	if os.path.exists("ai_vr/scripts/database_populate.py"):
-		print("[INFO] Populando banco de dados a partir das planilhas...")
-		subprocess.run(["python3", "ai_vr/scripts/database_populate.py"], check=True)
-		print("[INFO] Banco populado.")
-	else:
-		raise RuntimeError("Não foi encontrado 'ai_vr/scripts/database_populate.py' para popular o banco.")
+	"""Popula o banco em ``db_path`` a partir das planilhas (build-then-swap atômico)."""
+	from ai_vr.scripts.database_populate import popular_banco_atomico
+
+	print(f"[INFO] Populando banco de dados '{db_path}' a partir das planilhas...")
+	popular_banco_atomico(db_path)
+	print("[INFO] Banco populado.")
 
 def processar_beneficios(db_path: str, convencao_json: str, output_planilha: str,
 						 inicio: str = "2025-04-15", fim: str = "2025-05-15",
-						 llm_model: str = "gpt-4o-mini") -> str:
+						 llm_model: str = "gpt-4o-mini", usar_llm: bool = True,
+						 modo_dias: str = "proporcional",
+						 ledger_path: Optional[str] = DEFAULT_LEDGER_PATH) -> str:
 	"""Processa os benefícios VR/VA usando os agentes e exporta planilha.
 
+	Com ``usar_llm=False`` o DatabaseAgent não é criado e as dependências de
+	LangChain/OpenAI nunca são importadas. ``modo_dias="exato"`` conta os dias
+	úteis efetivamente trabalhados em vez da proporção por dias corridos.
+	Cada execução é registrada no histórico ``ledger_path`` (None desliga).
+
 	Retorna o caminho do arquivo gerado.
 	"""
+	from ai_vr.agents.convencao_agent import ConvencaoAgent
+	from ai_vr.agents.export_agent import ExportAgent
+
 	periodo = PeriodoReferencia(
-		inicio=pd.to_datetime(inicio).date(),
-		fim=pd.to_datetime(fim).date(),
+		inicio=to_date(inicio),
+		fim=to_date(fim),
 	)
 
-	# 1) Agente de DB (disponível para consultas auxiliares, se necessário)
-	db_agent = DatabaseAgent(db_path=db_path, llm_model=llm_model)
-	_ = db_agent.get_connection_uri()  # apenas para validar conexão
+	registro = RegistroExecucao(
+		"processar_beneficios",
+		parametros={"db_path": db_path, "output_planilha": output_planilha, "inicio": inicio, "fim": fim,
+					"llm_model": llm_model, "usar_llm": usar_llm, "modo_dias": modo_dias},
+		competencia=periodo.competencia,
+		caminho=ledger_path,
+	)
+	with registro as run:
+		run.entrada("banco", db_path)
+
+		# 1) Agente de DB (disponível para consultas auxiliares, se necessário)
+		if usar_llm:
+			from ai_vr.agents.db_agent import DatabaseAgent
+
+			with run.etapa("db_agent"):
+				db_agent = DatabaseAgent(db_path=db_path, llm_model=llm_model)
+				_ = db_agent.get_connection_uri()  # apenas para validar conexão
 
-	# 2) Gerar base de cálculo com o export agent
+		# 2) Gerar base de cálculo com o export agent
 
-	export_agent = ExportAgent(db_path=db_path)
-	df_base = export_agent.gerar_base(periodo)
-	if df_base is None:
-		raise RuntimeError("Falha ao gerar base de dados para exportação.")
+		export_agent = ExportAgent(db_path=db_path)
+		with run.etapa("gerar_base") as etapa:
+			df_base = export_agent.gerar_base(periodo, modo_dias=modo_dias)
+			etapa.linhas = None if df_base is None else len(df_base)
+		if df_base is None:
+			raise RuntimeError("Falha ao gerar base de dados para exportação.")
 
-	# 3) Aplicar convenção coletiva
-	conv_agent = ConvencaoAgent(convencao_json)
-	df_final = conv_agent.aplicar(df_base)
-	if df_final is None:
-		raise RuntimeError("Falha ao aplicar convenção coletiva na base de dados.")
+		# 3) Aplicar convenção coletiva
+		with run.etapa("aplicar_convencao") as etapa:
+			conv_agent = ConvencaoAgent(convencao_json)
+			run.entrada("convencao", digest=conv_agent.plano.hash)
+			df_final = conv_agent.aplicar(df_base)
+			etapa.linhas = None if df_final is None else len(df_final)
+		if df_final is None:
+			raise RuntimeError("Falha ao aplicar convenção coletiva na base de dados.")
 
-	# 4) Exportar planilha
-	export_agent.exportar(df_final, output_planilha, periodo.competencia)
+		# 4) Exportar planilha
+		with run.etapa("exportar") as etapa:
+			gravou = export_agent.exportar(df_final, output_planilha, periodo.competencia)
+			etapa.linhas = len(df_final) if gravou else 0
+		run.saida = output_planilha
+		run.linhas = len(df_final)
 
 	return output_planilha
 
@@ -85,8 +112,7 @@ if __name__ == "__main__":
 		}
 	})
 
-	criar_banco = not os.path.exists(db_path)
-	criar_banco_se_necessario(db_path)
+	# A população cria o schema em um arquivo novo e o publica atomicamente
 	popular_banco(db_path)
 
 	caminho = processar_beneficios(
@@ -0,0 +1,425 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union, TYPE_CHECKING
+import sqlite3
+
+from ai_vr.core.lotes import LOTE_PADRAO, iterar_lotes
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+DEFAULT_DB_PATH = "ai_vr/db/vr_database.db"
+
+SITUACOES_AFASTADO = "('Auxílio Doença', 'Licença Maternidade', 'Atestado')"
+
+# Filtros comuns: parâmetro None = sem filtro. Período padrão: o mais recente de dias_uteis.
+_FILTRO_COLABORADOR = """
+	(:empresa IS NULL OR c.empresa_id = :empresa)
+	AND (:sindicato IS NULL OR s.nome_abreviado = :sindicato)
+"""
+_PERIODO = """
+	du.periodo_inicio = COALESCE(:periodo_inicio, (SELECT MAX(periodo_inicio) FROM dias_uteis))
+	AND du.periodo_fim = COALESCE(:periodo_fim, (SELECT MAX(periodo_fim) FROM dias_uteis
+		WHERE periodo_inicio = COALESCE(:periodo_inicio, (SELECT MAX(periodo_inicio) FROM dias_uteis))))
+"""
+_FILTROS = {"empresa": None, "sindicato": None}
+_FILTROS_PERIODO = {**_FILTROS, "periodo_inicio": None, "periodo_fim": None}
+
+# Tabelas de resumo (resumo_calculos_vr_grupos): filtros por competência e categoria do cargo
+_FILTRO_GRUPO = """
+	(:mes IS NULL OR g.periodo_mes = :mes)
+	AND (:ano IS NULL OR g.periodo_ano = :ano)
+	AND (:empresa IS NULL OR g.empresa_id = :empresa)
+	AND (:sindicato IS NULL OR s.nome_abreviado = :sindicato)
+	AND (:categoria IS NULL OR g.categoria = :categoria)
+"""
+_FILTROS_GRUPO = {**_FILTROS, "mes": None, "ano": None, "categoria": None}
+_REAIS = "SUM(g.{coluna}_centavos) / 100.0"
+
+
+@dataclass(frozen=True)
+class Consulta:
+	"""Consulta nomeada: SQL com parâmetros ``:nome`` e seus valores padrão.
+
+	O texto do SQL é fixo (os filtros opcionais ficam no próprio SQL), então
+	cada consulta é preparada uma única vez no cache de statements da conexão.
+	"""
+	nome: str
+	descricao: str
+	sql: str
+	parametros: Dict[str, Any] = field(default_factory=dict)
+
+
+CONSULTAS: Dict[str, Consulta] = {c.nome: c for c in (
+	Consulta(
+		"estatisticas_gerais", "Contagens gerais em uma única consulta",
+		f"""
+		WITH filtrados AS (
+			SELECT c.id, c.situacao, car.categoria
+			FROM colaboradores c
+			JOIN cargos car ON car.id = c.cargo_id
+			JOIN sindicatos s ON s.id = c.sindicato_id
+			WHERE {_FILTRO_COLABORADOR}
+		),
+		excl AS (
+			SELECT COUNT(*) AS excluidos,
+				   COALESCE(SUM(x.tipo_exclusao = 'ESTAGIARIO'), 0) AS estagiarios,
+				   COALESCE(SUM(x.tipo_exclusao = 'APRENDIZ'), 0) AS aprendizes,
+				   COALESCE(SUM(x.tipo_exclusao = 'EXTERIOR'), 0) AS exterior
+			FROM exclusoes x JOIN filtrados f ON f.id = x.colaborador_id
+		)
+		SELECT
+			(SELECT COUNT(*) FROM filtrados) AS total_colaboradores,
+			(SELECT COUNT(*) FROM filtrados f
+			 WHERE f.categoria = 'FUNCIONARIO' AND f.situacao NOT IN {SITUACOES_AFASTADO}
+			   AND f.id NOT IN (SELECT colaborador_id FROM exclusoes)) AS elegiveis,
+			excl.excluidos,
+			(SELECT COUNT(*) FROM ferias t JOIN filtrados f ON f.id = t.colaborador_id) AS ferias,
+			(SELECT COUNT(*) FROM afastamentos t JOIN filtrados f ON f.id = t.colaborador_id) AS afastados,
+			(SELECT COUNT(*) FROM desligamentos t JOIN filtrados f ON f.id = t.colaborador_id) AS desligados,
+			(SELECT COUNT(*) FROM admissoes t JOIN filtrados f ON f.id = t.colaborador_id) AS admitidos,
+			excl.estagiarios, excl.aprendizes, excl.exterior
+		FROM excl
+		""",
+		dict(_FILTROS),
+	),
+	Consulta(
+		"colaboradores_elegiveis", "Colaboradores elegíveis para VR",
+		f"""
+		SELECT c.matricula, c.situacao, car.titulo AS cargo, car.categoria AS categoria_cargo,
+			   s.nome_abreviado AS sindicato, e.nome AS estado, e.valor_vr_diario
+		FROM colaboradores c
+		JOIN cargos car ON c.cargo_id = car.id
+		JOIN sindicatos s ON c.sindicato_id = s.id
+		JOIN estados e ON s.estado_id = e.id
+		WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
+		  AND c.situacao NOT IN {SITUACOES_AFASTADO}
+		  AND car.categoria = 'FUNCIONARIO'
+		  AND {_FILTRO_COLABORADOR}
+		ORDER BY c.matricula
+		LIMIT :limite
+		""",
+		{**_FILTROS, "limite": -1},
+	),
+	Consulta(
+		"resumo_por_sindicato", "Colaboradores por sindicato e situação no período (de resumo_colaboradores)",
+		f"""
+		SELECT s.nome_abreviado AS sindicato, e.nome AS estado, e.valor_vr_diario, du.dias_uteis,
+			   SUM(r.colaboradores) AS total_colaboradores,
+			   SUM(CASE WHEN r.situacao = 'Trabalhando' THEN r.colaboradores ELSE 0 END) AS trabalhando,
+			   SUM(CASE WHEN r.situacao = 'Férias' THEN r.colaboradores ELSE 0 END) AS ferias,
+			   SUM(CASE WHEN r.situacao IN {SITUACOES_AFASTADO} THEN r.colaboradores ELSE 0 END) AS afastados
+		FROM resumo_colaboradores r
+		JOIN sindicatos s ON r.sindicato_id = s.id
+		JOIN estados e ON s.estado_id = e.id
+		JOIN dias_uteis du ON s.id = du.sindicato_id
+		WHERE {_PERIODO}
+		  AND (:empresa IS NULL OR r.empresa_id = :empresa)
+		  AND (:sindicato IS NULL OR s.nome_abreviado = :sindicato)
+		GROUP BY s.id, s.nome_abreviado, e.nome, e.valor_vr_diario, du.dias_uteis
+		ORDER BY total_colaboradores DESC
+		""",
+		dict(_FILTROS_PERIODO),
+	),
+	Consulta(
+		"colaboradores_ferias", "Colaboradores em férias",
+		f"""
+		SELECT c.matricula, car.titulo AS cargo, s.nome_abreviado AS sindicato,
+			   f.dias_ferias, f.data_inicio, f.data_fim, f.periodo_inicio, f.periodo_fim
+		FROM colaboradores c
+		JOIN cargos car ON c.cargo_id = car.id
+		JOIN sindicatos s ON c.sindicato_id = s.id
+		JOIN ferias f ON c.id = f.colaborador_id
+		WHERE {_FILTRO_COLABORADOR}
+		ORDER BY f.dias_ferias DESC
+		LIMIT :limite
+		""",
+		{**_FILTROS, "limite": -1},
+	),
+	Consulta(
+		"colaboradores_excluidos", "Colaboradores excluídos do VR",
+		f"""
+		SELECT c.matricula, car.titulo AS cargo, car.categoria AS categoria_cargo,
+			   x.tipo_exclusao, x.valor_especifico, x.observacoes
+		FROM colaboradores c
+		JOIN cargos car ON c.cargo_id = car.id
+		JOIN sindicatos s ON c.sindicato_id = s.id
+		JOIN exclusoes x ON c.id = x.colaborador_id
+		WHERE {_FILTRO_COLABORADOR}
+		ORDER BY x.tipo_exclusao, c.matricula
+		""",
+		dict(_FILTROS),
+	),
+	Consulta(
+		"colaboradores_desligados", "Colaboradores desligados e regra de VR",
+		f"""
+		SELECT c.matricula, car.titulo AS cargo, d.data_desligamento, d.comunicado_ok,
+			   CASE WHEN d.comunicado_ok = 1 THEN 'Recebe VR proporcional' ELSE 'Não recebe VR' END AS regra_vr
+		FROM colaboradores c
+		JOIN cargos car ON c.cargo_id = car.id
+		JOIN sindicatos s ON c.sindicato_id = s.id
+		JOIN desligamentos d ON c.id = d.colaborador_id
+		WHERE {_FILTRO_COLABORADOR}
+		ORDER BY d.data_desligamento
+		LIMIT :limite
+		""",
+		{**_FILTROS, "limite": -1},
+	),
+	Consulta(
+		"colaboradores_admitidos", "Colaboradores admitidos (opcionalmente entre admissao_inicio e admissao_fim)",
+		f"""
+		SELECT c.matricula, car.titulo AS cargo, a.data_admissao, s.nome_abreviado AS sindicato, e.valor_vr_diario
+		FROM colaboradores c
+		JOIN cargos car ON c.cargo_id = car.id
+		JOIN admissoes a ON c.id = a.colaborador_id
+		JOIN sindicatos s ON c.sindicato_id = s.id
+		JOIN estados e ON s.estado_id = e.id
+		WHERE (:admissao_inicio IS NULL OR a.data_admissao >= :admissao_inicio)
+		  AND (:admissao_fim IS NULL OR a.data_admissao <= :admissao_fim)
+		  AND {_FILTRO_COLABORADOR}
+		ORDER BY a.data_admissao
+		LIMIT :limite
+		""",
+		{**_FILTROS, "admissao_inicio": None, "admissao_fim": None, "limite": -1},
+	),
+	Consulta(
+		"exemplo_calculo_vr", "Cálculo simplificado de VR (dias úteis - férias) no período",
+		f"""
+		SELECT c.matricula, car.titulo AS cargo, s.nome_abreviado AS sindicato, e.valor_vr_diario,
+			   du.dias_uteis AS dias_uteis_sindicato,
+			   COALESCE(f.dias_ferias, 0) AS dias_ferias,
+			   (du.dias_uteis - COALESCE(f.dias_ferias, 0)) AS dias_vr_calculados,
+			   (du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario AS valor_total,
+			   ((du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario) * 0.8 AS custo_empresa,
+			   ((du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario) * 0.2 AS desconto_colaborador
+		FROM colaboradores c
+		JOIN cargos car ON c.cargo_id = car.id
+		JOIN sindicatos s ON c.sindicato_id = s.id
+		JOIN estados e ON s.estado_id = e.id
+		JOIN dias_uteis du ON s.id = du.sindicato_id
+		LEFT JOIN ferias f ON c.id = f.colaborador_id
+		WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
+		  AND c.situacao NOT IN {SITUACOES_AFASTADO}
+		  AND car.categoria = 'FUNCIONARIO'
+		  AND {_PERIODO}
+		  AND {_FILTRO_COLABORADOR}
+		LIMIT :limite
+		""",
+		{**_FILTROS_PERIODO, "limite": -1},
+	),
+	Consulta(
+		"resumo_calculos", "Totais de calculos_vr por competência (de resumo_calculos_vr_grupos)",
+		f"""
+		SELECT g.periodo_mes, g.periodo_ano,
+			   SUM(g.colaboradores) AS total_colaboradores,
+			   SUM(g.dias_vr) AS total_dias_vr,
+			   {_REAIS.format(coluna="valor_total")} AS valor_total_vr,
+			   {_REAIS.format(coluna="custo_empresa")} AS custo_total_empresa,
+			   {_REAIS.format(coluna="desconto_colaborador")} AS desconto_total_colaborador
+		FROM resumo_calculos_vr_grupos g
+		JOIN sindicatos s ON s.id = g.sindicato_id
+		WHERE {_FILTRO_GRUPO}
+		GROUP BY g.periodo_ano, g.periodo_mes
+		ORDER BY g.periodo_ano, g.periodo_mes
+		""",
+		dict(_FILTROS_GRUPO),
+	),
+	Consulta(
+		"totais_por_grupo", "Totais de calculos_vr por competência, empresa, sindicato e categoria",
+		f"""
+		SELECT g.periodo_mes, g.periodo_ano, emp.nome AS empresa, s.nome_abreviado AS sindicato, g.categoria,
+			   g.colaboradores, g.dias_vr,
+			   g.valor_total_centavos / 100.0 AS valor_total,
+			   g.custo_empresa_centavos / 100.0 AS custo_empresa,
+			   g.desconto_colaborador_centavos / 100.0 AS desconto_colaborador
+		FROM resumo_calculos_vr_grupos g
+		JOIN sindicatos s ON s.id = g.sindicato_id
+		JOIN empresas emp ON emp.id = g.empresa_id
+		WHERE {_FILTRO_GRUPO}
+		ORDER BY g.periodo_ano, g.periodo_mes, emp.nome, s.nome_abreviado, g.categoria
+		""",
+		dict(_FILTROS_GRUPO),
+	),
+)}
+
+ROTULOS_ESTATISTICAS = {
+	"total_colaboradores": "Total de colaboradores",
+	"elegiveis": "Colaboradores elegíveis",
+	"excluidos": "Colaboradores excluídos",
+	"ferias": "Colaboradores em férias",
+	"afastados": "Colaboradores afastados",
+	"desligados": "Colaboradores desligados",
+	"admitidos": "Colaboradores admitidos",
+	"estagiarios": "Estagiários",
+	"aprendizes": "Aprendizes",
+	"exterior": "Colaboradores no exterior",
+}
+
+
+def preparar_consulta(nome: str, parametros: Dict[str, Any]) -> Tuple[Consulta, Dict[str, Any]]:
+	"""Consulta ``nome`` e os parâmetros completos (padrões + informados); ValueError se inválidos."""
+	consulta = CONSULTAS.get(nome)
+	if consulta is None:
+		raise ValueError(f"Consulta desconhecida: {nome!r} (disponíveis: {', '.join(sorted(CONSULTAS))})")
+	desconhecidos = set(parametros) - set(consulta.parametros)
+	if desconhecidos:
+		raise ValueError(f"Parâmetros inválidos para {nome!r}: {', '.join(sorted(desconhecidos))}")
+	return consulta, {**consulta.parametros, **parametros}
+
+
+SQL_RECONSTRUIR_RESUMOS = """
+DELETE FROM resumo_colaboradores;
+INSERT INTO resumo_colaboradores (empresa_id, sindicato_id, categoria, situacao, colaboradores)
+SELECT c.empresa_id, c.sindicato_id, COALESCE(car.categoria, ''), c.situacao, COUNT(*)
+FROM colaboradores c LEFT JOIN cargos car ON car.id = c.cargo_id
+GROUP BY 1, 2, 3, 4;
+DELETE FROM resumo_calculos_vr_grupos;
+INSERT INTO resumo_calculos_vr_grupos
+SELECT v.periodo_ano, v.periodo_mes, c.empresa_id, c.sindicato_id, COALESCE(car.categoria, ''),
+	   COUNT(*), SUM(v.dias_vr_calculados),
+	   SUM(CAST(ROUND(v.valor_total * 100) AS INTEGER)),
+	   SUM(CAST(ROUND(v.custo_empresa * 100) AS INTEGER)),
+	   SUM(CAST(ROUND(v.desconto_colaborador * 100) AS INTEGER))
+FROM calculos_vr v
+JOIN colaboradores c ON c.id = v.colaborador_id
+LEFT JOIN cargos car ON car.id = c.cargo_id
+GROUP BY 1, 2, 3, 4, 5;
+"""
+
+
+def reconstruir_resumos(conn: sqlite3.Connection) -> None:
+	"""Recalcula as tabelas de resumo a partir das linhas (ver database_schema.sql).
+
+	Os triggers já as mantêm a cada gravação; isto serve para auditoria e para
+	bancos cujos dados foram carregados antes dos triggers existirem.
+	"""
+	conn.executescript(f"BEGIN; {SQL_RECONSTRUIR_RESUMOS} COMMIT;")
+
+
+class Relatorios:
+	"""Executa as ``CONSULTAS`` nomeadas com cache LRU de resultados.
+
+	Uso:
+		with Relatorios("ai_vr/db/vr_database.db") as rel:
+			rel.consultar("resumo_por_sindicato", empresa=1)
+			rel.estatisticas(sindicato="SINDPD SP")
+
+	Uma única conexão (somente leitura quando aberta por caminho) é reusada:
+	o SQL de cada consulta é preparado uma vez. Os resultados ficam em cache
+	por (consulta, parâmetros) enquanto ``PRAGMA data_version`` e
+	``total_changes`` não mudarem, ou seja, até alguém gravar no banco;
+	dashboards consultando em intervalos curtos não voltam ao SQLite.
+	Os DataFrames devolvidos são cópias e podem ser alterados.
+	"""
+
+	def __init__(self, banco: Union[str, sqlite3.Connection] = DEFAULT_DB_PATH, tamanho_cache: int = 128):
+		if isinstance(banco, sqlite3.Connection):
+			self.conn = banco
+			self._propria = False
+		else:
+			if not Path(banco).exists():
+				raise FileNotFoundError(f"Banco de dados não encontrado: {banco}")
+			self.conn = sqlite3.connect(f"{Path(banco).absolute().as_uri()}?mode=ro", uri=True,
+										cached_statements=max(128, 2 * len(CONSULTAS)))
+			self._propria = True
+		self.tamanho_cache = tamanho_cache
+		self._cache: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+		self._versao: Optional[Tuple[int, int]] = None
+		self.acertos = 0
+		self.falhas = 0
+
+	def __enter__(self) -> "Relatorios":
+		return self
+
+	def __exit__(self, *_exc) -> None:
+		self.close()
+
+	def close(self) -> None:
+		if self._propria:
+			self.conn.close()
+
+	def _versao_atual(self) -> Tuple[int, int]:
+		# data_version muda com commits de outras conexões; total_changes, com os desta
+		return self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes
+
+	def invalidar(self) -> None:
+		self._cache.clear()
+
+	def consultar(self, nome: str, **parametros: Any) -> pd.DataFrame:
+		"""Resultado da consulta ``nome``; parâmetros omitidos usam o padrão (None = sem filtro)."""
+		import pandas as pd
+
+		consulta, valores = preparar_consulta(nome, parametros)
+		versao = self._versao_atual()
+		if versao != self._versao:
+			self._cache.clear()
+			self._versao = versao
+		chave = (nome, tuple(sorted(valores.items())))
+		resultado = self._cache.get(chave)
+		if resultado is not None:
+			self._cache.move_to_end(chave)
+			self.acertos += 1
+			return resultado.copy()
+
+		self.falhas += 1
+		cursor = self.conn.execute(consulta.sql, valores)
+		resultado = pd.DataFrame.from_records(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+		self._cache[chave] = resultado
+		if len(self._cache) > self.tamanho_cache:
+			self._cache.popitem(last=False)
+		return resultado.copy()
+
+	def cursor(self, nome: str, **parametros: Any) -> sqlite3.Cursor:
+		"""Cursor da consulta ``nome`` sem passar pelo cache (para ler em lotes com ``fetchmany``)."""
+		consulta, valores = preparar_consulta(nome, parametros)
+		return self.conn.execute(consulta.sql, valores)
+
+	def em_lotes(self, nome: str, tamanho: int = LOTE_PADRAO, **parametros: Any) -> Iterator[pd.DataFrame]:
+		"""Resultado da consulta ``nome`` em DataFrames de até ``tamanho`` linhas, sem passar pelo cache."""
+		consulta, valores = preparar_consulta(nome, parametros)
+		return iterar_lotes(self.conn, consulta.sql, valores, tamanho=tamanho)
+
+	def estatisticas(self, empresa: Optional[int] = None, sindicato: Optional[str] = None) -> Dict[str, int]:
+		"""Contagens gerais (``ROTULOS_ESTATISTICAS``) em uma única ida ao banco."""
+		linha = self.consultar("estatisticas_gerais", empresa=empresa, sindicato=sindicato).iloc[0]
+		return {coluna: int(linha[coluna] or 0) for coluna in ROTULOS_ESTATISTICAS}
+
+
+if __name__ == "__main__":
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Relatórios nomeados sobre o banco de VR")
+	parser.add_argument("consulta", nargs="?", default="estatisticas_gerais", choices=sorted(CONSULTAS))
+	parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Banco de dados")
+	parser.add_argument("--empresa", type=int, help="Filtra por empresa (id)")
+	parser.add_argument("--sindicato", help="Filtra por sindicato (nome abreviado)")
+	parser.add_argument("--competencia", help="MM/AAAA (resumo_calculos, totais_por_grupo)")
+	parser.add_argument("--categoria", help="Filtra por categoria do cargo (resumo_calculos, totais_por_grupo)")
+	parser.add_argument("--limite", type=int, help="Limite de linhas (consultas com limite)")
+	parser.add_argument("--reconstruir-resumos", action="store_true",
+						help="Recalcula as tabelas de resumo a partir das linhas antes de consultar")
+	args = parser.parse_args()
+
+	if args.reconstruir_resumos:
+		conn = sqlite3.connect(args.db)
+		try:
+			reconstruir_resumos(conn)
+		finally:
+			conn.close()
+
+	parametros: Dict[str, Any] = {"empresa": args.empresa, "sindicato": args.sindicato}
+	if args.categoria and "categoria" in CONSULTAS[args.consulta].parametros:
+		parametros["categoria"] = args.categoria
+	if args.competencia and "mes" in CONSULTAS[args.consulta].parametros:
+		parametros["mes"], parametros["ano"] = (int(p) for p in args.competencia.split("/"))
+	if args.limite is not None and "limite" in CONSULTAS[args.consulta].parametros:
+		parametros["limite"] = args.limite
+
+	with Relatorios(args.db) as relatorios:
+		if args.consulta == "estatisticas_gerais":
+			for coluna, valor in relatorios.estatisticas(args.empresa, args.sindicato).items():
+				print(f"{ROTULOS_ESTATISTICAS[coluna]}: {valor:,}")
+		else:
+			print(relatorios.consultar(args.consulta, **parametros).to_string(index=False))
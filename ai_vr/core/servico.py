@@ -0,0 +1,427 @@
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+from urllib.parse import parse_qsl, urlsplit
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+from ai_vr.core.relatorios import CONSULTAS, DEFAULT_DB_PATH, Relatorios
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+TAMANHO_POOL = 8
+ESPERA_POOL = 5.0  # segundos aguardando uma conexão livre antes de responder 503
+LOTE_NDJSON = 1000  # linhas por fetchmany/bloco enviado
+CALCULOS_EM_CACHE = 8
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+_INTEIRO = re.compile(r"-?\d+")
+# Parâmetros de CONSULTAS comparados/ligados como inteiros no SQL (LIMIT exige inteiro)
+PARAMETROS_INTEIROS = frozenset({"limite", "empresa", "mes", "ano"})
+
+
+class PoolEsgotado(Exception):
+	"""Nenhuma conexão livre dentro de ``ESPERA_POOL``."""
+
+
+def ativar_wal(caminho: str) -> str:
+	"""Coloca o banco em WAL (persistente no arquivo): leitores não bloqueiam a escrita e vice-versa.
+
+	Um arquivo publicado por ``os.replace`` chega em modo rollback, e o
+	``-wal``/``-shm`` ao lado dele são do arquivo anterior. Eles são apagados
+	antes, para que o SQLite não os adote. Leitores ainda abertos no
+	arquivo antigo mantêm os seus descritores.
+	"""
+	if not _cabecalho_wal(caminho):
+		for sufixo in ("-wal", "-shm"):
+			if os.path.exists(caminho + sufixo):
+				os.remove(caminho + sufixo)
+	conn = sqlite3.connect(caminho, timeout=10)
+	try:
+		return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+	finally:
+		conn.close()
+
+
+def _cabecalho_wal(caminho: str) -> bool:
+	"""Versões de leitura/escrita do cabeçalho (bytes 18-19) = 2: arquivo em WAL."""
+	with open(caminho, "rb") as f:
+		f.seek(18)
+		return f.read(2) == b"\x02\x02"
+
+
+def conectar_leitura(caminho: str) -> sqlite3.Connection:
+	"""Conexão somente leitura que pode ser usada por qualquer thread (uma por vez)."""
+	conn = sqlite3.connect(f"{Path(caminho).absolute().as_uri()}?mode=ro", uri=True,
+						   check_same_thread=False, timeout=10)
+	conn.execute("PRAGMA query_only = ON")
+	return conn
+
+
+class PoolConexoes:
+	"""Pool fixo de conexões somente leitura, cada uma com seu ``Relatorios`` (e cache).
+
+	``database_populate`` publica o banco trocando o arquivo (``os.replace``):
+	conexões abertas continuariam lendo o arquivo antigo. Ao sair do pool,
+	a conexão é reaberta se o arquivo (dispositivo, inode) mudou. Com
+	``wal``, o modo WAL é reaplicado (``ativar_wal``) uma vez por arquivo novo,
+	antes de abrir a primeira conexão nele.
+
+	``versao()`` identifica o conteúdo atual: arquivo + ``PRAGMA data_version``
+	de uma conexão sentinela (o valor só é comparável dentro da mesma conexão).
+	"""
+
+	def __init__(self, caminho: str = DEFAULT_DB_PATH, tamanho: int = TAMANHO_POOL, wal: bool = True):
+		if not os.path.exists(caminho):
+			raise FileNotFoundError(f"Banco de dados não encontrado: {caminho}")
+		self.caminho = caminho
+		self.tamanho = tamanho
+		self.wal = wal
+		self._trava_wal = threading.Lock()
+		self._identidade_wal: Optional[Tuple[int, int]] = None
+		self._livres: "queue.LifoQueue[Tuple[Tuple[int, int], Relatorios]]" = queue.LifoQueue()
+		for _ in range(tamanho):
+			self._livres.put(self._abrir())
+		self._trava_sentinela = threading.Lock()
+		self._sentinela = self._abrir()
+
+	def _identidade(self) -> Tuple[int, int]:
+		info = os.stat(self.caminho)
+		return info.st_dev, info.st_ino
+
+	def _garantir_wal(self) -> None:
+		with self._trava_wal:
+			identidade = self._identidade()
+			if self.wal and identidade != self._identidade_wal:
+				ativar_wal(self.caminho)
+				self._identidade_wal = identidade
+
+	def _abrir(self) -> Tuple[Tuple[int, int], Relatorios]:
+		self._garantir_wal()
+		identidade = self._identidade()
+		return identidade, Relatorios(conectar_leitura(self.caminho))
+
+	@contextmanager
+	def relatorios(self) -> Iterator[Relatorios]:
+		try:
+			identidade, relatorios = self._livres.get(timeout=ESPERA_POOL)
+		except queue.Empty:
+			raise PoolEsgotado(f"Nenhuma conexão livre em {ESPERA_POOL:.0f}s ({self.tamanho} no pool)") from None
+		try:
+			if identidade != self._identidade():
+				relatorios.conn.close()
+				identidade, relatorios = self._abrir()
+			yield relatorios
+		finally:
+			self._livres.put((identidade, relatorios))
+
+	def versao(self) -> Tuple[int, int, int]:
+		with self._trava_sentinela:
+			identidade, sentinela = self._sentinela
+			if identidade != self._identidade():
+				sentinela.conn.close()
+				self._sentinela = identidade, sentinela = self._abrir()
+			return (*identidade, sentinela.conn.execute("PRAGMA data_version").fetchone()[0])
+
+	def modo_journal(self) -> str:
+		"""``PRAGMA journal_mode`` atual do arquivo (lido pela sentinela)."""
+		with self._trava_sentinela:
+			return self._sentinela[1].conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+	def close(self) -> None:
+		while not self._livres.empty():
+			self._livres.get_nowait()[1].conn.close()
+		self._sentinela[1].conn.close()
+
+
+def _valor(nome: str, texto: str) -> Any:
+	if _INTEIRO.fullmatch(texto):
+		return int(texto)
+	if nome in PARAMETROS_INTEIROS:
+		raise ValueError(f"Parâmetro {nome} deve ser inteiro: {texto!r}")
+	return texto
+
+
+def _data(parametros: Dict[str, str], nome: str) -> date:
+	if nome not in parametros:
+		raise ValueError(f"Parâmetro obrigatório ausente: {nome} (AAAA-MM-DD)")
+	try:
+		return date.fromisoformat(parametros[nome])
+	except ValueError:
+		raise ValueError(f"Data inválida em {nome}: {parametros[nome]!r} (use AAAA-MM-DD)") from None
+
+
+def calcular_periodo(conn: sqlite3.Connection, inicio: date, fim: date, modo: str = "proporcional") -> pd.DataFrame:
+	"""Saída de ``calcular_dias_valores`` para o período (mesmas etapas do gerador, sem gravar nada)."""
+	from ai_vr.scripts.generate_vr_planilha import (
+		MODOS_DIAS, PeriodoReferencia, calcular_dias_valores, carregar_bases, montar_base_elegivel,
+	)
+
+	if modo not in MODOS_DIAS:
+		raise ValueError(f"Modo inválido: {modo!r} (use {' ou '.join(MODOS_DIAS)})")
+	if fim < inicio:
+		raise ValueError("fim anterior ao início do período")
+	periodo = PeriodoReferencia(inicio=inicio, fim=fim)
+	bases = carregar_bases(conn, periodo)
+	return calcular_dias_valores(montar_base_elegivel(bases, periodo), bases, periodo, modo=modo)
+
+
+def planilha_xlsx(df_saida: pd.DataFrame, competencia: str) -> bytes:
+	"""Conteúdo do XLSX exportado (mesmo formato de ``salvar_planilha``)."""
+	import pandas as pd
+	from ai_vr.scripts.generate_vr_planilha import salvar_planilha
+
+	with tempfile.TemporaryDirectory() as pasta:
+		caminho = os.path.join(pasta, "export.xlsx")
+		salvar_planilha(df_saida, pd.DataFrame(), caminho, competencia)
+		with open(caminho, "rb") as f:
+			return f.read()
+
+
+class ServicoVR:
+	"""Estado compartilhado pelas requisições: pool, cache de cálculos e ETags.
+
+	O ETag de toda resposta deriva de ``PoolConexoes.versao()``, da URL e de
+	um identificador desta instância (``data_version`` recomeça ao reabrir a
+	conexão). Cliente que reenvia ``If-None-Match`` com o banco inalterado
+	recebe 304 sem que nenhuma consulta rode.
+	"""
+
+	def __init__(self, caminho: str = DEFAULT_DB_PATH, tamanho_pool: int = TAMANHO_POOL, wal: bool = True):
+		self.caminho = caminho
+		self.pool = PoolConexoes(caminho, tamanho_pool, wal=wal)
+		self.instancia = f"{os.getpid()}-{time.time_ns()}"
+		self._calculos: "OrderedDict[Tuple, Any]" = OrderedDict()
+		self._trava_calculos = threading.Lock()
+
+	def etag(self, versao: Tuple[int, int, int], url: str) -> str:
+		digest = hashlib.blake2b(f"{self.instancia}|{versao}|{url}".encode("utf-8"), digest_size=12)
+		return f'"{digest.hexdigest()}"'
+
+	def em_cache(self, chave: Tuple, versao: Tuple[int, int, int], calcular: Callable[[], Any]) -> Any:
+		"""Resultado de ``calcular`` guardado por (chave, versão do banco); LRU de ``CALCULOS_EM_CACHE``."""
+		chave = (*chave, versao)
+		with self._trava_calculos:
+			if chave in self._calculos:
+				self._calculos.move_to_end(chave)
+				return self._calculos[chave]
+		resultado = calcular()
+		with self._trava_calculos:
+			self._calculos[chave] = resultado
+			while len(self._calculos) > CALCULOS_EM_CACHE:
+				self._calculos.popitem(last=False)
+		return resultado
+
+	def servidor(self, host: str = "127.0.0.1", porta: int = 8765, verboso: bool = False) -> ThreadingHTTPServer:
+		servico = self
+
+		class Servidor(ThreadingHTTPServer):
+			daemon_threads = True
+			request_queue_size = 512
+
+		class Manipulador(ManipuladorVR):
+			pass
+
+		Manipulador.servico = servico
+		Manipulador.verboso = verboso
+		return Servidor((host, porta), Manipulador)
+
+	def close(self) -> None:
+		self.pool.close()
+
+
+class ManipuladorVR(BaseHTTPRequestHandler):
+	"""Rotas (todas GET; respostas JSON, ou NDJSON com ``?formato=ndjson`` ou ``Accept: application/x-ndjson``):
+
+	/saude                         estado do serviço e versão do banco
+	/consultas                     consultas nomeadas e seus parâmetros
+	/consultas/<nome>?param=valor  resultado de uma consulta de ``CONSULTAS``
+	/estatisticas                  contagens gerais (empresa, sindicato)
+	/calculo?inicio=&fim=&modo=    cálculo do período (sem gravar)
+	/exportacao?inicio=&fim=&modo= planilha XLSX do período
+	"""
+	protocol_version = "HTTP/1.1"
+	server_version = "VRServico/1.0"
+	servico: ServicoVR
+	verboso = False
+	resposta_iniciada = False
+
+	def log_message(self, formato: str, *args: Any) -> None:
+		if self.verboso:
+			super().log_message(formato, *args)
+
+	def send_response(self, code: int, message: Optional[str] = None) -> None:
+		super().send_response(code, message)
+		self.resposta_iniciada = True
+
+	def _erro(self, status: int, mensagem: str) -> None:
+		"""Responde o erro em JSON; se a resposta já começou (ex.: NDJSON em chunks), só a interrompe.
+
+		Um segundo status no meio do corpo corromperia a conexão. Ela é
+		fechada sem o chunk final, e o cliente vê um corpo truncado em vez
+		de um fim normal.
+		"""
+		if self.resposta_iniciada:
+			self.log_error("Resposta interrompida (%d): %s", status, mensagem)
+			self.close_connection = True
+			return
+		self._json({"erro": mensagem}, status=status)
+
+	# Respostas -------------------------------------------------------------
+
+	def _cabecalhos(self, status: int, tipo: str, tamanho: Optional[int], etag: Optional[str]) -> None:
+		self.send_response(status)
+		self.send_header("Content-Type", tipo)
+		if tamanho is None:
+			self.send_header("Transfer-Encoding", "chunked")
+		else:
+			self.send_header("Content-Length", str(tamanho))
+		if etag:
+			self.send_header("ETag", etag)
+			self.send_header("Cache-Control", "no-cache")
+		self.end_headers()
+
+	def _json(self, dados: Any, status: int = 200, etag: Optional[str] = None) -> None:
+		corpo = json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8")
+		self._cabecalhos(status, "application/json; charset=utf-8", len(corpo), etag)
+		self.wfile.write(corpo)
+
+	def _quadro(self, df: pd.DataFrame, etag: str, ndjson: bool) -> None:
+		if not ndjson:
+			corpo = df.to_json(orient="records", force_ascii=False, date_format="iso").encode("utf-8")
+			self._cabecalhos(200, "application/json; charset=utf-8", len(corpo), etag)
+			self.wfile.write(corpo)
+			return
+		self._ndjson((df.iloc[i:i + LOTE_NDJSON].to_json(orient="records", lines=True, force_ascii=False,
+														  date_format="iso").rstrip("\n") + "\n"
+					  for i in range(0, len(df), LOTE_NDJSON)), etag)
+
+	def _ndjson(self, blocos: Iterable[str], etag: str) -> None:
+		"""Envia cada bloco de linhas como um chunk HTTP assim que fica pronto."""
+		self._cabecalhos(200, "application/x-ndjson; charset=utf-8", None, etag)
+		for bloco in blocos:
+			dados = bloco.encode("utf-8")
+			if dados:
+				self.wfile.write(b"%X\r\n%s\r\n" % (len(dados), dados))
+		self.wfile.write(b"0\r\n\r\n")
+
+	# Rotas -----------------------------------------------------------------
+
+	def do_GET(self) -> None:
+		url = urlsplit(self.path)
+		parametros = dict(parse_qsl(url.query))
+		ndjson = parametros.pop("formato", "") == "ndjson" or "application/x-ndjson" in self.headers.get("Accept", "")
+		self.resposta_iniciada = False
+		try:
+			versao = self.servico.pool.versao()
+			if url.path == "/saude":
+				self._json({"status": "ok", "banco": self.servico.caminho, "journal": self.servico.pool.modo_journal(),
+							"versao": versao, "conexoes": self.servico.pool.tamanho})
+				return
+			etag = self.servico.etag(versao, f"{self.path}|{ndjson}")
+			if etag in self.headers.get("If-None-Match", ""):
+				self._cabecalhos(304, "application/json", 0, etag)
+				return
+
+			if url.path in ("/", "/consultas"):
+				self._json({nome: {"descricao": c.descricao, "parametros": sorted(c.parametros)}
+							for nome, c in CONSULTAS.items()}, etag=etag)
+			elif url.path.startswith("/consultas/"):
+				self._consulta(url.path[len("/consultas/"):], parametros, etag, ndjson)
+			elif url.path == "/estatisticas":
+				with self.servico.pool.relatorios() as relatorios:
+					filtros = {k: _valor(k, v) for k, v in parametros.items()}
+					self._json(relatorios.estatisticas(**filtros), etag=etag)
+			elif url.path in ("/calculo", "/exportacao"):
+				self._calculo(url.path, parametros, versao, etag, ndjson)
+			else:
+				self._erro(404, f"Rota desconhecida: {url.path}")
+		except (ValueError, TypeError) as e:
+			self._erro(400, str(e))
+		except PoolEsgotado as e:
+			self._erro(503, str(e))
+		except (BrokenPipeError, ConnectionResetError):
+			self.close_connection = True
+		except Exception as e:
+			self._erro(500, f"{type(e).__name__}: {e}")
+
+	def _consulta(self, nome: str, parametros: Dict[str, str], etag: str, ndjson: bool) -> None:
+		valores = {k: _valor(k, v) for k, v in parametros.items()}
+		with self.servico.pool.relatorios() as relatorios:
+			if not ndjson:
+				self._quadro(relatorios.consultar(nome, **valores), etag, ndjson=False)
+				return
+			# Resultado grande: direto do cursor em lotes, sem montar o resultado inteiro
+			cursor = relatorios.cursor(nome, **valores)
+			colunas = [d[0] for d in cursor.description]
+
+			def blocos() -> Iterator[str]:
+				while True:
+					linhas = cursor.fetchmany(LOTE_NDJSON)
+					if not linhas:
+						return
+					yield "".join(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False, default=str) + "\n"
+								  for linha in linhas)
+
+			self._ndjson(blocos(), etag)
+
+	def _calculo(self, rota: str, parametros: Dict[str, str], versao: Tuple[int, int, int],
+				 etag: str, ndjson: bool) -> None:
+		inicio, fim = _data(parametros, "inicio"), _data(parametros, "fim")
+		modo = parametros.get("modo", "proporcional")
+
+		def calcular() -> pd.DataFrame:
+			with self.servico.pool.relatorios() as relatorios:
+				return calcular_periodo(relatorios.conn, inicio, fim, modo)
+
+		df_saida = self.servico.em_cache(("calculo", inicio, fim, modo), versao, calcular)
+		if rota == "/calculo":
+			self._quadro(df_saida, etag, ndjson)
+			return
+
+		competencia = f"{fim.month:02d}/{fim.year}"
+		conteudo = self.servico.em_cache(("xlsx", inicio, fim, modo), versao,
+										 lambda: planilha_xlsx(df_saida, competencia))
+		self.send_response(200)
+		self.send_header("Content-Type", TIPO_XLSX)
+		self.send_header("Content-Length", str(len(conteudo)))
+		self.send_header("Content-Disposition", f'attachment; filename="VR_MENSAL_{competencia.replace("/", ".")}.xlsx"')
+		self.send_header("ETag", etag)
+		self.end_headers()
+		self.wfile.write(conteudo)
+
+
+if __name__ == "__main__":
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Serviço HTTP/JSON somente leitura sobre o banco de VR")
+	parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Banco de dados")
+	parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta")
+	parser.add_argument("--porta", type=int, default=8765, help="Porta")
+	parser.add_argument("--conexoes", type=int, default=TAMANHO_POOL, help="Conexões somente leitura no pool")
+	parser.add_argument("--sem-wal", action="store_true", help="Não coloca o banco em modo WAL")
+	parser.add_argument("--verboso", action="store_true", help="Registra cada requisição")
+	args = parser.parse_args()
+
+	servico = ServicoVR(args.db, args.conexoes, wal=not args.sem_wal)
+	servidor = servico.servidor(args.host, args.porta, args.verboso)
+	print(f"🌐 Servindo {args.db} em http://{args.host}:{servidor.server_address[1]} "
+		  f"({args.conexoes} conexões, journal={servico.pool.modo_journal()})")
+	try:
+		servidor.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		servidor.server_close()
+		servico.close()
@@ -0,0 +1,204 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+ERRO = "ERRO"
+AVISO = "AVISO"
+
+COLUNAS_VIOLACOES = ["regra", "severidade", "colaborador_id", "matricula", "descricao", "detalhe"]
+
+
+@dataclass(frozen=True)
+class Regra:
+	"""Regra de validação declarativa sobre a base preparada (uma linha por colaborador).
+
+	``violacao`` devolve a máscara booleana das linhas que violam a regra e
+	``detalhe`` (opcional) um texto por linha; ambos operam sobre colunas
+	inteiras. Regras cujas ``colunas`` não existem na base são ignoradas.
+	"""
+	codigo: str
+	severidade: str
+	descricao: str
+	violacao: Callable[["pd.DataFrame"], "pd.Series"]
+	detalhe: Optional[Callable[["pd.DataFrame"], "pd.Series"]] = None
+	colunas: Tuple[str, ...] = ()
+
+
+def _texto(serie: pd.Series) -> pd.Series:
+	return serie.astype(str).where(serie.notna(), "(vazio)")
+
+
+def _diferentes(a: pd.Series, b: pd.Series) -> pd.Series:
+	# Colunas categóricas com categorias distintas não se comparam diretamente
+	return a.astype(object) != b.astype(object)
+
+
+def _data(serie: pd.Series) -> pd.Series:
+	return serie.dt.strftime("%d/%m/%Y")
+
+
+REGRAS: Tuple[Regra, ...] = (
+	Regra(
+		"matricula_duplicada", ERRO, "Matrícula duplicada na base de colaboradores",
+		lambda b: b["matricula"].duplicated(keep=False),
+		lambda b: "matrícula " + _texto(b["matricula"]),
+		("matricula",),
+	),
+	Regra(
+		"sindicato_ausente", ERRO, "Colaborador sem sindicato informado",
+		lambda b: b["sindicato_informado"].isna() | b["sindicato_id"].isna(),
+		colunas=("sindicato_informado", "sindicato_id"),
+	),
+	Regra(
+		"cargo_ausente", ERRO, "Colaborador sem cargo informado",
+		lambda b: b["cargo_informado"].isna() | b["cargo"].isna(),
+		colunas=("cargo_informado", "cargo"),
+	),
+	Regra(
+		"sindicato_desconhecido", ERRO, "Sindicato da planilha não cadastrado (mapeado para o sindicato padrão)",
+		lambda b: b["sindicato_informado"].notna() & _diferentes(b["sindicato_informado"], b["sindicato_nome_completo"]),
+		lambda b: "informado: " + _texto(b["sindicato_informado"]) + " | atribuído: " + _texto(b["sindicato"]),
+		("sindicato_informado", "sindicato_nome_completo", "sindicato"),
+	),
+	Regra(
+		"cargo_desconhecido", AVISO, "Cargo da planilha não cadastrado (mapeado para o cargo padrão)",
+		lambda b: b["cargo_informado"].notna() & _diferentes(b["cargo_informado"], b["cargo"]),
+		lambda b: "informado: " + _texto(b["cargo_informado"]) + " | atribuído: " + _texto(b["cargo"]),
+		("cargo_informado", "cargo"),
+	),
+	Regra(
+		"desligamento_antes_admissao", ERRO, "Data de desligamento anterior à admissão",
+		lambda b: b["data_desligamento"] < b["data_admissao"],
+		lambda b: "admissão " + _data(b["data_admissao"]) + " | desligamento " + _data(b["data_desligamento"]),
+		("data_admissao", "data_desligamento"),
+	),
+	Regra(
+		"ferias_acima_dias_uteis", AVISO, "Dias úteis de férias acima dos dias úteis do período",
+		lambda b: b["dias_ferias_uteis"] > b["dias_uteis"],
+		lambda b: "férias (dias úteis) " + _texto(b["dias_ferias_uteis"]) + " | dias úteis " + _texto(b["dias_uteis"]),
+		("dias_ferias_uteis", "dias_uteis"),
+	),
+	Regra(
+		"exclusao_e_admissao", AVISO, "Colaborador presente nas listas de exclusão e de admissão",
+		lambda b: b["em_exclusoes"] & b["em_admissoes"],
+		colunas=("em_exclusoes", "em_admissoes"),
+	),
+)
+
+
+def _ultima_por_colaborador(tabela: Optional[pd.DataFrame], coluna: str) -> pd.Series:
+	import pandas as pd
+
+	if tabela is None or tabela.empty or coluna not in tabela.columns:
+		return pd.Series(dtype="datetime64[ns]")
+	ultima = tabela.drop_duplicates("colaborador_id", keep="last").set_index("colaborador_id")[coluna]
+	return pd.to_datetime(ultima)
+
+
+def _ferias_em_dias_uteis(base: pd.DataFrame, bases: Dict[str, pd.DataFrame]) -> pd.Series:
+	"""Dias úteis de férias por colaborador, comparáveis com ``dias_uteis`` do período.
+
+	Os intervalos de ``ferias_intervalos`` (já recortados ao período) são
+	contados no calendário do sindicato; as férias legadas sem datas já
+	são uma quantidade de dias descontada dos dias úteis e entram como estão.
+	"""
+	import numpy as np
+	import pandas as pd
+
+	calendario = bases["calendario"]
+	ids = base["colaborador_id"]
+	intervalos = bases["ferias_intervalos"]
+	sindicatos = intervalos["colaborador_id"].map(base.set_index("colaborador_id")["sindicato_id"])
+	conhecidos = sindicatos.isin(calendario.sindicato_ids).to_numpy()
+	inicios = pd.to_datetime(intervalos["data_inicio"]).to_numpy(dtype="datetime64[D]")[conhecidos]
+	fins = pd.to_datetime(intervalos["data_fim"]).to_numpy(dtype="datetime64[D]")[conhecidos]
+	fins = np.where(np.isnat(fins), np.datetime64(calendario.fim, "D"), fins)
+	contagem = calendario.dias_uteis(sindicatos[conhecidos].to_numpy(dtype=np.int64), inicios, fins)
+	uteis = pd.Series(contagem, index=intervalos["colaborador_id"].to_numpy()[conhecidos]).groupby(level=0).sum()
+
+	dias = ids.map(uteis).fillna(0)
+	ferias = bases.get("ferias")
+	if ferias is not None and "dias_ferias_sem_datas" in ferias.columns:
+		dias += ids.map(ferias.groupby("colaborador_id")["dias_ferias_sem_datas"].sum()).fillna(0)
+	return dias.astype(np.int64)
+
+
+def preparar_base(bases: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+	"""Junta as bases carregadas em uma linha por colaborador com as colunas das regras.
+
+	Apenas joins por hash e mapeamentos por índice: custo linear no tamanho
+	das bases.
+	"""
+	import numpy as np
+	import pandas as pd
+
+	base = bases["colaboradores"].copy()
+	ids = base["colaborador_id"]
+
+	# Datas efetivas: tabelas de admissões/desligamentos têm precedência
+	for coluna, tabela in (("data_admissao", "admissoes"), ("data_desligamento", "desligamentos")):
+		propria = pd.to_datetime(base[coluna]) if coluna in base.columns else pd.Series(pd.NaT, index=base.index)
+		da_tabela = ids.map(_ultima_por_colaborador(bases.get(tabela), coluna))
+		base[coluna] = pd.to_datetime(da_tabela).fillna(propria)
+
+	if "dias_uteis" in bases and "sindicato_id" in base.columns:
+		dias_uteis = bases["dias_uteis"].drop_duplicates("sindicato_id", keep="last").set_index("sindicato_id")["dias_uteis"]
+		base["dias_uteis"] = base["sindicato_id"].map(dias_uteis)
+	if "ferias" in bases:
+		ferias = bases["ferias"].groupby("colaborador_id")["dias_ferias"].sum()
+		base["dias_ferias"] = ids.map(ferias).fillna(0).astype(np.int64)
+	if bases.get("calendario") is not None and "ferias_intervalos" in bases and "sindicato_id" in base.columns:
+		base["dias_ferias_uteis"] = _ferias_em_dias_uteis(base, bases)
+
+	for coluna, tabela in (("em_exclusoes", "exclusoes"), ("em_admissoes", "admissoes")):
+		ids_tabela = bases[tabela]["colaborador_id"] if tabela in bases else []
+		base[coluna] = ids.isin(ids_tabela)
+
+	return base
+
+
+def validar_bases(bases: Dict[str, pd.DataFrame], regras: Sequence[Regra] = REGRAS) -> pd.DataFrame:
+	"""Executa as regras sobre as bases de ``carregar_bases`` e retorna as violações.
+
+	Uma linha por (regra, colaborador) com as colunas de ``COLUNAS_VIOLACOES``.
+	Cada regra é uma expressão vetorizada sobre a base preparada, então o
+	custo total é linear e a validação pode rodar antes de todo cálculo.
+	"""
+	import pandas as pd
+
+	base = preparar_base(bases)
+	partes = []
+	for regra in regras:
+		if any(c not in base.columns for c in regra.colunas):
+			continue
+		mascara = regra.violacao(base).fillna(False).to_numpy(dtype=bool)
+		if not mascara.any():
+			continue
+		violadores = base[mascara]
+		partes.append(pd.DataFrame({
+			"regra": regra.codigo,
+			"severidade": regra.severidade,
+			"colaborador_id": violadores["colaborador_id"].to_numpy(),
+			"matricula": violadores["matricula"].to_numpy(),
+			"descricao": regra.descricao,
+			"detalhe": regra.detalhe(violadores).to_numpy() if regra.detalhe else "",
+		}))
+
+	if not partes:
+		return pd.DataFrame(columns=COLUNAS_VIOLACOES)
+	return pd.concat(partes, ignore_index=True)
+
+
+def resumo_violacoes(violacoes: pd.DataFrame) -> pd.DataFrame:
+	"""Contagem de violações por (regra, severidade)."""
+	return (
+		violacoes.groupby(["regra", "severidade"], sort=False).size()
+		.rename("ocorrencias").reset_index()
+	)
+
+
+def tem_erros(violacoes: pd.DataFrame) -> bool:
+	return bool((violacoes["severidade"] == ERRO).any())
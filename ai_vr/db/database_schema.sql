@@ -32,6 +32,7 @@ CREATE TABLE sindicatos (
     nome_completo VARCHAR(200) NOT NULL UNIQUE,
     nome_abreviado VARCHAR(50),
     estado_id INTEGER NOT NULL,
+    municipio VARCHAR(100), -- Município-sede (feriados municipais)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (estado_id) REFERENCES estados(id)
 );
@@ -55,6 +56,8 @@ CREATE TABLE colaboradores (
     situacao VARCHAR(50) NOT NULL, -- Trabalhando, Férias, Atestado, Auxílio Doença, Licença Maternidade
     data_admissao DATE,
     data_desligamento DATE,
+    sindicato_informado VARCHAR(200), -- texto original da planilha (auditoria do mapeamento)
+    cargo_informado VARCHAR(200),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (empresa_id) REFERENCES empresas(id),
@@ -78,6 +81,18 @@ CREATE TABLE dias_uteis (
     UNIQUE(sindicato_id, periodo_inicio, periodo_fim)
 );
 
+-- Tabela de feriados (calendário de dias úteis)
+CREATE TABLE feriados (
+    id INTEGER PRIMARY KEY,
+    data DATE NOT NULL,
+    descricao VARCHAR(100) NOT NULL,
+    escopo VARCHAR(20) NOT NULL, -- NACIONAL, ESTADUAL, MUNICIPAL
+    uf VARCHAR(2), -- ESTADUAL e MUNICIPAL
+    municipio VARCHAR(100), -- MUNICIPAL
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(data, escopo, uf, municipio)
+);
+
 -- =====================================================
 -- TABELAS DE RELACIONAMENTO
 -- =====================================================
@@ -86,8 +101,10 @@ CREATE TABLE dias_uteis (
 CREATE TABLE ferias (
     id INTEGER PRIMARY KEY,
     colaborador_id INTEGER NOT NULL,
-    periodo_inicio DATE NOT NULL,
-    periodo_fim DATE NOT NULL,
+    data_inicio DATE, -- intervalo de gozo (inclusive), recortado a cada competência
+    data_fim DATE,
+    periodo_inicio DATE, -- legado: linha válida só para o período exato, sem datas de gozo
+    periodo_fim DATE,
     dias_ferias INTEGER NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (colaborador_id) REFERENCES colaboradores(id)
@@ -163,6 +180,37 @@ CREATE TABLE calculos_vr (
     UNIQUE(colaborador_id, periodo_mes, periodo_ano)
 );
 
+-- =====================================================
+-- TABELAS DE RESUMO (mantidas pelos triggers da seção TRIGGERS)
+-- =====================================================
+
+-- Colaboradores por (empresa, sindicato, categoria do cargo, situação)
+CREATE TABLE resumo_colaboradores (
+    empresa_id INTEGER NOT NULL,
+    sindicato_id INTEGER NOT NULL,
+    categoria VARCHAR(50) NOT NULL, -- cargos.categoria ('' se ausente)
+    situacao VARCHAR(50) NOT NULL,
+    colaboradores INTEGER NOT NULL,
+    PRIMARY KEY (empresa_id, sindicato_id, categoria, situacao)
+) WITHOUT ROWID;
+
+-- Totais de calculos_vr por (competência, empresa, sindicato, categoria do cargo).
+-- Valores em centavos (inteiros): somas e subtrações incrementais não acumulam
+-- erro de ponto flutuante.
+CREATE TABLE resumo_calculos_vr_grupos (
+    periodo_ano INTEGER NOT NULL,
+    periodo_mes INTEGER NOT NULL,
+    empresa_id INTEGER NOT NULL,
+    sindicato_id INTEGER NOT NULL,
+    categoria VARCHAR(50) NOT NULL,
+    colaboradores INTEGER NOT NULL,
+    dias_vr INTEGER NOT NULL,
+    valor_total_centavos INTEGER NOT NULL,
+    custo_empresa_centavos INTEGER NOT NULL,
+    desconto_colaborador_centavos INTEGER NOT NULL,
+    PRIMARY KEY (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria)
+) WITHOUT ROWID;
+
 -- =====================================================
 -- ÍNDICES PARA PERFORMANCE
 -- =====================================================
@@ -172,12 +220,22 @@ CREATE INDEX idx_colaboradores_matricula ON colaboradores(matricula);
 CREATE INDEX idx_colaboradores_situacao ON colaboradores(situacao);
 CREATE INDEX idx_colaboradores_sindicato ON colaboradores(sindicato_id);
 CREATE INDEX idx_ferias_colaborador ON ferias(colaborador_id);
+CREATE INDEX idx_ferias_periodo ON ferias(periodo_inicio, periodo_fim);
+CREATE INDEX idx_feriados_data ON feriados(data);
 CREATE INDEX idx_afastamentos_colaborador ON afastamentos(colaborador_id);
 CREATE INDEX idx_desligamentos_colaborador ON desligamentos(colaborador_id);
+CREATE INDEX idx_admissoes_colaborador ON admissoes(colaborador_id);
 CREATE INDEX idx_exclusoes_colaborador ON exclusoes(colaborador_id);
 CREATE INDEX idx_calculos_vr_colaborador ON calculos_vr(colaborador_id);
 CREATE INDEX idx_calculos_vr_periodo ON calculos_vr(periodo_mes, periodo_ano);
 
+-- Índices de intervalos (R*Tree) para "afastamentos/férias que se sobrepõem
+-- a [inicio, fim]" sem varrer o histórico inteiro. Coordenadas em dias desde
+-- 1970-01-01; data_fim ausente (afastamento em aberto) vira o maior inteiro.
+-- Mantidos pelos triggers de afastamentos e ferias (seção TRIGGERS).
+CREATE VIRTUAL TABLE rtree_afastamentos USING rtree_i32(id, inicio, fim);
+CREATE VIRTUAL TABLE rtree_ferias USING rtree_i32(id, inicio, fim);
+
 -- =====================================================
 -- VIEWS PARA FACILITAR CONSULTAS
 -- =====================================================
@@ -207,17 +265,17 @@ WHERE c.id NOT IN (
 )
 AND c.situacao NOT IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado');
 
--- View para resumo de cálculos por período
+-- View para resumo de cálculos por período (lida das tabelas de resumo: O(grupos))
 CREATE VIEW resumo_calculos_vr AS
 SELECT 
     periodo_mes,
     periodo_ano,
-    COUNT(*) as total_colaboradores,
-    SUM(dias_vr_calculados) as total_dias_vr,
-    SUM(valor_total) as valor_total_vr,
-    SUM(custo_empresa) as custo_total_empresa,
-    SUM(desconto_colaborador) as desconto_total_colaborador
-FROM calculos_vr
+    SUM(colaboradores) as total_colaboradores,
+    SUM(dias_vr) as total_dias_vr,
+    SUM(valor_total_centavos) / 100.0 as valor_total_vr,
+    SUM(custo_empresa_centavos) / 100.0 as custo_total_empresa,
+    SUM(desconto_colaborador_centavos) / 100.0 as desconto_total_colaborador
+FROM resumo_calculos_vr_grupos
 GROUP BY periodo_mes, periodo_ano;
 
 -- =====================================================
@@ -231,3 +289,263 @@ CREATE TRIGGER update_colaboradores_timestamp
 BEGIN
     UPDATE colaboradores SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
+
+-- Triggers que mantêm os índices de intervalos (rtree_afastamentos, rtree_ferias)
+CREATE TRIGGER rtree_afastamentos_insert
+    AFTER INSERT ON afastamentos
+BEGIN
+    INSERT INTO rtree_afastamentos (id, inicio, fim)
+    SELECT NEW.id,
+           CAST(julianday(NEW.data_inicio) - 2440587.5 AS INTEGER),
+           COALESCE(CAST(julianday(NEW.data_fim) - 2440587.5 AS INTEGER), 2147483647)
+    WHERE NEW.data_inicio IS NOT NULL;
+END;
+
+CREATE TRIGGER rtree_afastamentos_update
+    AFTER UPDATE OF id, data_inicio, data_fim ON afastamentos
+BEGIN
+    DELETE FROM rtree_afastamentos WHERE id = OLD.id;
+    INSERT INTO rtree_afastamentos (id, inicio, fim)
+    SELECT NEW.id,
+           CAST(julianday(NEW.data_inicio) - 2440587.5 AS INTEGER),
+           COALESCE(CAST(julianday(NEW.data_fim) - 2440587.5 AS INTEGER), 2147483647)
+    WHERE NEW.data_inicio IS NOT NULL;
+END;
+
+CREATE TRIGGER rtree_afastamentos_delete
+    AFTER DELETE ON afastamentos
+BEGIN
+    DELETE FROM rtree_afastamentos WHERE id = OLD.id;
+END;
+
+-- Férias legadas (sem data_inicio) não entram no índice
+CREATE TRIGGER rtree_ferias_insert
+    AFTER INSERT ON ferias
+BEGIN
+    INSERT INTO rtree_ferias (id, inicio, fim)
+    SELECT NEW.id,
+           CAST(julianday(NEW.data_inicio) - 2440587.5 AS INTEGER),
+           COALESCE(CAST(julianday(NEW.data_fim) - 2440587.5 AS INTEGER), 2147483647)
+    WHERE NEW.data_inicio IS NOT NULL;
+END;
+
+CREATE TRIGGER rtree_ferias_update
+    AFTER UPDATE OF id, data_inicio, data_fim ON ferias
+BEGIN
+    DELETE FROM rtree_ferias WHERE id = OLD.id;
+    INSERT INTO rtree_ferias (id, inicio, fim)
+    SELECT NEW.id,
+           CAST(julianday(NEW.data_inicio) - 2440587.5 AS INTEGER),
+           COALESCE(CAST(julianday(NEW.data_fim) - 2440587.5 AS INTEGER), 2147483647)
+    WHERE NEW.data_inicio IS NOT NULL;
+END;
+
+CREATE TRIGGER rtree_ferias_delete
+    AFTER DELETE ON ferias
+BEGIN
+    DELETE FROM rtree_ferias WHERE id = OLD.id;
+END;
+
+-- Triggers que mantêm resumo_colaboradores
+CREATE TRIGGER resumo_colaboradores_insert
+    AFTER INSERT ON colaboradores
+BEGIN
+    INSERT INTO resumo_colaboradores (empresa_id, sindicato_id, categoria, situacao, colaboradores)
+    VALUES (NEW.empresa_id, NEW.sindicato_id,
+            COALESCE((SELECT categoria FROM cargos WHERE id = NEW.cargo_id), ''), NEW.situacao, 1)
+    ON CONFLICT (empresa_id, sindicato_id, categoria, situacao)
+    DO UPDATE SET colaboradores = colaboradores + 1;
+END;
+
+CREATE TRIGGER resumo_colaboradores_delete
+    AFTER DELETE ON colaboradores
+BEGIN
+    UPDATE resumo_colaboradores SET colaboradores = colaboradores - 1
+    WHERE (empresa_id, sindicato_id, categoria, situacao) =
+          (OLD.empresa_id, OLD.sindicato_id, COALESCE((SELECT categoria FROM cargos WHERE id = OLD.cargo_id), ''), OLD.situacao);
+    DELETE FROM resumo_colaboradores
+    WHERE (empresa_id, sindicato_id, categoria, situacao) =
+          (OLD.empresa_id, OLD.sindicato_id, COALESCE((SELECT categoria FROM cargos WHERE id = OLD.cargo_id), ''), OLD.situacao)
+      AND colaboradores = 0;
+END;
+
+CREATE TRIGGER resumo_colaboradores_update
+    AFTER UPDATE OF empresa_id, sindicato_id, cargo_id, situacao ON colaboradores
+BEGIN
+    UPDATE resumo_colaboradores SET colaboradores = colaboradores - 1
+    WHERE (empresa_id, sindicato_id, categoria, situacao) =
+          (OLD.empresa_id, OLD.sindicato_id, COALESCE((SELECT categoria FROM cargos WHERE id = OLD.cargo_id), ''), OLD.situacao);
+    INSERT INTO resumo_colaboradores (empresa_id, sindicato_id, categoria, situacao, colaboradores)
+    VALUES (NEW.empresa_id, NEW.sindicato_id,
+            COALESCE((SELECT categoria FROM cargos WHERE id = NEW.cargo_id), ''), NEW.situacao, 1)
+    ON CONFLICT (empresa_id, sindicato_id, categoria, situacao)
+    DO UPDATE SET colaboradores = colaboradores + 1;
+    DELETE FROM resumo_colaboradores
+    WHERE (empresa_id, sindicato_id, categoria, situacao) =
+          (OLD.empresa_id, OLD.sindicato_id, COALESCE((SELECT categoria FROM cargos WHERE id = OLD.cargo_id), ''), OLD.situacao)
+      AND colaboradores = 0;
+END;
+
+-- Triggers que mantêm resumo_calculos_vr_grupos
+CREATE TRIGGER resumo_calculos_vr_insert
+    AFTER INSERT ON calculos_vr
+BEGIN
+    INSERT INTO resumo_calculos_vr_grupos
+    SELECT NEW.periodo_ano, NEW.periodo_mes, c.empresa_id, c.sindicato_id, COALESCE(car.categoria, ''),
+           1, NEW.dias_vr_calculados,
+           CAST(ROUND(NEW.valor_total * 100) AS INTEGER),
+           CAST(ROUND(NEW.custo_empresa * 100) AS INTEGER),
+           CAST(ROUND(NEW.desconto_colaborador * 100) AS INTEGER)
+    FROM colaboradores c LEFT JOIN cargos car ON car.id = c.cargo_id
+    WHERE c.id = NEW.colaborador_id
+    ON CONFLICT (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) DO UPDATE SET
+        colaboradores = colaboradores + excluded.colaboradores,
+        dias_vr = dias_vr + excluded.dias_vr,
+        valor_total_centavos = valor_total_centavos + excluded.valor_total_centavos,
+        custo_empresa_centavos = custo_empresa_centavos + excluded.custo_empresa_centavos,
+        desconto_colaborador_centavos = desconto_colaborador_centavos + excluded.desconto_colaborador_centavos;
+END;
+
+CREATE TRIGGER resumo_calculos_vr_delete
+    AFTER DELETE ON calculos_vr
+BEGIN
+    UPDATE resumo_calculos_vr_grupos SET
+        colaboradores = colaboradores - 1,
+        dias_vr = dias_vr - OLD.dias_vr_calculados,
+        valor_total_centavos = valor_total_centavos - CAST(ROUND(OLD.valor_total * 100) AS INTEGER),
+        custo_empresa_centavos = custo_empresa_centavos - CAST(ROUND(OLD.custo_empresa * 100) AS INTEGER),
+        desconto_colaborador_centavos = desconto_colaborador_centavos - CAST(ROUND(OLD.desconto_colaborador * 100) AS INTEGER)
+    WHERE (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) =
+          (SELECT OLD.periodo_ano, OLD.periodo_mes, c.empresa_id, c.sindicato_id, COALESCE(car.categoria, '')
+           FROM colaboradores c LEFT JOIN cargos car ON car.id = c.cargo_id WHERE c.id = OLD.colaborador_id);
+    DELETE FROM resumo_calculos_vr_grupos
+    WHERE periodo_ano = OLD.periodo_ano AND periodo_mes = OLD.periodo_mes AND colaboradores = 0;
+END;
+
+CREATE TRIGGER resumo_calculos_vr_update
+    AFTER UPDATE OF colaborador_id, periodo_mes, periodo_ano, dias_vr_calculados,
+                    valor_total, custo_empresa, desconto_colaborador ON calculos_vr
+BEGIN
+    UPDATE resumo_calculos_vr_grupos SET
+        colaboradores = colaboradores - 1,
+        dias_vr = dias_vr - OLD.dias_vr_calculados,
+        valor_total_centavos = valor_total_centavos - CAST(ROUND(OLD.valor_total * 100) AS INTEGER),
+        custo_empresa_centavos = custo_empresa_centavos - CAST(ROUND(OLD.custo_empresa * 100) AS INTEGER),
+        desconto_colaborador_centavos = desconto_colaborador_centavos - CAST(ROUND(OLD.desconto_colaborador * 100) AS INTEGER)
+    WHERE (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) =
+          (SELECT OLD.periodo_ano, OLD.periodo_mes, c.empresa_id, c.sindicato_id, COALESCE(car.categoria, '')
+           FROM colaboradores c LEFT JOIN cargos car ON car.id = c.cargo_id WHERE c.id = OLD.colaborador_id);
+    INSERT INTO resumo_calculos_vr_grupos
+    SELECT NEW.periodo_ano, NEW.periodo_mes, c.empresa_id, c.sindicato_id, COALESCE(car.categoria, ''),
+           1, NEW.dias_vr_calculados,
+           CAST(ROUND(NEW.valor_total * 100) AS INTEGER),
+           CAST(ROUND(NEW.custo_empresa * 100) AS INTEGER),
+           CAST(ROUND(NEW.desconto_colaborador * 100) AS INTEGER)
+    FROM colaboradores c LEFT JOIN cargos car ON car.id = c.cargo_id
+    WHERE c.id = NEW.colaborador_id
+    ON CONFLICT (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) DO UPDATE SET
+        colaboradores = colaboradores + excluded.colaboradores,
+        dias_vr = dias_vr + excluded.dias_vr,
+        valor_total_centavos = valor_total_centavos + excluded.valor_total_centavos,
+        custo_empresa_centavos = custo_empresa_centavos + excluded.custo_empresa_centavos,
+        desconto_colaborador_centavos = desconto_colaborador_centavos + excluded.desconto_colaborador_centavos;
+    DELETE FROM resumo_calculos_vr_grupos
+    WHERE periodo_ano = OLD.periodo_ano AND periodo_mes = OLD.periodo_mes AND colaboradores = 0;
+END;
+
+-- Colaborador mudou de empresa, sindicato ou cargo: os cálculos dele mudam de grupo
+CREATE TRIGGER resumo_calculos_vr_colaborador_update
+    AFTER UPDATE OF empresa_id, sindicato_id, cargo_id ON colaboradores
+BEGIN
+    UPDATE resumo_calculos_vr_grupos SET
+        colaboradores = colaboradores - v.n,
+        dias_vr = dias_vr - v.dias,
+        valor_total_centavos = valor_total_centavos - v.valor,
+        custo_empresa_centavos = custo_empresa_centavos - v.custo,
+        desconto_colaborador_centavos = desconto_colaborador_centavos - v.desconto
+    FROM (
+        SELECT periodo_ano AS ano, periodo_mes AS mes, COUNT(*) AS n, SUM(dias_vr_calculados) AS dias,
+               SUM(CAST(ROUND(valor_total * 100) AS INTEGER)) AS valor,
+               SUM(CAST(ROUND(custo_empresa * 100) AS INTEGER)) AS custo,
+               SUM(CAST(ROUND(desconto_colaborador * 100) AS INTEGER)) AS desconto
+        FROM calculos_vr WHERE colaborador_id = OLD.id
+        GROUP BY periodo_ano, periodo_mes
+    ) AS v
+    WHERE (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) =
+          (v.ano, v.mes, OLD.empresa_id, OLD.sindicato_id,
+           COALESCE((SELECT categoria FROM cargos WHERE id = OLD.cargo_id), ''));
+    INSERT INTO resumo_calculos_vr_grupos
+    SELECT periodo_ano, periodo_mes, NEW.empresa_id, NEW.sindicato_id,
+           COALESCE((SELECT categoria FROM cargos WHERE id = NEW.cargo_id), ''),
+           COUNT(*), SUM(dias_vr_calculados),
+           SUM(CAST(ROUND(valor_total * 100) AS INTEGER)),
+           SUM(CAST(ROUND(custo_empresa * 100) AS INTEGER)),
+           SUM(CAST(ROUND(desconto_colaborador * 100) AS INTEGER))
+    FROM calculos_vr WHERE colaborador_id = NEW.id
+    GROUP BY periodo_ano, periodo_mes
+    ON CONFLICT (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) DO UPDATE SET
+        colaboradores = colaboradores + excluded.colaboradores,
+        dias_vr = dias_vr + excluded.dias_vr,
+        valor_total_centavos = valor_total_centavos + excluded.valor_total_centavos,
+        custo_empresa_centavos = custo_empresa_centavos + excluded.custo_empresa_centavos,
+        desconto_colaborador_centavos = desconto_colaborador_centavos + excluded.desconto_colaborador_centavos;
+    DELETE FROM resumo_calculos_vr_grupos
+    WHERE empresa_id = OLD.empresa_id AND sindicato_id = OLD.sindicato_id AND colaboradores = 0;
+END;
+
+-- Cargo mudou de categoria: colaboradores e cálculos desse cargo mudam de grupo
+CREATE TRIGGER resumo_cargos_categoria_update
+    AFTER UPDATE OF categoria ON cargos
+    WHEN COALESCE(OLD.categoria, '') <> COALESCE(NEW.categoria, '')
+BEGIN
+    UPDATE resumo_colaboradores SET colaboradores = colaboradores - v.n
+    FROM (
+        SELECT empresa_id AS empresa, sindicato_id AS sindicato, situacao AS sit, COUNT(*) AS n
+        FROM colaboradores WHERE cargo_id = NEW.id
+        GROUP BY empresa_id, sindicato_id, situacao
+    ) AS v
+    WHERE (empresa_id, sindicato_id, categoria, situacao) =
+          (v.empresa, v.sindicato, COALESCE(OLD.categoria, ''), v.sit);
+    INSERT INTO resumo_colaboradores (empresa_id, sindicato_id, categoria, situacao, colaboradores)
+    SELECT empresa_id, sindicato_id, COALESCE(NEW.categoria, ''), situacao, COUNT(*)
+    FROM colaboradores WHERE cargo_id = NEW.id
+    GROUP BY empresa_id, sindicato_id, situacao
+    ON CONFLICT (empresa_id, sindicato_id, categoria, situacao)
+    DO UPDATE SET colaboradores = colaboradores + excluded.colaboradores;
+    DELETE FROM resumo_colaboradores WHERE categoria = COALESCE(OLD.categoria, '') AND colaboradores = 0;
+
+    UPDATE resumo_calculos_vr_grupos SET
+        colaboradores = colaboradores - v.n,
+        dias_vr = dias_vr - v.dias,
+        valor_total_centavos = valor_total_centavos - v.valor,
+        custo_empresa_centavos = custo_empresa_centavos - v.custo,
+        desconto_colaborador_centavos = desconto_colaborador_centavos - v.desconto
+    FROM (
+        SELECT v.periodo_ano AS ano, v.periodo_mes AS mes, c.empresa_id AS empresa, c.sindicato_id AS sindicato,
+               COUNT(*) AS n, SUM(v.dias_vr_calculados) AS dias,
+               SUM(CAST(ROUND(v.valor_total * 100) AS INTEGER)) AS valor,
+               SUM(CAST(ROUND(v.custo_empresa * 100) AS INTEGER)) AS custo,
+               SUM(CAST(ROUND(v.desconto_colaborador * 100) AS INTEGER)) AS desconto
+        FROM calculos_vr v JOIN colaboradores c ON c.id = v.colaborador_id
+        WHERE c.cargo_id = NEW.id
+        GROUP BY v.periodo_ano, v.periodo_mes, c.empresa_id, c.sindicato_id
+    ) AS v
+    WHERE (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) =
+          (v.ano, v.mes, v.empresa, v.sindicato, COALESCE(OLD.categoria, ''));
+    INSERT INTO resumo_calculos_vr_grupos
+    SELECT v.periodo_ano, v.periodo_mes, c.empresa_id, c.sindicato_id, COALESCE(NEW.categoria, ''),
+           COUNT(*), SUM(v.dias_vr_calculados),
+           SUM(CAST(ROUND(v.valor_total * 100) AS INTEGER)),
+           SUM(CAST(ROUND(v.custo_empresa * 100) AS INTEGER)),
+           SUM(CAST(ROUND(v.desconto_colaborador * 100) AS INTEGER))
+    FROM calculos_vr v JOIN colaboradores c ON c.id = v.colaborador_id
+    WHERE c.cargo_id = NEW.id
+    GROUP BY v.periodo_ano, v.periodo_mes, c.empresa_id, c.sindicato_id
+    ON CONFLICT (periodo_ano, periodo_mes, empresa_id, sindicato_id, categoria) DO UPDATE SET
+        colaboradores = colaboradores + excluded.colaboradores,
+        dias_vr = dias_vr + excluded.dias_vr,
+        valor_total_centavos = valor_total_centavos + excluded.valor_total_centavos,
+        custo_empresa_centavos = custo_empresa_centavos + excluded.custo_empresa_centavos,
+        desconto_colaborador_centavos = desconto_colaborador_centavos + excluded.desconto_colaborador_centavos;
+    DELETE FROM resumo_calculos_vr_grupos WHERE categoria = COALESCE(OLD.categoria, '') AND colaboradores = 0;
+END;
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark do backup compactado: vazão x taxa de compressão por codec/nível.
+
+Cria um banco sintético do tamanho pedido (linhas no formato de calculos_vr,
+com textos repetidos como os reais) e mede:
+  - backup antigo: cópia do .db + ZIP_DEFLATED (nível padrão, um núcleo)
+  - stream_backup: leitura única do snapshot + compressão em blocos no pool
+    de threads, para cada codec/nível pedido
+
+Vazão = MB do banco por segundo; taxa = tamanho compactado / tamanho do banco.
+
+Uso:
+  python3 -m ai_vr.scripts.benchmark_backup                       # banco de 2 GB
+  python3 -m ai_vr.scripts.benchmark_backup --tamanho-mb 256 --codecs gzip xz --niveis 1 6
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+from ai_vr.scripts.database_backup import CODECS, stream_backup
+
+SINDICATOS = np.array(["SINDPD SP", "SINDPD RJ", "SINDPPD RS", "SITEPD PR"], dtype=object)
+OBSERVACOES = np.array(["", "", "", "Admissão em 02/05/2025", "Desligado em 10/05/2025 (proporcional)",
+                        "Desligado c/ comunicado até dia 15"], dtype=object)
+LINHAS_POR_LOTE = 200_000
+
+
+def criar_banco(caminho, tamanho_mb, seed=42):
+    """Insere lotes de linhas sintéticas até o arquivo atingir ``tamanho_mb``"""
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(caminho)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(
+        """
+        CREATE TABLE calculos (
+            id INTEGER PRIMARY KEY,
+            matricula INTEGER, competencia TEXT, sindicato TEXT, dias INTEGER,
+            valor_diario REAL, valor_total REAL, custo_empresa REAL, desconto REAL, observacoes TEXT
+        )
+        """
+    )
+    competencias = [f"{m:02d}/{a}" for a in range(2015, 2026) for m in range(1, 13)]
+    while os.path.getsize(caminho) < tamanho_mb * 1024 * 1024:
+        n = LINHAS_POR_LOTE
+        dias = rng.integers(0, 23, n)
+        valor = rng.choice([35.0, 35.0, 37.5, 40.0], n)
+        total = (dias * valor).round(2)
+        conn.executemany(
+            "INSERT INTO calculos (matricula, competencia, sindicato, dias, valor_diario, valor_total, "
+            "custo_empresa, desconto, observacoes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            zip(
+                rng.integers(30_000, 100_000, n).tolist(),
+                [competencias[i] for i in rng.integers(0, len(competencias), n)],
+                SINDICATOS[rng.integers(0, len(SINDICATOS), n)].tolist(),
+                dias.tolist(), valor.tolist(), total.tolist(),
+                (total * 0.8).round(2).tolist(), (total * 0.2).round(2).tolist(),
+                OBSERVACOES[rng.integers(0, len(OBSERVACOES), n)].tolist(),
+            ),
+        )
+        conn.commit()
+    conn.close()
+
+
+def backup_antigo(db_path, pasta):
+    """Como create_backup fazia: cópia do arquivo e ZIP_DEFLATED da cópia"""
+    copia = os.path.join(pasta, "antigo.db")
+    arquivo = os.path.join(pasta, "antigo.zip")
+    shutil.copy2(db_path, copia)
+    with zipfile.ZipFile(arquivo, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        zipf.write(copia, os.path.basename(copia))
+    tamanho = os.path.getsize(arquivo)
+    os.remove(copia)
+    os.remove(arquivo)
+    return tamanho
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark do backup compactado em streaming")
+    parser.add_argument("--tamanho-mb", type=int, default=2048, help="Tamanho do banco sintético (MB)")
+    parser.add_argument("--codecs", nargs="+", default=["gzip", "zstd", "xz"], choices=sorted(CODECS))
+    parser.add_argument("--niveis", nargs="+", type=int, help="Níveis de compressão (padrão: o de cada codec)")
+    parser.add_argument("--workers", type=int, help="Threads de compressão (padrão: número de CPUs)")
+    parser.add_argument("--sem-antigo", action="store_true", help="Não mede o backup antigo (cópia + ZIP)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("🗜️  BENCHMARK - BACKUP COMPACTADO EM STREAMING")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, "sintetico.db")
+        inicio = time.perf_counter()
+        criar_banco(db_path, args.tamanho_mb)
+        tamanho = os.path.getsize(db_path)
+        print(f"📏 Banco sintético: {tamanho / 1024 / 1024:,.0f} MB (gerado em {time.perf_counter() - inicio:.1f}s)")
+        print(f"🧵 Threads: {args.workers or os.cpu_count()}\n")
+        print(f"{'método':<28} {'nível':>5} {'tempo':>8} {'MB/s':>8} {'taxa':>7}")
+
+        def linha(nome, nivel, segundos, compactado):
+            print(f"{nome:<28} {nivel:>5} {segundos:7.1f}s {tamanho / 1024 / 1024 / segundos:8.1f} "
+                  f"{compactado / tamanho:7.1%}")
+
+        if not args.sem_antigo:
+            inicio = time.perf_counter()
+            compactado = backup_antigo(db_path, pasta)
+            linha("cópia + ZIP_DEFLATED", "-", time.perf_counter() - inicio, compactado)
+
+        for codec in args.codecs:
+            for nivel in args.niveis or [None]:
+                arquivo = os.path.join(pasta, f"stream.db{CODECS[codec][0]}")
+                try:
+                    info = stream_backup(db_path, arquivo, codec=codec, level=nivel, workers=args.workers)
+                except RuntimeError as e:
+                    print(f"⏭️  {codec}: {e}")
+                    break
+                linha(f"stream_backup {codec}", info["level"], info["seconds"], info["compressed_size"])
+                os.remove(arquivo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória do ConvencaoAgent.aplicar: modo seguro (cópia) x inplace.
+
+Gera uma base sintética larga (colunas extras além das da planilha VR) e mede,
+com tracemalloc, o pico de memória alocada por cada modo de aplicação.
+
+Uso:
+  python3 -m ai_vr.scripts.benchmark_convencao_memoria
+  python3 -m ai_vr.scripts.benchmark_convencao_memoria --linhas 500000 --colunas-extras 40
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from ai_vr.agents.convencao_agent import ConvencaoAgent
+
+CONVENCAO = {
+    "valor_vr_diario_padrao": 37.5,
+    "percentual_desconto_colaborador": 0.2,
+    "percentual_custo_empresa": 0.8,
+    "limites": {"max_desconto": 150.0},
+    "excecoes": {
+        "por_categoria": {"ESTAGIARIO": {"excluir": True}},
+        "por_sindicato": {"SINDPD SP": {"valor_vr_diario": 40.0}},
+    },
+}
+
+SINDICATOS = np.array(["SITEPD PR", "SINDPPD RS", "SINDPD SP", "SINDPD RJ"], dtype=object)
+CATEGORIAS = np.array(["FUNCIONARIO", "ESTAGIARIO", "APRENDIZ", "DIRETOR"], dtype=object)
+
+
+def gerar_base(linhas, colunas_extras, com_exclusoes=True, seed=42):
+    """Base sintética no formato de calcular_dias_valores, com colunas extras"""
+    rng = np.random.default_rng(seed)
+    probs_categoria = [0.94, 0.03, 0.02, 0.01] if com_exclusoes else [1.0, 0.0, 0.0, 0.0]
+    dados = {
+        "MATRICULA": np.arange(linhas, dtype=np.int64),
+        "Sindicato do Colaborador": SINDICATOS[rng.integers(0, len(SINDICATOS), linhas)],
+        "Competência": "05/2025",
+        "Dias": rng.integers(0, 23, linhas),
+        "VALOR DIÁRIO VR": rng.choice([35.0, 37.5, 0.0], linhas),
+        "categoria_cargo": CATEGORIAS[rng.choice(len(CATEGORIAS), linhas, p=probs_categoria)],
+    }
+    for i in range(colunas_extras):
+        dados[f"extra_{i}"] = rng.random(linhas)
+    return pd.DataFrame(dados)
+
+
+def medir(agente, base, inplace):
+    """Retorna (pico_bytes, segundos) de uma aplicação da convenção"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = agente.aplicar(base, inplace=inplace)
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return pico, duracao
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de memória do ConvencaoAgent.aplicar")
+    parser.add_argument("--linhas", type=int, default=200_000, help="Linhas da base sintética")
+    parser.add_argument("--colunas-extras", type=int, default=20, help="Colunas numéricas extras")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    agente = ConvencaoAgent(json.dumps(CONVENCAO))
+
+    print("🧠 BENCHMARK DE MEMÓRIA - ConvencaoAgent.aplicar")
+    print("=" * 60)
+
+    for com_exclusoes in (False, True):
+        base = gerar_base(args.linhas, args.colunas_extras, com_exclusoes=com_exclusoes)
+        tamanho_base = base.memory_usage(deep=True).sum()
+
+        print(f"\n📋 Cenário: {'com' if com_exclusoes else 'sem'} categorias excluídas")
+        print(f"📏 Base: {len(base):,} linhas x {base.shape[1]} colunas ({tamanho_base/1024/1024:.1f} MB)")
+
+        pico_seguro, t_seguro = medir(agente, base, inplace=False)
+        pico_inplace, t_inplace = medir(agente, base.copy(), inplace=True)
+
+        print(f"🔒 Modo seguro:  pico {pico_seguro/1024/1024:8.1f} MB | {t_seguro*1000:7.1f} ms")
+        print(f"⚡ Modo inplace: pico {pico_inplace/1024/1024:8.1f} MB | {t_inplace*1000:7.1f} ms")
+        if pico_inplace:
+            print(f"📉 Redução de pico: {pico_seguro/pico_inplace:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de importação dos módulos de entrada do sistema VR/VA.
+
+Executa ``python -X importtime -c "import <modulo>"`` em subprocessos limpos,
+mede o tempo cumulativo de importação de cada módulo e verifica que nenhuma
+dependência pesada (pandas, numpy, langchain, openai, dotenv) é carregada só
+por importar o pacote. Sai com código 1 se o orçamento for estourado, para
+que possa ser usado como gate em CI.
+
+Uso:
+  python3 ai_vr/scripts/benchmark_importtime.py
+  python3 ai_vr/scripts/benchmark_importtime.py --budget-ms 80 --repeticoes 7
+  python3 -m pytest tests/test_importtime.py
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULOS_PADRAO = [
+    "ai_vr.core.processar",
+    "ai_vr.agents",
+    "ai_vr.scripts.generate_vr_planilha",
+]
+
+# Pacotes que não podem ser carregados apenas pela importação dos módulos acima
+DEPENDENCIAS_PESADAS = (
+    "pandas",
+    "numpy",
+    "langchain",
+    "langchain_community",
+    "langchain_openai",
+    "openai",
+    "dotenv",
+    "sqlalchemy",
+)
+
+# Orçamento por módulo (mediana), verificado também em tests/test_importtime.py
+ORCAMENTO_MS = 100.0
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def medir_importacao(modulo):
+    """Importa o módulo em um interpretador novo e retorna (cumulativo_us, pacotes_topo)"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ_PROJETO,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulativo_us = None
+    pacotes = set()
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        partes = [p.strip() for p in linha[len("import time:"):].split("|")]
+        if len(partes) != 3 or not partes[1].isdigit():
+            continue
+        nome = partes[2].strip()
+        pacotes.add(nome.split(".")[0])
+        if nome == modulo:
+            cumulativo_us = int(partes[1])
+
+    if cumulativo_us is None:
+        raise RuntimeError(f"Não foi possível medir a importação de {modulo}")
+    return cumulativo_us, pacotes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de importação (python -X importtime)")
+    parser.add_argument("modulos", nargs="*", default=MODULOS_PADRAO, help="Módulos a medir")
+    parser.add_argument("--budget-ms", type=float, default=ORCAMENTO_MS, help="Orçamento por módulo em ms (mediana)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por módulo")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("⏱️ BENCHMARK DE IMPORTAÇÃO")
+    print("=" * 60)
+
+    falhas = []
+    for modulo in args.modulos:
+        tempos = []
+        pacotes = set()
+        for _ in range(args.repeticoes):
+            cumulativo_us, pacotes = medir_importacao(modulo)
+            tempos.append(cumulativo_us / 1000)
+
+        mediana = statistics.median(tempos)
+        pesados = sorted(p for p in pacotes if p in DEPENDENCIAS_PESADAS)
+        status = "✅" if mediana <= args.budget_ms and not pesados else "❌"
+
+        print(f"{status} {modulo}: mediana {mediana:.1f} ms (min {min(tempos):.1f} / max {max(tempos):.1f})")
+        if pesados:
+            print(f"   dependências pesadas carregadas: {', '.join(pesados)}")
+            falhas.append(f"{modulo} importa {', '.join(pesados)}")
+        if mediana > args.budget_ms:
+            falhas.append(f"{modulo} levou {mediana:.1f} ms (orçamento {args.budget_ms:.1f} ms)")
+
+    print()
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print(f"✅ Todos os módulos dentro do orçamento de {args.budget_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark do carregamento de afastamentos/férias por período: índice R*Tree x varredura.
+
+Cria um banco temporário com o schema do projeto e um histórico sintético de
+vários anos (férias e afastamentos por colaborador) e mede, para um período
+de referência no fim do histórico:
+  - carga antiga: todos os afastamentos + filtro de sobreposição no pandas
+  - varredura: filtro de sobreposição em SQL sem índice
+  - R*Tree: filtro pelos índices rtree_afastamentos / rtree_ferias
+
+Uso:
+  python3 -m ai_vr.scripts.benchmark_intervalos
+  python3 -m ai_vr.scripts.benchmark_intervalos --colaboradores 50000 --anos 10
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from ai_vr.scripts.database_populate import SCHEMA_PATH
+from ai_vr.scripts.generate_vr_planilha import (
+    PeriodoReferencia,
+    carregar_afastamentos,
+    carregar_ferias,
+    periodo_overlap,
+)
+
+TIPOS_AFASTAMENTO = np.array(["Auxílio Doença", "Licença Maternidade", "Atestado"], dtype=object)
+
+
+def _datas(dias_desde_1970):
+    return (np.datetime64("1970-01-01") + dias_desde_1970.astype("timedelta64[D]")).astype(str)
+
+
+def criar_banco(caminho, colaboradores, anos, fim_historico, seed=42):
+    """Popula ferias e afastamentos com ``anos`` de histórico até ``fim_historico``"""
+    rng = np.random.default_rng(seed)
+    dia_fim = (fim_historico - date(1970, 1, 1)).days
+    dia_ini = dia_fim - 365 * anos
+
+    conn = sqlite3.connect(caminho)
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    # Histórico sintético sem colaboradores cadastrados: FKs desligadas
+    conn.execute("PRAGMA foreign_keys = OFF")
+
+    # Férias: uma por colaborador por ano, de 5 a 30 dias
+    n_ferias = colaboradores * anos
+    inicio = rng.integers(dia_ini, dia_fim, n_ferias)
+    fim = inicio + rng.integers(5, 31, n_ferias) - 1
+    conn.executemany(
+        "INSERT INTO ferias (colaborador_id, data_inicio, data_fim, dias_ferias) VALUES (?, ?, ?, ?)",
+        zip(rng.integers(1, colaboradores + 1, n_ferias).tolist(), _datas(inicio).tolist(),
+            _datas(fim).tolist(), (fim - inicio + 1).tolist()),
+    )
+
+    # Afastamentos: ~0,3 por colaborador por ano, 1% ainda em aberto
+    n_afast = int(colaboradores * anos * 0.3)
+    inicio = rng.integers(dia_ini, dia_fim, n_afast)
+    fim = _datas(inicio + rng.integers(1, 120, n_afast)).astype(object)
+    fim[rng.random(n_afast) < 0.01] = None
+    conn.executemany(
+        "INSERT INTO afastamentos (colaborador_id, tipo_afastamento, data_inicio, data_fim) VALUES (?, ?, ?, ?)",
+        zip(rng.integers(1, colaboradores + 1, n_afast).tolist(),
+            TIPOS_AFASTAMENTO[rng.integers(0, len(TIPOS_AFASTAMENTO), n_afast)].tolist(),
+            _datas(inicio).tolist(), fim.tolist()),
+    )
+    conn.commit()
+    return conn, n_ferias, n_afast
+
+
+def carga_antiga(conn, periodo):
+    """Como carregar_bases/montar_base_elegivel faziam: tudo do banco, filtro no pandas"""
+    afast = pd.read_sql_query(
+        "SELECT colaborador_id, tipo_afastamento, data_inicio, data_fim FROM afastamentos", conn
+    )
+    afast["data_inicio"] = pd.to_datetime(afast["data_inicio"]).dt.date
+    afast["data_fim"] = pd.to_datetime(afast["data_fim"]).dt.date
+    overlap = afast.apply(
+        lambda r: periodo_overlap(periodo.inicio, periodo.fim, r["data_inicio"], r["data_fim"]), axis=1
+    )
+    return afast[overlap]
+
+
+def medir(funcao, repeticoes):
+    """Mediana em ms de ``repeticoes`` execuções e o último resultado"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), resultado
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark do índice de intervalos (R*Tree)")
+    parser.add_argument("--colaboradores", type=int, default=20_000, help="Colaboradores sintéticos")
+    parser.add_argument("--anos", type=int, default=10, help="Anos de histórico")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por medição (mediana)")
+    parser.add_argument("--sem-carga-antiga", action="store_true",
+                        help="Não mede a carga antiga (lenta em históricos grandes)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    periodo = PeriodoReferencia(inicio=date(2025, 4, 15), fim=date(2025, 5, 15))
+
+    print("🗂️  BENCHMARK - ÍNDICE DE INTERVALOS (afastamentos/férias)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        inicio = time.perf_counter()
+        conn, n_ferias, n_afast = criar_banco(
+            os.path.join(pasta, "historico.db"), args.colaboradores, args.anos, periodo.fim
+        )
+        print(f"📏 Histórico: {args.anos} anos | {n_ferias:,} férias | {n_afast:,} afastamentos "
+              f"(gerado em {time.perf_counter() - inicio:.1f}s)")
+        print(f"📅 Período: {periodo.inicio} a {periodo.fim}\n")
+
+        try:
+            casos = []
+            if not args.sem_carga_antiga:
+                casos.append(("Afastamentos - carga antiga (pandas)", lambda: carga_antiga(conn, periodo)))
+            casos += [
+                ("Afastamentos - varredura SQL", lambda: carregar_afastamentos(conn, periodo, usar_indice=False)),
+                ("Afastamentos - R*Tree", lambda: carregar_afastamentos(conn, periodo, usar_indice=True)),
+                ("Férias - varredura SQL", lambda: carregar_ferias(conn, periodo, usar_indice=False)[1]),
+                ("Férias - R*Tree", lambda: carregar_ferias(conn, periodo, usar_indice=True)[1]),
+            ]
+            for nome, funcao in casos:
+                ms, resultado = medir(funcao, args.repeticoes)
+                print(f"⏱️  {nome:<38} {ms:9.1f} ms | {len(resultado):,} linhas")
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do serviço HTTP (ai_vr/core/servico.py).
+
+Abre N clientes concorrentes, cada um com uma conexão keep-alive, que
+repetem as rotas pedidas durante D segundos e mede:
+  - requisições por segundo
+  - latência p50/p95/p99
+  - respostas por status (200, 304 com ETag, 503 com pool esgotado...)
+
+Com --db o serviço é iniciado no próprio processo numa porta livre; sem
+ele, as requisições vão para --url (um serviço já em execução).
+
+Uso:
+  python3 -m ai_vr.scripts.benchmark_servico --db ai_vr/db/vr_database.db --clientes 64 --segundos 10
+  python3 -m ai_vr.scripts.benchmark_servico --url http://127.0.0.1:8765 --etag
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROTAS_PADRAO = [
+    "/estatisticas",
+    "/consultas/resumo_por_sindicato",
+    "/consultas/estatisticas_gerais?sindicato=SINDPD%20SP",
+    "/consultas/colaboradores_elegiveis?limite=50",
+    "/consultas/totais_por_grupo",
+]
+
+
+def cliente(host, porta, rotas, fim, usar_etag, latencias, status, erros):
+    """Repete as rotas até ``fim`` numa conexão keep-alive (reconecta se cair)"""
+    conn = http.client.HTTPConnection(host, porta, timeout=30)
+    etags = {}
+    i = 0
+    while time.perf_counter() < fim:
+        rota = rotas[i % len(rotas)]
+        i += 1
+        cabecalhos = {"If-None-Match": etags[rota]} if usar_etag and rota in etags else {}
+        inicio = time.perf_counter()
+        try:
+            conn.request("GET", rota, headers=cabecalhos)
+            resposta = conn.getresponse()
+            resposta.read()
+        except (OSError, http.client.HTTPException):
+            erros.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection(host, porta, timeout=30)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+        status.append(resposta.status)
+        if resposta.getheader("ETag"):
+            etags[rota] = resposta.getheader("ETag")
+    conn.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço HTTP de VR")
+    alvo = parser.add_mutually_exclusive_group(required=True)
+    alvo.add_argument("--db", help="Inicia o serviço sobre este banco no próprio processo")
+    alvo.add_argument("--url", help="Serviço já em execução (ex.: http://127.0.0.1:8765)")
+    parser.add_argument("--clientes", type=int, default=32, help="Clientes concorrentes")
+    parser.add_argument("--segundos", type=float, default=10, help="Duração do teste")
+    parser.add_argument("--conexoes", type=int, default=8, help="Com --db: conexões no pool")
+    parser.add_argument("--etag", action="store_true", help="Reenvia o último ETag de cada rota (If-None-Match)")
+    parser.add_argument("--rotas", nargs="+", default=ROTAS_PADRAO, help="Rotas requisitadas em rodízio")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("🚦 TESTE DE CARGA - SERVIÇO HTTP VR")
+    print("=" * 60)
+
+    servico = servidor = None
+    if args.db:
+        from ai_vr.core.servico import ServicoVR
+
+        servico = ServicoVR(args.db, args.conexoes)
+        servidor = servico.servidor(porta=0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        host, porta = servidor.server_address[:2]
+        print(f"🌐 Serviço iniciado em http://{host}:{porta} ({args.conexoes} conexões)")
+    else:
+        url = urlsplit(args.url)
+        host, porta = url.hostname, url.port or 80
+
+    latencias, status, erros = [], [], []
+    fim = time.perf_counter() + args.segundos
+    threads = [
+        threading.Thread(target=cliente, args=(host, porta, args.rotas, fim, args.etag, latencias, status, erros))
+        for _ in range(args.clientes)
+    ]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    if servidor is not None:
+        servidor.shutdown()
+        servidor.server_close()
+        servico.close()
+
+    ms = np.array(latencias) * 1000
+    print(f"👥 {args.clientes} clientes | ⏱️ {duracao:.1f}s | 🔁 ETag: {'sim' if args.etag else 'não'}")
+    print(f"📈 {len(latencias):,} requisições | {len(latencias) / duracao:,.0f} req/s | {len(erros)} erro(s) de conexão")
+    if len(ms):
+        print(f"⏳ latência p50 {np.percentile(ms, 50):.1f} ms | p95 {np.percentile(ms, 95):.1f} ms | "
+              f"p99 {np.percentile(ms, 99):.1f} ms")
+    print("📊 Status: " + ", ".join(f"{codigo}: {n:,}" for codigo, n in sorted(Counter(status).items())))
+
+
+if __name__ == "__main__":
+    main()
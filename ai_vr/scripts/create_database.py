@@ -39,7 +39,7 @@ class VRDatabaseManager:
         """Cria o schema do banco de dados"""
         print("📋 Criando schema do banco...")
         
-    with open('ai_vr/db/database_schema.sql', 'r', encoding='utf-8') as f:
+        with open('ai_vr/db/database_schema.sql', 'r', encoding='utf-8') as f:
             schema = f.read()
         
         self.cursor.executescript(schema)
@@ -6,35 +6,952 @@ Script para backup e restore do banco de dados SQLite3 do sistema de VR/VA
 import sqlite3
 import os
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import marshal
+import struct
+import tempfile
+import time
 import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Páginas copiadas por passo do backup online (4 MB com páginas de 4 KB):
+# entre um passo e outro o banco fica livre para leitores e escritores
+BACKUP_PAGES = 1024
+BACKUP_SLEEP = 0.005
+# Reinícios tolerados (modo rollback) antes de copiar o restante num passo só
+BACKUP_MAX_RESTARTS = 5
+
+# Backups incrementais: blocos de páginas endereçados pelo conteúdo
+INCREMENTAL_DIR = "incremental"
+INCREMENTAL_VERSION = 1
+CHUNK_PAGES = 16
+# Nova base (snapshot sem anterior) a cada N dias ou N snapshots: cadeias
+# fechadas deixam de ser dependência e a retenção pode apagar seus packs
+INCREMENTAL_BASE_DAYS = 7
+INCREMENTAL_MAX_CHAIN = 30
+
+# Arquivo compactado em streaming: blocos independentes comprimidos em paralelo
+STREAM_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_CODEC = "gzip"
+
+# Dump lógico: registros marshal (prefixados pelo tamanho) num gzip
+DUMP_VERSION = 1
+DUMP_CHUNK_ROWS = 50_000
+DUMP_LEVEL = 1
+
+# Catálogo dos backups (índice SQLite dentro do diretório de backups)
+CATALOG_NAME = "catalog.db"
+# Nomes dos backups: até o microssegundo, como os IDs dos snapshots incrementais
+BACKUP_TIMESTAMP = "%Y%m%d_%H%M%S_%f"
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY,
+    created TEXT NOT NULL,
+    kind TEXT NOT NULL, -- full, schema, incremental, compressed, logical, pre_restore
+    path TEXT NOT NULL UNIQUE, -- arquivo principal, relativo ao diretório de backups
+    files TEXT NOT NULL, -- JSON {arquivo: [tamanho, sha256]}
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL, -- do arquivo principal
+    content_sha256 TEXT, -- do banco contido (quando conhecido)
+    parent_id INTEGER REFERENCES backups(id)
+);
+CREATE INDEX IF NOT EXISTS idx_backups_kind_created ON backups(kind, created);
+CREATE INDEX IF NOT EXISTS idx_backups_parent ON backups(parent_id);
+CREATE TABLE IF NOT EXISTS verifications (
+    id INTEGER PRIMARY KEY,
+    backup_id INTEGER NOT NULL,
+    verified_at TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    checks TEXT NOT NULL, -- quick_check ou integrity_check
+    detail TEXT,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_verifications_backup ON verifications(backup_id, verified_at);
+"""
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+# Retenção: o último backup de cada dia/semana/mês recente, por tipo
+RETENTION_SQL = """
+SELECT id FROM (
+    SELECT id,
+           ROW_NUMBER() OVER (PARTITION BY kind, date(created) ORDER BY created DESC, id DESC) AS d_rn,
+           DENSE_RANK() OVER (PARTITION BY kind ORDER BY date(created) DESC) AS d_rank,
+           ROW_NUMBER() OVER (PARTITION BY kind, strftime('%Y-%W', created) ORDER BY created DESC, id DESC) AS w_rn,
+           DENSE_RANK() OVER (PARTITION BY kind ORDER BY strftime('%Y-%W', created) DESC) AS w_rank,
+           ROW_NUMBER() OVER (PARTITION BY kind, strftime('%Y-%m', created) ORDER BY created DESC, id DESC) AS m_rn,
+           DENSE_RANK() OVER (PARTITION BY kind ORDER BY strftime('%Y-%m', created) DESC) AS m_rank
+    FROM backups
+)
+WHERE (d_rn = 1 AND d_rank <= :daily)
+   OR (w_rn = 1 AND w_rank <= :weekly)
+   OR (m_rn = 1 AND m_rank <= :monthly)
+"""
+
+
+def online_backup(src_path, dest_path, pages=BACKUP_PAGES, progress=None, sleep=BACKUP_SLEEP,
+                  max_restarts=BACKUP_MAX_RESTARTS):
+    """Snapshot consistente de um banco em uso via API de backup do SQLite.
+
+    A cópia é feita em passos de ``pages`` páginas e inclui o que ainda está
+    no WAL. Em modo WAL a leitura fica presa a um único snapshot: escritores
+    continuam gravando normalmente e a cópia nunca reinicia. Em modo rollback
+    (o padrão do projeto) cada passo segura o lock de leitura só pelo tempo
+    do passo; se um commit cair no meio da cópia o SQLite a reinicia, e após
+    ``max_restarts`` reinícios o restante é copiado num passo único (que
+    bloqueia escritores apenas durante essa cópia).
+
+    ``progress(status, remaining, total)`` é chamado após cada passo. O
+    destino é gravado em um temporário e renomeado só ao final.
+    """
+    if not os.path.exists(src_path):
+        raise FileNotFoundError(f"Banco de dados não encontrado: {src_path}")
+    tmp_path = f"{dest_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    src = sqlite3.connect(src_path, timeout=30)
+    dst = sqlite3.connect(tmp_path)
+    try:
+        wal = src.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        if wal:
+            # Transação de leitura aberta: todos os passos leem o mesmo snapshot
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        restarts = 0
+        last_remaining = None
+
+        def step_progress(status, remaining, total):
+            nonlocal restarts, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > max_restarts:
+                    raise _TooManyRestarts()
+            last_remaining = remaining
+            if progress is not None:
+                progress(status, remaining, total)
+
+        try:
+            src.backup(dst, pages=pages, progress=step_progress, sleep=sleep)
+        except _TooManyRestarts:
+            src.backup(dst, pages=-1, progress=progress)
+        if wal:
+            src.rollback()
+    except BaseException:
+        dst.close()
+        src.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    dst.close()
+    src.close()
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def print_progress(status, remaining, total):
+    """Callback de progresso padrão: percentual de páginas copiadas"""
+    copied = total - remaining
+    end = "\n" if remaining == 0 else ""
+    print(f"\r⏳ Backup online: {copied / max(total, 1):6.1%} ({copied:,}/{total:,} páginas)", end=end, flush=True)
+
+
+def _page_size(db_file):
+    """Tamanho de página lido do cabeçalho do arquivo SQLite (bytes 16-17)"""
+    with open(db_file, 'rb') as f:
+        header = f.read(100)
+    if len(header) < 100 or not header.startswith(b"SQLite format 3\x00"):
+        raise ValueError(f"Arquivo não é um banco SQLite: {db_file}")
+    size = int.from_bytes(header[16:18], "big")
+    return 65536 if size == 1 else size
+
+
+def _chunk_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def manifest_path(snapshot_dir, snapshot_id):
+    return os.path.join(snapshot_dir, f"{snapshot_id}.manifest.json")
+
+
+def pack_path(snapshot_dir, snapshot_id):
+    return os.path.join(snapshot_dir, f"{snapshot_id}.pack")
+
+
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("version") != INCREMENTAL_VERSION:
+        raise ValueError(f"Versão de manifesto não suportada: {path}")
+    return manifest
+
+
+def list_snapshots(snapshot_dir):
+    """IDs dos snapshots incrementais em ordem cronológica"""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(f[:-len(".manifest.json")] for f in os.listdir(snapshot_dir) if f.endswith(".manifest.json"))
+
+
+def manifest_chain(snapshot_dir, snapshot_id):
+    """Manifestos de ``snapshot_id`` até a raiz da cadeia (o próprio snapshot primeiro)"""
+    chain = []
+    while snapshot_id is not None:
+        manifest = load_manifest(manifest_path(snapshot_dir, snapshot_id))
+        chain.append(manifest)
+        snapshot_id = manifest["parent"]
+    return chain
+
+
+def _object_locations(chain):
+    """digest -> (snapshot com o pack, offset, tamanho) para todos os blocos da cadeia"""
+    locations = {}
+    for manifest in reversed(chain):
+        for digest, (offset, length) in manifest["objects"].items():
+            locations.setdefault(digest, (manifest["id"], offset, length))
+    return locations
+
+
+def create_incremental_snapshot(db_path, snapshot_dir, chunk_pages=CHUNK_PAGES, pages=BACKUP_PAGES,
+                                progress=None, base_days=INCREMENTAL_BASE_DAYS, max_chain=INCREMENTAL_MAX_CHAIN):
+    """Snapshot incremental: grava só os blocos de páginas que a cadeia ainda não tem.
+
+    O banco é copiado de forma consistente (``online_backup``) para um
+    temporário, lido em blocos de ``chunk_pages`` páginas e cada bloco é
+    endereçado pelo seu hash (BLAKE2b). Blocos inéditos vão para o pack do
+    snapshot (``<id>.pack``); o manifesto (``<id>.manifest.json``) lista o
+    digest de cada bloco, na ordem do arquivo, e aponta o snapshot anterior.
+    O diretório cresce com o volume de páginas alteradas, não com o tamanho
+    do banco vezes o número de backups.
+
+    Quando a base da cadeia atual tem ``base_days`` dias ou mais, ou a cadeia
+    já tem ``max_chain`` snapshots, o snapshot começa uma nova base (sem
+    anterior, com todos os blocos no próprio pack). Assim nenhum snapshot
+    depende de todos os anteriores e a retenção consegue apagar cadeias
+    antigas.
+
+    Retorna o manifesto gravado.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    snapshot_id = datetime.now().strftime(BACKUP_TIMESTAMP)
+    existing = list_snapshots(snapshot_dir)
+    chain = manifest_chain(snapshot_dir, existing[-1]) if existing else []
+    if chain and (len(chain) >= max_chain
+                  or datetime.now() - datetime.fromisoformat(chain[-1]["created"]) >= timedelta(days=base_days)):
+        chain = []
+    parent = chain[0]["id"] if chain else None
+    known = _object_locations(chain)
+
+    snapshot_file = os.path.join(snapshot_dir, f"{snapshot_id}.snapshot.db")
+    pack_file = pack_path(snapshot_dir, snapshot_id)
+    try:
+        online_backup(db_path, snapshot_file, pages=pages, progress=progress)
+        page_size = _page_size(snapshot_file)
+        chunk_size = page_size * chunk_pages
+
+        chunks, objects = [], {}
+        file_hash = hashlib.sha256()
+        offset = 0
+        with open(snapshot_file, 'rb') as src, open(pack_file + ".tmp", 'wb') as pack:
+            for data in iter(lambda: src.read(chunk_size), b""):
+                file_hash.update(data)
+                digest = _chunk_digest(data)
+                chunks.append(digest)
+                if digest not in known and digest not in objects:
+                    pack.write(data)
+                    objects[digest] = [offset, len(data)]
+                    offset += len(data)
+        size = os.path.getsize(snapshot_file)
+    except BaseException:
+        for leftover in (pack_file + ".tmp", snapshot_file):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+    os.remove(snapshot_file)
+
+    manifest = {
+        "version": INCREMENTAL_VERSION,
+        "id": snapshot_id,
+        "parent": parent,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "db_path": db_path,
+        "page_size": page_size,
+        "chunk_size": chunk_size,
+        "size": size,
+        "sha256": file_hash.hexdigest(),
+        "new_bytes": offset,
+        "chunks": chunks,
+        "objects": objects,
+    }
+    os.replace(pack_file + ".tmp", pack_file)
+    # O manifesto é gravado por último: é ele que torna o snapshot visível
+    target = manifest_path(snapshot_dir, snapshot_id)
+    with open(target + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(target + ".tmp", target)
+    return manifest
+
+
+def restore_incremental_snapshot(snapshot_dir, snapshot_id, dest_path):
+    """Reconstrói o banco de ``snapshot_id`` em ``dest_path`` a partir da cadeia de packs.
+
+    Confere o SHA-256 do arquivo reconstruído antes de gravá-lo no destino.
+    """
+    chain = manifest_chain(snapshot_dir, snapshot_id)
+    manifest = chain[0]
+    locations = _object_locations(chain)
+
+    packs = {}
+    file_hash = hashlib.sha256()
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as out:
+            for digest in manifest["chunks"]:
+                if digest not in locations:
+                    raise ValueError(f"Snapshot {snapshot_id} incompleto: bloco {digest} ausente da cadeia")
+                pack_id, offset, length = locations[digest]
+                if pack_id not in packs:
+                    packs[pack_id] = open(pack_path(snapshot_dir, pack_id), 'rb')
+                pack = packs[pack_id]
+                pack.seek(offset)
+                data = pack.read(length)
+                file_hash.update(data)
+                out.write(data)
+    finally:
+        for pack in packs.values():
+            pack.close()
+    if file_hash.hexdigest() != manifest["sha256"]:
+        os.remove(tmp_path)
+        raise ValueError(f"Snapshot {snapshot_id} corrompido: SHA-256 não confere")
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("Codec zstd requer o pacote 'zstandard' (pip install zstandard)") from e
+    return zstandard
+
+
+# codec -> (extensão, nível padrão, compressão de um bloco, abertura para leitura em streaming).
+# Cada bloco vira um membro/quadro completo; membros concatenados formam um
+# arquivo válido para gzip, bzip2, xz e zstd.
+CODECS = {
+    "gzip": (".gz", 6, lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), gzip.open),
+    "bz2": (".bz2", 9, lambda data, level: bz2.compress(data, compresslevel=level), bz2.open),
+    "xz": (".xz", 6, lambda data, level: lzma.compress(data, preset=level), lzma.open),
+    "zstd": (
+        ".zst", 3,
+        lambda data, level: _zstd().ZstdCompressor(level=level).compress(data),
+        lambda path, mode: _zstd().ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True),
+    ),
+}
+
+
+def codec_for_path(path):
+    """Codec de um arquivo de backup pela extensão (None se não for um arquivo compactado)"""
+    for codec, (extension, *_) in CODECS.items():
+        if path.endswith(f".db{extension}"):
+            return codec
+    return None
+
+
+def iter_snapshot(db_path, block_size=STREAM_CHUNK_SIZE):
+    """Lê o banco uma única vez, como snapshot consistente, em blocos de ``block_size``.
+
+    Uma transação de leitura fica aberta durante toda a leitura. As páginas
+    vêm, na ordem de preferência, de ``sqlite_dbpage`` (quando o SQLite foi
+    compilado com ele), do próprio arquivo (modo rollback: o lock de leitura
+    impede commits até o fim) ou de ``Connection.serialize()`` (modo WAL sem
+    ``sqlite_dbpage``, com o banco inteiro em memória).
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Banco de dados não encontrado: {db_path}")
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        wal = conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        conn.execute("BEGIN")
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        pages_per_block = max(block_size // page_size, 1)
+
+        try:
+            cursor = conn.execute("SELECT data FROM sqlite_dbpage ORDER BY pgno")
+        except sqlite3.OperationalError:
+            cursor = None
+        if cursor is not None:
+            while True:
+                rows = cursor.fetchmany(pages_per_block)
+                if not rows:
+                    break
+                yield b"".join(row[0] for row in rows)
+        elif not wal:
+            remaining = page_count * page_size
+            with open(db_path, 'rb') as f:
+                while remaining > 0:
+                    data = f.read(min(pages_per_block * page_size, remaining))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    yield data
+        else:
+            data = memoryview(conn.serialize())
+            for start in range(0, len(data), pages_per_block * page_size):
+                yield bytes(data[start:start + pages_per_block * page_size])
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def stream_backup(db_path, archive_path, codec=DEFAULT_CODEC, level=None, workers=None,
+                  chunk_size=STREAM_CHUNK_SIZE):
+    """Grava um arquivo compactado do banco sem cópia intermediária em disco.
+
+    O snapshot é lido uma vez (``iter_snapshot``) e cada bloco de
+    ``chunk_size`` bytes é comprimido num pool de ``workers`` threads (zlib,
+    bz2, lzma e zstd liberam o GIL); os blocos são gravados na ordem, com no
+    máximo ``2 * workers`` em memória. Retorna um resumo com tamanhos,
+    SHA-256 do conteúdo descompactado e tempo.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Codec inválido: {codec!r} (use {', '.join(CODECS)})")
+    _, default_level, compress, _ = CODECS[codec]
+    level = default_level if level is None else level
+    workers = workers or os.cpu_count() or 1
+
+    started = datetime.now()
+    content_hash = hashlib.sha256()
+    archive_hash = hashlib.sha256()
+    size = compressed = 0
+    tmp_path = f"{archive_path}.tmp"
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool, open(tmp_path, 'wb') as out:
+            pending = deque()
+            for block in iter_snapshot(db_path, chunk_size):
+                content_hash.update(block)
+                size += len(block)
+                pending.append(pool.submit(compress, block, level))
+                if len(pending) >= 2 * workers:
+                    data = pending.popleft().result()
+                    archive_hash.update(data)
+                    compressed += out.write(data)
+            while pending:
+                data = pending.popleft().result()
+                archive_hash.update(data)
+                compressed += out.write(data)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, archive_path)
+    return {
+        "archive": archive_path,
+        "codec": codec,
+        "level": level,
+        "size": size,
+        "compressed_size": compressed,
+        "sha256": content_hash.hexdigest(),
+        "archive_sha256": archive_hash.hexdigest(),
+        "seconds": (datetime.now() - started).total_seconds(),
+    }
+
+
+def extract_archive(archive_path, dest_path):
+    """Descompacta (em streaming) um arquivo de ``stream_backup`` para ``dest_path``"""
+    codec = codec_for_path(archive_path)
+    if codec is None:
+        raise ValueError(f"Extensão de arquivo compactado não reconhecida: {archive_path}")
+    open_archive = CODECS[codec][3]
+    tmp_path = f"{dest_path}.tmp"
+    with open_archive(archive_path, 'rb') as src, open(tmp_path, 'wb') as out:
+        shutil.copyfileobj(src, out, STREAM_CHUNK_SIZE)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def schema_objects(conn):
+    """Objetos do schema lidos de ``sqlite_master``, em ordem de criação.
+
+    Retorna (tabelas, posteriores, tabelas_com_dados): CREATE TABLE/VIRTUAL
+    TABLE; índices, views e triggers (criados depois dos dados, para que os
+    índices sejam montados uma vez só e os triggers não disparem na carga);
+    e os nomes das tabelas cujas linhas entram no dump. Tabelas internas do
+    SQLite e tabelas-sombra de tabelas virtuais (ex.: ``rtree_ferias_node``)
+    ficam de fora: são recriadas pelo próprio CREATE VIRTUAL TABLE.
+    """
+    rows = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL ORDER BY rowid"
+    ).fetchall()
+    try:
+        shadows = {name for schema, name, kind, *_ in conn.execute("PRAGMA table_list")
+                   if schema == 'main' and kind == 'shadow'}
+    except sqlite3.OperationalError:
+        # SQLite < 3.37: tabelas-sombra pelo prefixo da tabela virtual
+        virtual = [name for kind, name, sql in rows
+                   if kind == 'table' and sql.upper().startswith('CREATE VIRTUAL TABLE')]
+        shadows = {name for _, name, _ in rows if any(name.startswith(f"{v}_") for v in virtual)}
+
+    def shadow(name):
+        return name in shadows
+
+    tables, later, data_tables = [], [], []
+    for kind, name, sql in rows:
+        if name.startswith('sqlite_') or shadow(name):
+            continue
+        if kind == 'table':
+            tables.append(sql)
+            data_tables.append(name)
+        else:
+            later.append(sql)
+    return tables, later, data_tables
+
+
+def _write_record(f, record):
+    payload = marshal.dumps(record, 4)
+    f.write(struct.pack('<I', len(payload)))
+    f.write(payload)
+
+
+def _read_records(f):
+    while True:
+        size = f.read(4)
+        if not size:
+            return
+        yield marshal.loads(f.read(struct.unpack('<I', size)[0]))
+
+
+def logical_dump(db_path, dump_path, chunk_rows=DUMP_CHUNK_ROWS, level=DUMP_LEVEL):
+    """Dump lógico rápido: schema + linhas de cada tabela em blocos, num arquivo gzip.
+
+    Lido numa única transação (snapshot consistente). Cada bloco é a saída de
+    ``fetchmany(chunk_rows)`` serializada com ``marshal`` (inteiros, reais,
+    textos, blobs e NULL), sem gerar nem interpretar SQL por linha. Retorna a
+    contagem de linhas por tabela.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Banco de dados não encontrado: {db_path}")
+    conn = sqlite3.connect(db_path, timeout=30)
+    tmp_path = f"{dump_path}.tmp"
+    counts = {}
+    try:
+        conn.execute("BEGIN")
+        tables, later, data_tables = schema_objects(conn)
+        has_sequence = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'"
+        ).fetchone() is not None
+        with gzip.open(tmp_path, 'wb', compresslevel=level) as f:
+            _write_record(f, ("header", {
+                "version": DUMP_VERSION,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "source": db_path,
+                "user_version": conn.execute("PRAGMA user_version").fetchone()[0],
+            }))
+            _write_record(f, ("schema", tables))
+            for table in data_tables + (['sqlite_sequence'] if has_sequence else []):
+                cursor = conn.execute(f"SELECT * FROM {_quote(table)}")
+                columns = [d[0] for d in cursor.description]
+                _write_record(f, ("table", table, columns))
+                counts[table] = 0
+                while True:
+                    rows = cursor.fetchmany(chunk_rows)
+                    if not rows:
+                        break
+                    counts[table] += len(rows)
+                    _write_record(f, ("rows", rows))
+            _write_record(f, ("later", later))
+            _write_record(f, ("end", counts))
+        conn.rollback()
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        conn.close()
+    os.replace(tmp_path, dump_path)
+    return counts
+
+
+def logical_restore(dump_path, dest_path):
+    """Recria em ``dest_path`` o banco de um ``logical_dump``, numa única transação.
+
+    Tabelas primeiro, depois ``executemany`` por bloco, e só então índices,
+    views e triggers. O banco é montado num temporário (sem journal) e só
+    substitui o destino quando completo; confere as contagens de linhas.
+    """
+    tmp_path = f"{dest_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+        counts, insert, table, expected = {}, None, None, None
+        with gzip.open(dump_path, 'rb') as f:
+            for record in _read_records(f):
+                kind = record[0]
+                if kind == "header":
+                    if record[1].get("version") != DUMP_VERSION:
+                        raise ValueError(f"Versão de dump não suportada: {dump_path}")
+                    conn.execute(f"PRAGMA user_version = {int(record[1]['user_version'])}")
+                elif kind == "schema":
+                    for sql in record[1]:
+                        conn.execute(sql)
+                elif kind == "table":
+                    _, table, columns = record
+                    counts[table] = 0
+                    if table == 'sqlite_sequence':
+                        # Os INSERTs com id explícito já alimentaram a sequência
+                        conn.execute("DELETE FROM sqlite_sequence")
+                    insert = (f"INSERT INTO {_quote(table)} ({', '.join(map(_quote, columns))}) "
+                              f"VALUES ({', '.join('?' * len(columns))})")
+                elif kind == "rows":
+                    conn.executemany(insert, record[1])
+                    counts[table] += len(record[1])
+                elif kind == "later":
+                    for sql in record[1]:
+                        conn.execute(sql)
+                elif kind == "end":
+                    expected = record[1]
+        if expected is None:
+            raise ValueError(f"Dump incompleto (sem registro final): {dump_path}")
+        if counts != expected:
+            raise ValueError(f"Dump inconsistente: linhas restauradas {counts} != esperadas {expected}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    conn.close()
+    os.replace(tmp_path, dest_path)
+    return counts
+
+
+def hash_file(path, block=STREAM_CHUNK_SIZE):
+    """SHA-256 de um arquivo, lido em blocos"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(block), b""):
+            h.update(data)
+    return h.hexdigest()
+
+
+class BackupCatalog:
+    """Índice dos backups em SQLite: data, tipo, arquivos, tamanhos, checksums e snapshot anterior.
+
+    Cada backup é registrado numa única transação depois que seus arquivos
+    estão completos; listagem, retenção e verificação consultam o índice em
+    vez de listar o diretório e ler datas de modificação. Caminhos são
+    relativos ao diretório de backups.
+    """
+
+    def __init__(self, backup_dir):
+        self.backup_dir = backup_dir
+        self.path = os.path.join(backup_dir, CATALOG_NAME)
+        os.makedirs(backup_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(CATALOG_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _relative(self, path):
+        return os.path.relpath(path, self.backup_dir)
+
+    def absolute(self, path):
+        return os.path.join(self.backup_dir, path)
+
+    def register(self, kind, main_file, extra_files=(), checksums=None, content_sha256=None,
+                 parent_path=None, created=None):
+        """Registra um backup já gravado; ``checksums`` evita reler arquivos já hasheados"""
+        checksums = checksums or {}
+        files = {}
+        for path in (main_file, *extra_files):
+            files[self._relative(path)] = [os.path.getsize(path), checksums.get(path) or hash_file(path)]
+        main = self._relative(main_file)
+        with self.conn:
+            parent = None
+            if parent_path is not None:
+                row = self.conn.execute("SELECT id FROM backups WHERE path = ?", (self._relative(parent_path),)).fetchone()
+                parent = row["id"] if row else None
+            cursor = self.conn.execute(
+                """
+                INSERT INTO backups (created, kind, path, files, size, sha256, content_sha256, parent_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (created or datetime.now().isoformat(timespec="seconds"), kind, main, json.dumps(files),
+                 sum(size for size, _ in files.values()), files[main][1], content_sha256, parent),
+            )
+        return cursor.lastrowid
+
+    def ensure_new(self, *paths):
+        """Recusa caminhos que já existem no disco ou no catálogo: um backup nunca sobrescreve outro"""
+        for path in paths:
+            if os.path.exists(path) or self.find(path) is not None:
+                raise FileExistsError(f"Backup já existe: {path}")
+
+    def entries(self, kind=None):
+        """Backups do catálogo, do mais recente para o mais antigo"""
+        return self.conn.execute(
+            "SELECT * FROM backups WHERE (:kind IS NULL OR kind = :kind) ORDER BY created DESC, id DESC",
+            {"kind": kind},
+        ).fetchall()
+
+    def find(self, path):
+        return self.conn.execute(
+            "SELECT * FROM backups WHERE path = ?", (self._relative(path),)
+        ).fetchone()
+
+    def _with_ancestors(self, keep_sql, params):
+        """IDs selecionados por ``keep_sql`` mais os snapshots de que eles dependem"""
+        return {row[0] for row in self.conn.execute(
+            f"""
+            WITH RECURSIVE keep(id) AS (
+                {keep_sql}
+                UNION
+                SELECT b.parent_id FROM backups b JOIN keep k ON b.id = k.id WHERE b.parent_id IS NOT NULL
+            )
+            SELECT id FROM keep
+            """,
+            params,
+        )}
+
+    def retention_plan(self, daily=7, weekly=4, monthly=12):
+        """Backups fora da política: mantém, por tipo, o mais recente de cada um
+        dos ``daily`` últimos dias, ``weekly`` últimas semanas e ``monthly``
+        últimos meses com backup (e os snapshots anteriores dos quais um
+        snapshot mantido depende). Tudo em SQL sobre o índice; o disco só é
+        tocado para remover o que sai.
+        """
+        keep = self._with_ancestors(RETENTION_SQL, {"daily": daily, "weekly": weekly, "monthly": monthly})
+        return [row for row in self.entries() if row["id"] not in keep]
+
+    def retention_pinned(self, daily=7, weekly=4, monthly=12):
+        """Backups fora da política mantidos só porque um snapshot mantido depende deles"""
+        params = {"daily": daily, "weekly": weekly, "monthly": monthly}
+        selected = {row[0] for row in self.conn.execute(RETENTION_SQL, params)}
+        pinned = self._with_ancestors(RETENTION_SQL, params) - selected
+        return [row for row in self.entries() if row["id"] in pinned]
+
+    def older_than(self, cutoff):
+        """Backups criados antes de ``cutoff`` dos quais nenhum backup mais novo depende"""
+        keep = self._with_ancestors("SELECT id FROM backups WHERE created >= :cutoff",
+                                    {"cutoff": cutoff.isoformat(timespec="seconds")})
+        return [row for row in self.entries() if row["id"] not in keep]
+
+    def verification_queue(self):
+        """Backups na ordem de verificação: nunca verificados primeiro, depois os verificados há mais tempo"""
+        return self.conn.execute(
+            """
+            SELECT b.*, MAX(v.verified_at) AS last_verified
+            FROM backups b
+            LEFT JOIN verifications v ON v.backup_id = b.id
+            GROUP BY b.id
+            ORDER BY last_verified IS NOT NULL, last_verified, b.created DESC
+            """
+        ).fetchall()
+
+    def record_verification(self, result):
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO verifications (backup_id, verified_at, ok, checks, detail, seconds)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (result["id"], datetime.now().isoformat(timespec="seconds"), int(result["ok"]), result["checks"],
+                 "; ".join(result["errors"]) or None, result["seconds"]),
+            )
+
+    def remove(self, rows):
+        """Apaga os arquivos e as entradas dos backups; retorna os caminhos removidos"""
+        removed = []
+        for row in rows:
+            for path in json.loads(row["files"]):
+                file_path = self.absolute(path)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            removed.append(row["path"])
+        with self.conn:
+            # filhos antes dos pais (parent_id referencia backups)
+            ids = [(row["id"],) for row in sorted(rows, key=lambda r: r["created"], reverse=True)]
+            self.conn.executemany("DELETE FROM verifications WHERE backup_id = ?", ids)
+            self.conn.executemany("DELETE FROM backups WHERE id = ?", ids)
+        return removed
+
+
+def check_database(db_file, checks="quick_check"):
+    """Roda ``PRAGMA quick_check``/``integrity_check``; retorna a lista de problemas (vazia se ok)"""
+    if checks not in ("quick_check", "integrity_check"):
+        raise ValueError(f"Verificação inválida: {checks!r}")
+    conn = sqlite3.connect(db_file)
+    try:
+        problems = [row[0] for row in conn.execute(f"PRAGMA {checks}")]
+    finally:
+        conn.close()
+    return [] if problems == ["ok"] else problems
+
+
+def verify_backup(entry, backup_dir, checks="quick_check"):
+    """Verifica um backup do catálogo (``entry`` como dict); roda em processo separado.
+
+    1. tamanho e SHA-256 de cada arquivo conferem com o catálogo;
+    2. o banco é materializado numa cópia temporária conforme o tipo
+       (descompactado, reconstruído da cadeia incremental, recriado do dump
+       lógico ou do schema) e conferido contra o SHA-256 do conteúdo quando
+       conhecido;
+    3. ``PRAGMA quick_check`` (ou ``integrity_check``) na cópia.
+    """
+    started = time.perf_counter()
+    errors = []
+    processed = 0
+    for path, (size, sha256) in json.loads(entry["files"]).items():
+        file_path = os.path.join(backup_dir, path)
+        if not os.path.exists(file_path):
+            errors.append(f"arquivo ausente: {path}")
+            continue
+        processed += os.path.getsize(file_path)
+        if os.path.getsize(file_path) != size:
+            errors.append(f"tamanho divergente: {path}")
+        elif hash_file(file_path) != sha256:
+            errors.append(f"checksum divergente: {path}")
+
+    if not errors:
+        main_file = os.path.join(backup_dir, entry["path"])
+        with tempfile.TemporaryDirectory(dir=backup_dir) as tmp:
+            restored = os.path.join(tmp, "verify.db")
+            try:
+                kind = entry["kind"]
+                if kind in ("full", "pre_restore"):
+                    shutil.copyfile(main_file, restored)
+                elif kind == "compressed":
+                    extract_archive(main_file, restored)
+                elif kind == "incremental":
+                    snapshot_id = os.path.basename(main_file)[:-len(".manifest.json")]
+                    restore_incremental_snapshot(os.path.dirname(main_file), snapshot_id, restored)
+                elif kind == "logical":
+                    logical_restore(main_file, restored)
+                elif kind == "schema":
+                    conn = sqlite3.connect(restored)
+                    with open(main_file, 'r', encoding='utf-8') as f:
+                        conn.executescript(f.read())
+                    conn.close()
+                if entry.get("content_sha256") and hash_file(restored) != entry["content_sha256"]:
+                    errors.append("conteúdo restaurado não confere com o SHA-256 do catálogo")
+                else:
+                    errors += check_database(restored, checks)
+            except (ValueError, OSError, EOFError, lzma.LZMAError, sqlite3.Error) as e:
+                errors.append(f"falha ao restaurar: {e}")
+
+    return {
+        "id": entry["id"],
+        "path": entry["path"],
+        "kind": entry["kind"],
+        "ok": not errors,
+        "errors": errors,
+        "checks": checks,
+        "bytes": processed,
+        "seconds": time.perf_counter() - started,
+    }
+
 
 class VRDatabaseBackup:
     def __init__(self, db_path="ai_vr/db/vr_database.db"):
         """Inicializa o sistema de backup"""
         self.db_path = db_path
         self.backup_dir = "backups"
+        self.incremental_dir = os.path.join(self.backup_dir, INCREMENTAL_DIR)
         
         # Criar diretório de backup se não existir
         if not os.path.exists(self.backup_dir):
             os.makedirs(self.backup_dir)
+        self.catalog = BackupCatalog(self.backup_dir)
             
-    def create_backup(self, include_data=True):
-        """Cria backup do banco de dados"""
+    def create_backup(self, include_data=True, online=True, pages=BACKUP_PAGES, progress=print_progress,
+                      incremental=False, codec=None, level=None, workers=None, logical=False,
+                      base_days=INCREMENTAL_BASE_DAYS):
+        """Cria backup do banco de dados
+
+        Por padrão usa o backup online (``online_backup``), seguro com o banco
+        em uso; ``online=False`` mantém a cópia direta do arquivo, que só é
+        consistente com o banco parado. ``incremental=True`` grava um snapshot
+        incremental (ver ``create_incremental_snapshot``) no lugar do .db + ZIP;
+        ``base_days`` é a idade da base a partir da qual o snapshot começa uma
+        cadeia nova. Com ``codec`` é gravado um único arquivo compactado em streaming
+        (ver ``stream_backup``); ``logical=True`` grava um dump lógico
+        (ver ``logical_dump``).
+        """
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Banco de dados não encontrado: {self.db_path}")
+
+        if incremental and include_data:
+            manifest = create_incremental_snapshot(self.db_path, self.incremental_dir, pages=pages, progress=progress,
+                                                   base_days=base_days)
+            novos = len(manifest["objects"])
+            print(f"✅ Snapshot incremental criado: {manifest['id']} (anterior: {manifest['parent'] or 'nenhum, nova base'})")
+            print(f"   🧩 {novos:,}/{len(manifest['chunks']):,} blocos novos | "
+                  f"{manifest['new_bytes']:,} de {manifest['size']:,} bytes gravados")
+            snapshot_manifest = manifest_path(self.incremental_dir, manifest["id"])
+            parent = manifest_path(self.incremental_dir, manifest["parent"]) if manifest["parent"] else None
+            self.catalog.register("incremental", snapshot_manifest, [pack_path(self.incremental_dir, manifest["id"])],
+                                  content_sha256=manifest["sha256"], parent_path=parent)
+            return snapshot_manifest
+
+        if codec and include_data:
+            timestamp = datetime.now().strftime(BACKUP_TIMESTAMP)
+            archive = os.path.join(self.backup_dir, f"vr_database_backup_{timestamp}.db{CODECS[codec][0]}")
+            self.catalog.ensure_new(archive)
+            print(f"💾 Criando backup compactado ({codec}): {os.path.basename(archive)}")
+            info = stream_backup(self.db_path, archive, codec=codec, level=level, workers=workers)
+            print(f"✅ {info['size']:,} -> {info['compressed_size']:,} bytes "
+                  f"({info['compressed_size'] / max(info['size'], 1):.1%}) em {info['seconds']:.1f}s")
+            self.catalog.register("compressed", archive, checksums={archive: info["archive_sha256"]},
+                                  content_sha256=info["sha256"])
+            return archive
+
+        if logical and include_data:
+            timestamp = datetime.now().strftime(BACKUP_TIMESTAMP)
+            dump_file = os.path.join(self.backup_dir, f"vr_database_backup_{timestamp}.dump")
+            self.catalog.ensure_new(dump_file)
+            print(f"💾 Criando dump lógico: {os.path.basename(dump_file)}")
+            counts = logical_dump(self.db_path, dump_file)
+            print(f"✅ {sum(counts.values()):,} linhas de {len(counts)} tabelas | {os.path.getsize(dump_file):,} bytes")
+            self.catalog.register("logical", dump_file)
+            return dump_file
             
         # Nome do arquivo de backup com timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now().strftime(BACKUP_TIMESTAMP)
         backup_name = f"vr_database_backup_{timestamp}"
         backup_path = os.path.join(self.backup_dir, backup_name)
+        self.catalog.ensure_new(f"{backup_path}.db" if include_data else f"{backup_path}.sql", f"{backup_path}.zip")
         
         print(f"💾 Criando backup: {backup_name}")
         
         if include_data:
-            # Backup completo (cópia do arquivo)
+            # Backup completo (snapshot online ou cópia do arquivo)
             backup_file = f"{backup_path}.db"
-            shutil.copy2(self.db_path, backup_file)
+            if online:
+                online_backup(self.db_path, backup_file, pages=pages, progress=progress)
+            else:
+                shutil.copy2(self.db_path, backup_file)
             print(f"✅ Backup completo criado: {backup_file}")
         else:
             # Backup apenas do schema (SQL)
@@ -45,12 +962,17 @@ class VRDatabaseBackup:
         # Criar arquivo ZIP com informações adicionais
         zip_file = f"{backup_path}.zip"
         self._create_backup_zip(backup_file, zip_file, timestamp)
+        self.catalog.register("full" if include_data else "schema", backup_file, [zip_file])
         
         return backup_file
         
     def _backup_schema(self, backup_file):
-        """Cria backup apenas do schema SQL"""
+        """Cria backup apenas do schema SQL (lido de sqlite_master, sem dados)"""
         conn = sqlite3.connect(self.db_path)
+        try:
+            tables, later, _ = schema_objects(conn)
+        finally:
+            conn.close()
         
         with open(backup_file, 'w', encoding='utf-8') as f:
             # Escrever informações do backup
@@ -59,10 +981,10 @@ class VRDatabaseBackup:
             f.write(f"-- Arquivo original: {self.db_path}\n\n")
             
             # Escrever schema
-            for line in conn.iterdump():
-                f.write(f"{line}\n")
-                
-        conn.close()
+            f.write("BEGIN TRANSACTION;\n")
+            for sql in tables + later:
+                f.write(f"{sql};\n")
+            f.write("COMMIT;\n")
         
     def _create_backup_zip(self, backup_file, zip_file, timestamp):
         """Cria arquivo ZIP com backup e informações"""
@@ -90,40 +1012,28 @@ python3 database_backup.py --restore <arquivo_backup>
             
         print(f"📦 Arquivo ZIP criado: {zip_file}")
         
-    def list_backups(self):
-        """Lista todos os backups disponíveis"""
+    def list_backups(self, kind=None):
+        """Lista os backups registrados no catálogo"""
         print("📋 BACKUPS DISPONÍVEIS")
         print("=" * 50)
         
-        if not os.path.exists(self.backup_dir):
-            print("Nenhum backup encontrado.")
-            return []
-            
-        backups = []
-        for file in os.listdir(self.backup_dir):
-            if file.endswith('.zip'):
-                file_path = os.path.join(self.backup_dir, file)
-                file_size = os.path.getsize(file_path)
-                mod_time = os.path.getmtime(file_path)
-                mod_date = datetime.fromtimestamp(mod_time)
-                
-                backups.append({
-                    'file': file,
-                    'path': file_path,
-                    'size': file_size,
-                    'date': mod_date
-                })
-                
-        # Ordenar por data (mais recente primeiro)
-        backups.sort(key=lambda x: x['date'], reverse=True)
+        backups = [{
+            'file': row['path'],
+            'path': self.catalog.absolute(row['path']),
+            'size': row['size'],
+            'date': datetime.fromisoformat(row['created']),
+            'kind': row['kind'],
+            'sha256': row['sha256'],
+        } for row in self.catalog.entries(kind)]
         
         if not backups:
             print("Nenhum backup encontrado.")
         else:
             for i, backup in enumerate(backups, 1):
-                print(f"{i}. {backup['file']}")
+                print(f"{i}. {backup['file']} [{backup['kind']}]")
                 print(f"   📅 {backup['date'].strftime('%d/%m/%Y %H:%M:%S')}")
                 print(f"   📏 {backup['size']:,} bytes ({backup['size']/1024/1024:.2f} MB)")
+                print(f"   🔑 {backup['sha256'][:16]}")
                 print()
                 
         return backups
@@ -135,6 +1045,55 @@ python3 database_backup.py --restore <arquivo_backup>
             
         print(f"🔄 Restaurando backup: {backup_file}")
         
+        # Backup catalogado: conferir tamanhos e checksums antes de qualquer coisa
+        entry = self.catalog.find(backup_file)
+        if entry is not None:
+            for path, (size, sha256) in json.loads(entry["files"]).items():
+                file_path = self.catalog.absolute(path)
+                if not os.path.exists(file_path) or os.path.getsize(file_path) != size or hash_file(file_path) != sha256:
+                    raise ValueError(f"Backup corrompido: {path} não confere com o catálogo")
+            print("🔑 Checksums conferidos com o catálogo")
+        
+        # Arquivos reconstruídos para o restore: nomes únicos, sempre apagados ao final
+        scratch = []
+        try:
+            self._restore(backup_file, scratch)
+        finally:
+            for path in scratch:
+                for leftover in (path, f"{path}.tmp"):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            
+        print(f"✅ Backup restaurado com sucesso!")
+        
+    def _scratch_file(self, scratch, name, suffix=".restore.db"):
+        """Arquivo temporário único em ``backup_dir`` (registrado em ``scratch`` para ser apagado)"""
+        fd, path = tempfile.mkstemp(prefix=f"{name}.", suffix=suffix, dir=self.backup_dir)
+        os.close(fd)
+        scratch.append(path)
+        return path
+
+    def _restore(self, backup_file, scratch):
+        """Corpo de ``restore_backup``: reconstrói, confere e aplica o backup"""
+        if backup_file.endswith('.manifest.json'):
+            # Snapshot incremental: reconstruir o arquivo a partir da cadeia
+            snapshot_dir = os.path.dirname(backup_file)
+            snapshot_id = os.path.basename(backup_file)[:-len('.manifest.json')]
+            restored_file = self._scratch_file(scratch, f"vr_database_snapshot_{snapshot_id}")
+            backup_file = restore_incremental_snapshot(snapshot_dir, snapshot_id, restored_file)
+            print(f"🧩 Snapshot reconstruído da cadeia: {len(manifest_chain(snapshot_dir, snapshot_id))} manifesto(s)")
+            
+        if backup_file.endswith('.dump'):
+            # Dump lógico: recriar o banco num temporário
+            restored_file = self._scratch_file(scratch, os.path.basename(backup_file)[:-len('.dump')])
+            counts = logical_restore(backup_file, restored_file)
+            print(f"🧱 {sum(counts.values()):,} linhas recriadas em {len(counts)} tabelas")
+            backup_file = restored_file
+        elif codec_for_path(backup_file):
+            # Arquivo compactado em streaming: descompactar para um temporário
+            restored_file = self._scratch_file(scratch, os.path.basename(backup_file).rsplit('.', 1)[0])
+            backup_file = extract_archive(backup_file, restored_file)
+
         # Verificar se é arquivo ZIP
         if backup_file.endswith('.zip'):
             # Extrair arquivo ZIP
@@ -152,26 +1111,45 @@ python3 database_backup.py --restore <arquivo_backup>
                 if not db_file:
                     raise ValueError("Nenhum arquivo de banco encontrado no ZIP")
                     
-                # Extrair arquivo
-                zipf.extract(db_file, self.backup_dir)
-                backup_file = os.path.join(self.backup_dir, db_file)
+                # Extrair para um temporário (não sobre o .db/.sql catalogado ao lado do ZIP)
+                stem, ext = os.path.splitext(os.path.basename(db_file))
+                backup_file = self._scratch_file(scratch, stem, suffix=f".restore{ext}")
+                with zipf.open(db_file) as src, open(backup_file, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
                 
+        # Conferir a integridade do banco a aplicar antes de tocar no atual
+        if not backup_file.endswith('.sql'):
+            try:
+                problems = check_database(backup_file)
+            except sqlite3.DatabaseError as e:
+                problems = [str(e)]
+            if problems:
+                raise ValueError(f"Backup falhou no quick_check: {'; '.join(problems[:5])}")
+            print("🔎 quick_check ok")
+            
         # Fazer backup do banco atual se existir
         if os.path.exists(self.db_path):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            current_backup = f"vr_database_current_{timestamp}.db"
-            shutil.copy2(self.db_path, os.path.join(self.backup_dir, current_backup))
-            print(f"💾 Backup do banco atual criado: {current_backup}")
+            timestamp = datetime.now().strftime(BACKUP_TIMESTAMP)
+            current_backup = os.path.join(self.backup_dir, f"vr_database_current_{timestamp}.db")
+            self.catalog.ensure_new(current_backup)
+            online_backup(self.db_path, current_backup)
+            self.catalog.register("pre_restore", current_backup)
+            print(f"💾 Backup do banco atual criado: {os.path.basename(current_backup)}")
             
         # Restaurar banco
         if backup_file.endswith('.sql'):
             # Restaurar schema
             self._restore_schema(backup_file)
         else:
-            # Restaurar arquivo completo
-            shutil.copy2(backup_file, self.db_path)
-            
-        print(f"✅ Backup restaurado com sucesso!")
+            # Restaurar arquivo completo pela API de backup: sobrescreve o
+            # banco (e o WAL) numa única transação, sem copiar por cima do arquivo
+            src = sqlite3.connect(backup_file)
+            dst = sqlite3.connect(self.db_path)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
         
     def _restore_schema(self, schema_file):
         """Restaura apenas o schema SQL"""
@@ -190,26 +1168,110 @@ python3 database_backup.py --restore <arquivo_backup>
         conn.close()
         
     def cleanup_old_backups(self, keep_days=30):
-        """Remove backups antigos"""
+        """Remove backups antigos (pelo catálogo)"""
         print(f"🧹 Removendo backups com mais de {keep_days} dias...")
         
-        if not os.path.exists(self.backup_dir):
-            print("Nenhum backup para limpar.")
-            return
-            
-        cutoff_date = datetime.now().timestamp() - (keep_days * 24 * 60 * 60)
-        removed_count = 0
+        cutoff_date = datetime.fromtimestamp(datetime.now().timestamp() - (keep_days * 24 * 60 * 60))
+        removed = self.catalog.remove(self.catalog.older_than(cutoff_date))
+        for path in removed:
+            print(f"🗑️ Removido: {path}")
+                    
+        print(f"✅ {len(removed)} backups antigos removidos.")
+        
+    def apply_retention(self, daily=7, weekly=4, monthly=12, dry_run=False):
+        """Mantém o último backup de cada dia/semana/mês recente (ver ``BackupCatalog.retention_plan``)"""
+        print(f"🧹 Retenção: {daily} diário(s), {weekly} semanal(is), {monthly} mensal(is)")
+        plan = self.catalog.retention_plan(daily, weekly, monthly)
+        pinned = self.catalog.retention_pinned(daily, weekly, monthly)
+        if pinned:
+            # Cadeia incremental ainda aberta: sai quando o snapshot mantido que depende dela sair
+            print(f"⚠️  {len(pinned)} backup(s) fora da política mantidos por dependência de um snapshot mantido "
+                  f"(mais antigo: {min(row['created'] for row in pinned)})")
+        if dry_run:
+            for row in plan:
+                print(f"   (simulação) removeria: {row['path']} [{row['kind']}] de {row['created']}")
+            return [row['path'] for row in plan]
+        removed = self.catalog.remove(plan)
+        for path in removed:
+            print(f"🗑️ Removido: {path}")
+        print(f"✅ {len(removed)} backups fora da política removidos.")
+        return removed
         
-        for file in os.listdir(self.backup_dir):
+    def verify_backups(self, workers=None, checks="quick_check", max_seconds=None):
+        """Verifica os backups do catálogo em paralelo (``verify_backup`` num pool de processos).
+
+        Os nunca verificados vêm primeiro, depois os verificados há mais
+        tempo; com ``max_seconds`` novos backups deixam de ser agendados
+        quando o prazo acaba, e a próxima execução continua de onde parou.
+        Cada resultado fica gravado no catálogo (tabela ``verifications``).
+        """
+        queue = [dict(row) for row in self.catalog.verification_queue()]
+        workers = workers or os.cpu_count() or 1
+        print(f"🔎 Verificando {len(queue)} backup(s) com {workers} processo(s) ({checks})")
+
+        started = time.perf_counter()
+        results, pending = [], set()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while queue or pending:
+                in_time = max_seconds is None or time.perf_counter() - started < max_seconds
+                while queue and in_time and len(pending) < 2 * workers:
+                    pending.add(pool.submit(verify_backup, queue.pop(0), self.backup_dir, checks))
+                if not in_time:
+                    queue.clear()
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    self.catalog.record_verification(result)
+                    results.append(result)
+                    if not result["ok"]:
+                        print(f"❌ {result['path']} [{result['kind']}]: {'; '.join(result['errors'])}")
+        elapsed = time.perf_counter() - started
+
+        failed = sum(not r["ok"] for r in results)
+        total_bytes = sum(r["bytes"] for r in results)
+        skipped = len(self.catalog.entries()) - len(results)
+        print(f"✅ {len(results) - failed} ok | ❌ {failed} com falha | ⏭️ {skipped} não verificado(s) no prazo")
+        print(f"⏱️ {elapsed:.1f}s | {total_bytes / 1024 / 1024:,.1f} MB | "
+              f"{total_bytes / 1024 / 1024 / max(elapsed, 1e-9):,.1f} MB/s | {len(results) / max(elapsed, 1e-9):,.1f} backups/s")
+        return results
+
+    def rebuild_catalog(self):
+        """Registra no catálogo backups gravados antes dele (varre o diretório uma vez)"""
+        added = 0
+        for file in sorted(os.listdir(self.backup_dir)):
             file_path = os.path.join(self.backup_dir, file)
-            if os.path.isfile(file_path):
-                file_time = os.path.getmtime(file_path)
-                if file_time < cutoff_date:
-                    os.remove(file_path)
-                    removed_count += 1
-                    print(f"🗑️ Removido: {file}")
-                    
-        print(f"✅ {removed_count} backups antigos removidos.")
+            if self.catalog.find(file_path) is not None or not os.path.isfile(file_path):
+                continue
+            created = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(timespec="seconds")
+            stem = file[:-len('.zip')]
+            if file.endswith('.zip'):
+                main = next((os.path.join(self.backup_dir, stem + ext) for ext in ('.db', '.sql')
+                             if os.path.exists(os.path.join(self.backup_dir, stem + ext))), None)
+                if main is None or self.catalog.find(main) is not None:
+                    continue
+                self.catalog.register("full" if main.endswith('.db') else "schema", main, [file_path], created=created)
+            elif file.endswith('.dump'):
+                self.catalog.register("logical", file_path, created=created)
+            elif codec_for_path(file):
+                self.catalog.register("compressed", file_path, created=created)
+            elif file.startswith('vr_database_current_') and file.endswith('.db'):
+                self.catalog.register("pre_restore", file_path, created=created)
+            else:
+                continue
+            added += 1
+        for snapshot_id in list_snapshots(self.incremental_dir):
+            manifest_file = manifest_path(self.incremental_dir, snapshot_id)
+            if self.catalog.find(manifest_file) is not None:
+                continue
+            manifest = load_manifest(manifest_file)
+            parent = manifest_path(self.incremental_dir, manifest["parent"]) if manifest["parent"] else None
+            self.catalog.register("incremental", manifest_file, [pack_path(self.incremental_dir, snapshot_id)],
+                                  content_sha256=manifest["sha256"], parent_path=parent, created=manifest["created"])
+            added += 1
+        print(f"✅ {added} backup(s) adicionados ao catálogo.")
+        return added
 
 def main():
     """Função principal"""
@@ -220,7 +1282,28 @@ def main():
     parser.add_argument('--restore', type=str, help='Restaurar backup (arquivo)')
     parser.add_argument('--list', action='store_true', help='Listar backups')
     parser.add_argument('--cleanup', type=int, metavar='DAYS', help='Limpar backups antigos (dias)')
+    parser.add_argument('--retention', nargs=3, type=int, metavar=('DAILY', 'WEEKLY', 'MONTHLY'),
+                        help='Mantém o último backup de cada um dos N últimos dias/semanas/meses')
+    parser.add_argument('--dry-run', action='store_true', help='Com --retention: só mostra o que seria removido')
+    parser.add_argument('--rebuild-catalog', action='store_true', help='Registra no catálogo backups antigos do diretório')
+    parser.add_argument('--verify', action='store_true', help='Verifica checksums e integridade dos backups do catálogo')
+    parser.add_argument('--integrity', action='store_true', help='Com --verify: integrity_check em vez de quick_check')
+    parser.add_argument('--max-seconds', type=float, help='Com --verify: prazo; o restante fica para a próxima execução')
     parser.add_argument('--schema-only', action='store_true', help='Backup apenas do schema')
+    parser.add_argument('--pages', type=int, default=BACKUP_PAGES,
+                        help=f'Páginas por passo do backup online (padrão: {BACKUP_PAGES}; -1 copia tudo de uma vez)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Snapshot incremental: grava só os blocos de páginas alterados desde o anterior')
+    parser.add_argument('--base-days', type=int, default=INCREMENTAL_BASE_DAYS,
+                        help=f'Com --incremental: nova base quando a atual tem N dias (padrão: {INCREMENTAL_BASE_DAYS})')
+    parser.add_argument('--codec', choices=sorted(CODECS),
+                        help='Grava um único arquivo compactado em streaming (sem .db intermediário)')
+    parser.add_argument('--level', type=int, help='Nível de compressão do codec')
+    parser.add_argument('--workers', type=int, help='Threads de compressão (padrão: número de CPUs)')
+    parser.add_argument('--logical', action='store_true',
+                        help='Dump lógico rápido (.dump): linhas em blocos, restauradas numa única transação')
+    parser.add_argument('--file-copy', action='store_true',
+                        help='Copia o arquivo em vez do backup online (apenas com o banco parado)')
     
     args = parser.parse_args()
     
@@ -228,22 +1311,38 @@ def main():
     
     try:
         if args.backup:
-            backup_system.create_backup(include_data=not args.schema_only)
+            backup_system.create_backup(include_data=not args.schema_only, online=not args.file_copy, pages=args.pages,
+                                        incremental=args.incremental, codec=args.codec, level=args.level,
+                                        workers=args.workers, logical=args.logical, base_days=args.base_days)
         elif args.restore:
             backup_system.restore_backup(args.restore)
         elif args.list:
             backup_system.list_backups()
         elif args.cleanup:
             backup_system.cleanup_old_backups(args.cleanup)
+        elif args.retention:
+            backup_system.apply_retention(*args.retention, dry_run=args.dry_run)
+        elif args.rebuild_catalog:
+            backup_system.rebuild_catalog()
+        elif args.verify:
+            results = backup_system.verify_backups(workers=args.workers, max_seconds=args.max_seconds,
+                                                   checks="integrity_check" if args.integrity else "quick_check")
+            if any(not r["ok"] for r in results):
+                raise SystemExit(1)
         else:
             print("🗄️ SISTEMA DE BACKUP - BANCO DE DADOS VR/VA")
             print("=" * 60)
             print("Uso:")
             print("  python3 database_backup.py --backup          # Criar backup completo")
             print("  python3 database_backup.py --backup --schema-only  # Backup apenas schema")
+            print("  python3 database_backup.py --backup --incremental  # Snapshot incremental (só páginas alteradas)")
+            print("  python3 database_backup.py --backup --codec gzip   # Arquivo compactado em streaming")
+            print("  python3 database_backup.py --backup --logical      # Dump lógico (restore rápido)")
             print("  python3 database_backup.py --restore <arquivo>     # Restaurar backup")
             print("  python3 database_backup.py --list            # Listar backups")
             print("  python3 database_backup.py --cleanup 30      # Limpar backups > 30 dias")
+            print("  python3 database_backup.py --retention 7 4 12  # Manter 7 diários, 4 semanais, 12 mensais")
+            print("  python3 database_backup.py --verify --workers 4    # Verificar backups do catálogo")
             
     except Exception as e:
         print(f"❌ Erro: {e}")
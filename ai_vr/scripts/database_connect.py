@@ -6,7 +6,15 @@ Script para conectar e consultar o banco de dados SQLite3 do sistema de VR/VA
 import sqlite3
 import pandas as pd
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+if __package__ in (None, ""):
+    # Execução direta (python3 ai_vr/scripts/...): tornar o pacote ai_vr importável
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from ai_vr.core.relatorios import ROTULOS_ESTATISTICAS, Relatorios
 
 class VRDatabaseConnection:
     def __init__(self, db_path="ai_vr/db/vr_database.db"):
@@ -14,6 +22,7 @@ class VRDatabaseConnection:
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        self.relatorios = None
         
     def connect(self):
         """Conecta ao banco de dados"""
@@ -27,6 +36,9 @@ class VRDatabaseConnection:
         # Ativar foreign keys
         self.cursor.execute("PRAGMA foreign_keys = ON")
         
+        # Consultas nomeadas (SQL preparado uma vez, resultados em cache)
+        self.relatorios = Relatorios(self.db_path)
+        
         print(f"✅ Conectado ao banco: {self.db_path}")
         
     def get_database_info(self):
@@ -58,55 +70,16 @@ class VRDatabaseConnection:
         print(f"\n👥 COLABORADORES ELEGÍVEIS PARA VR (limit: {limit})")
         print("=" * 70)
         
-        query = """
-        SELECT 
-            c.matricula,
-            c.situacao,
-            car.titulo as cargo,
-            car.categoria as categoria_cargo,
-            s.nome_abreviado as sindicato,
-            e.nome as estado,
-            e.valor_vr_diario
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
-        WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
-        AND c.situacao NOT IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado')
-        AND car.categoria = 'FUNCIONARIO'
-        ORDER BY c.matricula
-        LIMIT ?
-        """
-        
-        df = pd.read_sql_query(query, self.conn, params=(limit,))
+        df = self.relatorios.consultar("colaboradores_elegiveis", limite=limit)
         print(f"Total de colaboradores elegíveis: {len(df)}")
         print(df.to_string(index=False))
         
-    def query_resumo_por_sindicato(self):
+    def query_resumo_por_sindicato(self, periodo_inicio='2025-04-15', periodo_fim='2025-05-15'):
         """Consulta resumo por sindicato"""
         print(f"\n📊 RESUMO POR SINDICATO")
         print("=" * 70)
         
-        query = """
-        SELECT 
-            s.nome_abreviado as sindicato,
-            e.nome as estado,
-            e.valor_vr_diario,
-            du.dias_uteis,
-            COUNT(c.id) as total_colaboradores,
-            SUM(CASE WHEN c.situacao = 'Trabalhando' THEN 1 ELSE 0 END) as trabalhando,
-            SUM(CASE WHEN c.situacao = 'Férias' THEN 1 ELSE 0 END) as ferias,
-            SUM(CASE WHEN c.situacao IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado') THEN 1 ELSE 0 END) as afastados
-        FROM colaboradores c
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
-        JOIN dias_uteis du ON s.id = du.sindicato_id
-        WHERE du.periodo_inicio = '2025-04-15' AND du.periodo_fim = '2025-05-15'
-        GROUP BY s.id, s.nome_abreviado, e.nome, e.valor_vr_diario, du.dias_uteis
-        ORDER BY total_colaboradores DESC
-        """
-        
-        df = pd.read_sql_query(query, self.conn)
+        df = self.relatorios.consultar("resumo_por_sindicato", periodo_inicio=periodo_inicio, periodo_fim=periodo_fim)
         print(df.to_string(index=False))
         
     def query_colaboradores_ferias(self, limit=10):
@@ -114,23 +87,7 @@ class VRDatabaseConnection:
         print(f"\n🏖️ COLABORADORES EM FÉRIAS (limit: {limit})")
         print("=" * 70)
         
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            s.nome_abreviado as sindicato,
-            f.dias_ferias,
-            f.periodo_inicio,
-            f.periodo_fim
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN ferias f ON c.id = f.colaborador_id
-        ORDER BY f.dias_ferias DESC
-        LIMIT ?
-        """
-        
-        df = pd.read_sql_query(query, self.conn, params=(limit,))
+        df = self.relatorios.consultar("colaboradores_ferias", limite=limit)
         print(f"Total de colaboradores em férias: {len(df)}")
         print(df.to_string(index=False))
         
@@ -139,85 +96,27 @@ class VRDatabaseConnection:
         print(f"\n❌ COLABORADORES EXCLUÍDOS DO VR")
         print("=" * 70)
         
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            car.categoria as categoria_cargo,
-            e.tipo_exclusao,
-            e.valor_especifico,
-            e.observacoes
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN exclusoes e ON c.id = e.colaborador_id
-        ORDER BY e.tipo_exclusao, c.matricula
-        """
-        
-        df = pd.read_sql_query(query, self.conn)
+        df = self.relatorios.consultar("colaboradores_excluidos")
         print(f"Total de colaboradores excluídos: {len(df)}")
         print(df.to_string(index=False))
         
-    def query_exemplo_calculo_vr(self, limit=5):
+    def query_exemplo_calculo_vr(self, limit=5, periodo_inicio='2025-04-15', periodo_fim='2025-05-15'):
         """Consulta exemplo de cálculo de VR"""
         print(f"\n💰 EXEMPLO DE CÁLCULO DE VR (limit: {limit})")
         print("=" * 70)
         
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            s.nome_abreviado as sindicato,
-            e.valor_vr_diario,
-            du.dias_uteis as dias_uteis_sindicato,
-            COALESCE(f.dias_ferias, 0) as dias_ferias,
-            (du.dias_uteis - COALESCE(f.dias_ferias, 0)) as dias_vr_calculados,
-            (du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario as valor_total,
-            ((du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario) * 0.8 as custo_empresa,
-            ((du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario) * 0.2 as desconto_colaborador
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
-        JOIN dias_uteis du ON s.id = du.sindicato_id
-        LEFT JOIN ferias f ON c.id = f.colaborador_id
-        WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
-        AND c.situacao NOT IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado')
-        AND car.categoria = 'FUNCIONARIO'
-        AND du.periodo_inicio = '2025-04-15' AND du.periodo_fim = '2025-05-15'
-        LIMIT ?
-        """
-        
-        df = pd.read_sql_query(query, self.conn, params=(limit,))
+        df = self.relatorios.consultar("exemplo_calculo_vr", limite=limit,
+                                       periodo_inicio=periodo_inicio, periodo_fim=periodo_fim)
         print("Exemplos de cálculo de VR:")
         print(df.to_string(index=False))
         
     def query_estatisticas_gerais(self):
-        """Consulta estatísticas gerais"""
+        """Consulta estatísticas gerais (uma única consulta com todas as contagens)"""
         print(f"\n📈 ESTATÍSTICAS GERAIS")
         print("=" * 50)
         
-        queries = [
-            ("Total de colaboradores", "SELECT COUNT(*) FROM colaboradores"),
-            ("Colaboradores elegíveis", """
-                SELECT COUNT(*) FROM colaboradores c
-                JOIN cargos car ON c.cargo_id = car.id
-                WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
-                AND c.situacao NOT IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado')
-                AND car.categoria = 'FUNCIONARIO'
-            """),
-            ("Colaboradores excluídos", "SELECT COUNT(*) FROM exclusoes"),
-            ("Colaboradores em férias", "SELECT COUNT(*) FROM ferias"),
-            ("Colaboradores afastados", "SELECT COUNT(*) FROM afastamentos"),
-            ("Colaboradores desligados", "SELECT COUNT(*) FROM desligamentos"),
-            ("Colaboradores admitidos em abril", "SELECT COUNT(*) FROM admissoes"),
-            ("Estagiários", "SELECT COUNT(*) FROM exclusoes WHERE tipo_exclusao = 'ESTAGIARIO'"),
-            ("Aprendizes", "SELECT COUNT(*) FROM exclusoes WHERE tipo_exclusao = 'APRENDIZ'"),
-            ("Colaboradores no exterior", "SELECT COUNT(*) FROM exclusoes WHERE tipo_exclusao = 'EXTERIOR'")
-        ]
-        
-        for descricao, query in queries:
-            result = self.cursor.execute(query).fetchone()
-            print(f"{descricao}: {result[0]:,}")
+        for coluna, valor in self.relatorios.estatisticas().items():
+            print(f"{ROTULOS_ESTATISTICAS[coluna]}: {valor:,}")
             
     def run_all_queries(self):
         """Executa todas as consultas de exemplo"""
@@ -238,6 +137,8 @@ class VRDatabaseConnection:
         
     def close(self):
         """Fecha a conexão com o banco"""
+        if self.relatorios:
+            self.relatorios.close()
         if self.conn:
             self.conn.close()
             print(f"🔒 Conexão fechada: {self.db_path}")
@@ -1,23 +1,49 @@
 #!/usr/bin/env python3
+import os
+import sys
+import tempfile
 import pandas as pd
 import sqlite3
 import numpy as np
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from pathlib import Path
 
+if __package__ in (None, ""):
+    # Execução direta (python3 ai_vr/scripts/...): tornar o pacote ai_vr importável
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from ai_vr.core.calendario import feriados_padrao
+
+SCHEMA_PATH = Path(__file__).resolve().parents[1] / "db" / "database_schema.sql"
+ANOS_FERIADOS = range(2020, 2036)
+DEFAULT_DB_PATH = "ai_vr/db/vr_database.db"
+# A planilha de férias traz só a quantidade de dias: o gozo é assumido a
+# partir do início do período de referência em que ela foi recebida
+INICIO_FERIAS_PLANILHA = date(2025, 4, 15)
+
 class VRDatabase:
-    def __init__(self, db_path=":memory:"):
-        """Inicializa o banco de dados SQLite"""
+    def __init__(self, db_path=":memory:", autocommit=True):
+        """Inicializa o banco de dados SQLite
+
+        Com autocommit=False as etapas de população não fazem commit
+        individualmente; o chamador confirma tudo em uma única transação.
+        """
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
+        self.autocommit = autocommit
+
+    def _commit(self):
+        """Confirma a transação corrente quando em modo autocommit"""
+        if self.autocommit:
+            self.conn.commit()
         
     def create_schema(self):
         """Cria o schema do banco de dados"""
-        with open('ai_vr/db/database_schema.sql', 'r') as f:
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
             schema = f.read()
         self.cursor.executescript(schema)
-        self.conn.commit()
+        self._commit()
         print("✅ Schema criado com sucesso")
         
     def populate_estados(self):
@@ -33,23 +59,23 @@ class VRDatabase:
             "INSERT INTO estados (id, nome, uf, valor_vr_diario) VALUES (?, ?, ?, ?)",
             estados_data
         )
-        self.conn.commit()
+        self._commit()
         print("✅ Estados populados")
         
     def populate_sindicatos(self):
         """Popula a tabela de sindicatos"""
         sindicatos_data = [
-            (1, 'SITEPD PR - SIND DOS TRAB EM EMPR PRIVADAS DE PROC DE DADOS DE CURITIBA E REGIAO METROPOLITANA', 'SITEPD PR', 1),
-            (2, 'SINDPPD RS - SINDICATO DOS TRAB. EM PROC. DE DADOS RIO GRANDE DO SUL', 'SINDPPD RS', 3),
-            (3, 'SINDPD SP - SIND.TRAB.EM PROC DADOS E EMPR.EMPRESAS PROC DADOS ESTADO DE SP.', 'SINDPD SP', 4),
-            (4, 'SINDPD RJ - SINDICATO PROFISSIONAIS DE PROC DADOS DO RIO DE JANEIRO', 'SINDPD RJ', 2)
+            (1, 'SITEPD PR - SIND DOS TRAB EM EMPR PRIVADAS DE PROC DE DADOS DE CURITIBA E REGIAO METROPOLITANA', 'SITEPD PR', 1, 'Curitiba'),
+            (2, 'SINDPPD RS - SINDICATO DOS TRAB. EM PROC. DE DADOS RIO GRANDE DO SUL', 'SINDPPD RS', 3, 'Porto Alegre'),
+            (3, 'SINDPD SP - SIND.TRAB.EM PROC DADOS E EMPR.EMPRESAS PROC DADOS ESTADO DE SP.', 'SINDPD SP', 4, 'São Paulo'),
+            (4, 'SINDPD RJ - SINDICATO PROFISSIONAIS DE PROC DADOS DO RIO DE JANEIRO', 'SINDPD RJ', 2, 'Rio de Janeiro')
         ]
         
         self.cursor.executemany(
-            "INSERT INTO sindicatos (id, nome_completo, nome_abreviado, estado_id) VALUES (?, ?, ?, ?)",
+            "INSERT INTO sindicatos (id, nome_completo, nome_abreviado, estado_id, municipio) VALUES (?, ?, ?, ?, ?)",
             sindicatos_data
         )
-        self.conn.commit()
+        self._commit()
         print("✅ Sindicatos populados")
         
     def populate_empresas(self):
@@ -60,7 +86,7 @@ class VRDatabase:
             "INSERT INTO empresas (id, nome, cnpj) VALUES (?, ?, ?)",
             empresas_data
         )
-        self.conn.commit()
+        self._commit()
         print("✅ Empresas populadas")
         
     def populate_cargos(self):
@@ -104,7 +130,7 @@ class VRDatabase:
             "INSERT INTO cargos (id, titulo, categoria) VALUES (?, ?, ?)",
             cargos_data
         )
-        self.conn.commit()
+        self._commit()
         print(f"✅ {len(cargos_data)} cargos populados")
         
     def populate_colaboradores(self):
@@ -136,44 +162,56 @@ class VRDatabase:
                 sindicato_id,
                 situacao,
                 None,  # data_admissao
-                None   # data_desligamento
+                None,  # data_desligamento
+                None if pd.isna(sindicato) else str(sindicato),  # sindicato_informado
+                None if pd.isna(cargo) else str(cargo)  # cargo_informado
             ))
             
         self.cursor.executemany(
             """INSERT INTO colaboradores 
-               (matricula, nome, empresa_id, cargo_id, sindicato_id, situacao, data_admissao, data_desligamento) 
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+               (matricula, nome, empresa_id, cargo_id, sindicato_id, situacao, data_admissao, data_desligamento,
+                sindicato_informado, cargo_informado) 
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             colaboradores_data
         )
-        self.conn.commit()
+        self._commit()
         print(f"✅ {len(colaboradores_data)} colaboradores ativos populados")
         
     def populate_ferias(self):
-        """Popula a tabela de férias"""
+        """Popula a tabela de férias como intervalos [data_inicio, data_fim]
+
+        Cada férias é gravada uma única vez; o carregamento de cada competência
+        recorta o intervalo ao período (ver carregar_bases).
+        """
         ferias = pd.read_excel('data/FÉRIAS.xlsx')
         
         ferias_data = []
         for _, row in ferias.iterrows():
             matricula = int(row['MATRICULA'])
             dias_ferias = int(row['DIAS DE FÉRIAS'])
+            if dias_ferias <= 0:
+                # Sem dias de férias não há intervalo a gravar
+                continue
             
             # Obter colaborador_id
             self.cursor.execute("SELECT id FROM colaboradores WHERE matricula = ?", (matricula,))
             result = self.cursor.fetchone()
             if result:
                 colaborador_id = result[0]
+                data_inicio = INICIO_FERIAS_PLANILHA
+                data_fim = data_inicio + timedelta(days=dias_ferias - 1)
                 ferias_data.append((
                     colaborador_id,
-                    date(2025, 4, 15),  # periodo_inicio (assumindo período de 15/04 a 15/05)
-                    date(2025, 5, 15),  # periodo_fim
+                    data_inicio,
+                    data_fim,
                     dias_ferias
                 ))
                 
         self.cursor.executemany(
-            "INSERT INTO ferias (colaborador_id, periodo_inicio, periodo_fim, dias_ferias) VALUES (?, ?, ?, ?)",
+            "INSERT INTO ferias (colaborador_id, data_inicio, data_fim, dias_ferias) VALUES (?, ?, ?, ?)",
             ferias_data
         )
-        self.conn.commit()
+        self._commit()
         print(f"✅ {len(ferias_data)} registros de férias populados")
         
     def populate_afastamentos(self):
@@ -202,7 +240,7 @@ class VRDatabase:
             "INSERT INTO afastamentos (colaborador_id, tipo_afastamento, data_inicio, data_fim, observacoes) VALUES (?, ?, ?, ?, ?)",
             afastamentos_data
         )
-        self.conn.commit()
+        self._commit()
         print(f"✅ {len(afastamentos_data)} registros de afastamentos populados")
         
     def populate_desligamentos(self):
@@ -231,7 +269,7 @@ class VRDatabase:
             "INSERT INTO desligamentos (colaborador_id, data_desligamento, comunicado_ok, observacoes) VALUES (?, ?, ?, ?)",
             desligamentos_data
         )
-        self.conn.commit()
+        self._commit()
         print(f"✅ {len(desligamentos_data)} registros de desligamentos populados")
         
     def populate_admissoes(self):
@@ -263,7 +301,7 @@ class VRDatabase:
             "INSERT INTO admissoes (colaborador_id, data_admissao, cargo_id, observacoes) VALUES (?, ?, ?, ?)",
             admissoes_data
         )
-        self.conn.commit()
+        self._commit()
         print(f"✅ {len(admissoes_data)} registros de admissões populados")
         
         # Sincronizar data_admissao na tabela de colaboradores quando estiver nula
@@ -280,7 +318,7 @@ class VRDatabase:
             )
             """
         )
-        self.conn.commit()
+        self._commit()
         print("🔁 Sincronizada data_admissao em colaboradores a partir de admissoes")
         
     def populate_exclusoes(self):
@@ -321,11 +359,25 @@ class VRDatabase:
             "INSERT INTO exclusoes (colaborador_id, tipo_exclusao, valor_especifico, observacoes) VALUES (?, ?, ?, ?)",
             exclusoes_data
         )
-        self.conn.commit()
+        self._commit()
         print(f"✅ {len(exclusoes_data)} registros de exclusões populados")
         
+    def populate_feriados(self, anos=ANOS_FERIADOS):
+        """Popula a tabela de feriados nacionais, estaduais e municipais"""
+        self.cursor.executemany(
+            "INSERT INTO feriados (data, descricao, escopo, uf, municipio) VALUES (?, ?, ?, ?, ?)",
+            feriados_padrao(anos)
+        )
+        self._commit()
+        print(f"✅ Feriados de {min(anos)} a {max(anos)} populados")
+
     def populate_dias_uteis(self):
-        """Popula a tabela de dias úteis"""
+        """Popula a tabela de dias úteis
+
+        São os dias úteis oficiais de cada sindicato para o período de referência
+        (Base dias uteis.xlsx) e prevalecem sobre o calendário. Demais períodos
+        são calculados sob demanda a partir da tabela de feriados.
+        """
         dias_uteis_data = [
             (1, date(2025, 4, 15), date(2025, 5, 15), 22),  # SITEPD PR
             (2, date(2025, 4, 15), date(2025, 5, 15), 21),  # SINDPPD RS
@@ -337,7 +389,7 @@ class VRDatabase:
             "INSERT INTO dias_uteis (sindicato_id, periodo_inicio, periodo_fim, dias_uteis) VALUES (?, ?, ?, ?)",
             dias_uteis_data
         )
-        self.conn.commit()
+        self._commit()
         print("✅ Dias úteis populados")
         
     def _get_sindicatos_map(self):
@@ -357,6 +409,7 @@ class VRDatabase:
         self.create_schema()
         self.populate_estados()
         self.populate_sindicatos()
+        self.populate_feriados()
         self.populate_empresas()
         self.populate_cargos()
         self.populate_colaboradores()
@@ -374,7 +427,7 @@ class VRDatabase:
         stats = {}
         
         tables = ['colaboradores', 'sindicatos', 'estados', 'cargos', 'empresas', 
-                 'ferias', 'afastamentos', 'desligamentos', 'admissoes', 'exclusoes', 'dias_uteis']
+                 'ferias', 'afastamentos', 'desligamentos', 'admissoes', 'exclusoes', 'dias_uteis', 'feriados']
         
         for table in tables:
             self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
@@ -386,15 +439,82 @@ class VRDatabase:
         """Fecha a conexão com o banco"""
         self.conn.close()
 
-if __name__ == "__main__":
-    # Criar e popular o banco
-    db = VRDatabase()
-    db.populate_all()
-    
+def _esvaziar_wal(db_path):
+    """Descarrega e trunca o WAL de um banco existente antes da troca do arquivo"""
+    if not os.path.exists(f"{db_path}-wal"):
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+
+def popular_banco_atomico(db_path=DEFAULT_DB_PATH):
+    """Constrói o banco em um arquivo temporário e o publica atomicamente
+
+    Toda a população roda em uma única transação sobre um arquivo temporário no
+    mesmo diretório do destino; só depois de concluída o arquivo substitui
+    ``db_path`` via ``os.replace``. Leitores nunca enxergam um banco parcial e
+    execuções repetidas produzem sempre o mesmo resultado.
+
+    Retorna as estatísticas do banco gerado.
+    """
+    destino = Path(db_path)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{destino.name}.", suffix=".tmp", dir=destino.parent)
+    os.close(fd)
+    # mkstemp cria o arquivo com 0600; manter as permissões usuais do banco
+    if destino.exists():
+        os.chmod(tmp_path, destino.stat().st_mode & 0o777)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+    try:
+        db = VRDatabase(tmp_path, autocommit=False)
+        try:
+            # Arquivo temporário: sem journal, uma falha apenas descarta o arquivo
+            db.conn.execute("PRAGMA journal_mode = OFF")
+            db.populate_all()
+            db.conn.commit()
+            stats = db.get_stats()
+        finally:
+            db.close()
+
+        # Garantir que o conteúdo esteja em disco antes da troca
+        fd = os.open(tmp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        _esvaziar_wal(destino)
+        os.replace(tmp_path, destino)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    print(f"✅ Banco publicado em: {destino}")
+    return stats
+
+
+def main():
+    """Função principal"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='População do banco de dados VR/VA a partir das planilhas')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'Arquivo SQLite de destino ({DEFAULT_DB_PATH})')
+    args = parser.parse_args()
+
+    stats = popular_banco_atomico(args.db)
+
     # Mostrar estatísticas
-    stats = db.get_stats()
     print("\n📊 ESTATÍSTICAS DO BANCO:")
     for table, count in stats.items():
         print(f"  {table}: {count} registros")
-    
-    db.close()
+
+if __name__ == "__main__":
+    main()
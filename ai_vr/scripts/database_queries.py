@@ -1,13 +1,25 @@
 #!/usr/bin/env python3
-import sqlite3
-import pandas as pd
-from database_populate import VRDatabase
+import sys
+from pathlib import Path
+
+if __package__ in (None, ""):
+    # Execução direta (python3 ai_vr/scripts/...): tornar o pacote ai_vr importável
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from ai_vr.core.relatorios import ROTULOS_ESTATISTICAS, Relatorios
+from ai_vr.scripts.database_populate import VRDatabase
+
+# Período de referência da carga de exemplo (database_populate)
+PERIODO_INICIO = "2025-04-15"
+PERIODO_FIM = "2025-05-15"
 
 class VRQueries:
     def __init__(self, db_path=":memory:"):
         """Inicializa o sistema de consultas"""
         self.db = VRDatabase(db_path)
         self.db.populate_all()
+        # Mesmas consultas nomeadas (CONSULTAS) usadas pelo serviço e pelo VRDatabaseConnection
+        self.relatorios = Relatorios(self.db.conn)
         
     def query_1_colaboradores_elegiveis(self):
         """Consulta 1: Colaboradores elegíveis para VR"""
@@ -15,27 +27,7 @@ class VRQueries:
         print("CONSULTA 1: COLABORADORES ELEGÍVEIS PARA VR")
         print("=" * 60)
         
-        query = """
-        SELECT 
-            c.matricula,
-            c.situacao,
-            car.titulo as cargo,
-            car.categoria as categoria_cargo,
-            s.nome_abreviado as sindicato,
-            e.nome as estado,
-            e.valor_vr_diario
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
-        WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
-        AND c.situacao NOT IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado')
-        AND car.categoria = 'FUNCIONARIO'
-        ORDER BY c.matricula
-        LIMIT 10
-        """
-        
-        df = pd.read_sql_query(query, self.db.conn)
+        df = self.relatorios.consultar("colaboradores_elegiveis", limite=10)
         print(f"Total de colaboradores elegíveis: {len(df)}")
         print(df.to_string(index=False))
         
@@ -45,21 +37,7 @@ class VRQueries:
         print("CONSULTA 2: COLABORADORES EXCLUÍDOS DO VR")
         print("=" * 60)
         
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            car.categoria as categoria_cargo,
-            e.tipo_exclusao,
-            e.valor_especifico,
-            e.observacoes
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN exclusoes e ON c.id = e.colaborador_id
-        ORDER BY e.tipo_exclusao, c.matricula
-        """
-        
-        df = pd.read_sql_query(query, self.db.conn)
+        df = self.relatorios.consultar("colaboradores_excluidos")
         print(f"Total de colaboradores excluídos: {len(df)}")
         print(df.to_string(index=False))
         
@@ -69,23 +47,7 @@ class VRQueries:
         print("CONSULTA 3: COLABORADORES EM FÉRIAS")
         print("=" * 60)
         
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            s.nome_abreviado as sindicato,
-            f.dias_ferias,
-            f.periodo_inicio,
-            f.periodo_fim
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN ferias f ON c.id = f.colaborador_id
-        ORDER BY f.dias_ferias DESC
-        LIMIT 10
-        """
-        
-        df = pd.read_sql_query(query, self.db.conn)
+        df = self.relatorios.consultar("colaboradores_ferias", limite=10)
         print(f"Total de colaboradores em férias: {len(df)}")
         print(df.to_string(index=False))
         
@@ -95,24 +57,7 @@ class VRQueries:
         print("CONSULTA 4: COLABORADORES DESLIGADOS")
         print("=" * 60)
         
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            d.data_desligamento,
-            d.comunicado_ok,
-            CASE 
-                WHEN d.comunicado_ok = 1 THEN 'Recebe VR proporcional'
-                ELSE 'Não recebe VR'
-            END as regra_vr
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN desligamentos d ON c.id = d.colaborador_id
-        ORDER BY d.data_desligamento
-        LIMIT 10
-        """
-        
-        df = pd.read_sql_query(query, self.db.conn)
+        df = self.relatorios.consultar("colaboradores_desligados", limite=10)
         print(f"Total de colaboradores desligados: {len(df)}")
         print(df.to_string(index=False))
         
@@ -122,25 +67,8 @@ class VRQueries:
         print("CONSULTA 5: DISTRIBUIÇÃO POR SINDICATO")
         print("=" * 60)
         
-        query = """
-        SELECT 
-            s.nome_abreviado as sindicato,
-            e.nome as estado,
-            e.valor_vr_diario,
-            du.dias_uteis,
-            COUNT(c.id) as total_colaboradores,
-            SUM(CASE WHEN c.situacao = 'Trabalhando' THEN 1 ELSE 0 END) as trabalhando,
-            SUM(CASE WHEN c.situacao = 'Férias' THEN 1 ELSE 0 END) as ferias
-        FROM colaboradores c
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
-        JOIN dias_uteis du ON s.id = du.sindicato_id
-        WHERE du.periodo_inicio = '2025-04-15' AND du.periodo_fim = '2025-05-15'
-        GROUP BY s.id, s.nome_abreviado, e.nome, e.valor_vr_diario, du.dias_uteis
-        ORDER BY total_colaboradores DESC
-        """
-        
-        df = pd.read_sql_query(query, self.db.conn)
+        # Contagens lidas de resumo_colaboradores (mantida por triggers): O(grupos)
+        df = self.relatorios.consultar("resumo_por_sindicato", periodo_inicio=PERIODO_INICIO, periodo_fim=PERIODO_FIM)
         print(df.to_string(index=False))
         
     def query_6_colaboradores_admitidos_abril(self):
@@ -149,24 +77,8 @@ class VRQueries:
         print("CONSULTA 6: COLABORADORES ADMITIDOS EM ABRIL")
         print("=" * 60)
         
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            a.data_admissao,
-            s.nome_abreviado as sindicato,
-            e.valor_vr_diario
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN admissoes a ON c.id = a.colaborador_id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
-        WHERE a.data_admissao >= '2025-04-01' AND a.data_admissao <= '2025-04-30'
-        ORDER BY a.data_admissao
-        LIMIT 10
-        """
-        
-        df = pd.read_sql_query(query, self.db.conn)
+        df = self.relatorios.consultar("colaboradores_admitidos", admissao_inicio="2025-04-01",
+                                       admissao_fim="2025-04-30", limite=10)
         print(f"Total de colaboradores admitidos em abril: {len(df)}")
         print(df.to_string(index=False))
         
@@ -176,27 +88,9 @@ class VRQueries:
         print("CONSULTA 7: RESUMO GERAL DO SISTEMA")
         print("=" * 60)
         
-        queries = [
-            ("Total de colaboradores", "SELECT COUNT(*) FROM colaboradores"),
-            ("Colaboradores elegíveis", """
-                SELECT COUNT(*) FROM colaboradores c
-                JOIN cargos car ON c.cargo_id = car.id
-                WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
-                AND c.situacao NOT IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado')
-                AND car.categoria = 'FUNCIONARIO'
-            """),
-            ("Colaboradores excluídos", "SELECT COUNT(*) FROM exclusoes"),
-            ("Colaboradores em férias", "SELECT COUNT(*) FROM ferias"),
-            ("Colaboradores desligados", "SELECT COUNT(*) FROM desligamentos"),
-            ("Colaboradores admitidos em abril", "SELECT COUNT(*) FROM admissoes"),
-            ("Estagiários", "SELECT COUNT(*) FROM exclusoes WHERE tipo_exclusao = 'ESTAGIARIO'"),
-            ("Aprendizes", "SELECT COUNT(*) FROM exclusoes WHERE tipo_exclusao = 'APRENDIZ'"),
-            ("Colaboradores no exterior", "SELECT COUNT(*) FROM exclusoes WHERE tipo_exclusao = 'EXTERIOR'")
-        ]
-        
-        for descricao, query in queries:
-            result = self.db.cursor.execute(query).fetchone()
-            print(f"{descricao}: {result[0]}")
+        # Todas as contagens numa única consulta (estatisticas_gerais)
+        for coluna, valor in self.relatorios.estatisticas().items():
+            print(f"{ROTULOS_ESTATISTICAS[coluna]}: {valor}")
             
     def query_8_exemplo_calculo_vr(self):
         """Consulta 8: Exemplo de cálculo de VR para um colaborador"""
@@ -205,32 +99,8 @@ class VRQueries:
         print("=" * 60)
         
         # Pegar um colaborador elegível como exemplo
-        query = """
-        SELECT 
-            c.matricula,
-            car.titulo as cargo,
-            s.nome_abreviado as sindicato,
-            e.valor_vr_diario,
-            du.dias_uteis as dias_uteis_sindicato,
-            COALESCE(f.dias_ferias, 0) as dias_ferias,
-            (du.dias_uteis - COALESCE(f.dias_ferias, 0)) as dias_vr_calculados,
-            (du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario as valor_total,
-            ((du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario) * 0.8 as custo_empresa,
-            ((du.dias_uteis - COALESCE(f.dias_ferias, 0)) * e.valor_vr_diario) * 0.2 as desconto_colaborador
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
-        JOIN dias_uteis du ON s.id = du.sindicato_id
-        LEFT JOIN ferias f ON c.id = f.colaborador_id
-        WHERE c.id NOT IN (SELECT colaborador_id FROM exclusoes)
-        AND c.situacao NOT IN ('Auxílio Doença', 'Licença Maternidade', 'Atestado')
-        AND car.categoria = 'FUNCIONARIO'
-        AND du.periodo_inicio = '2025-04-15' AND du.periodo_fim = '2025-05-15'
-        LIMIT 5
-        """
-        
-        df = pd.read_sql_query(query, self.db.conn)
+        df = self.relatorios.consultar("exemplo_calculo_vr", periodo_inicio=PERIODO_INICIO,
+                                       periodo_fim=PERIODO_FIM, limite=5)
         print("Exemplos de cálculo de VR:")
         print(df.to_string(index=False))
         
@@ -254,6 +124,7 @@ class VRQueries:
         
     def close(self):
         """Fecha a conexão com o banco"""
+        self.relatorios.close()
         self.db.close()
 
 if __name__ == "__main__":
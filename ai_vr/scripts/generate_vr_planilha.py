@@ -9,17 +9,39 @@ Uso:
     --inicio 2025-04-15 \
     --fim 2025-05-15 \
     --saida /home/andersonnascimento/develop/github/projects/ai_vr/data/VR_MENSAL_GERADO.xlsx
+
+  Bases grandes: --lote 5000 processa 5000 colaboradores por vez (memória limitada pelo lote)
 """
 
+from __future__ import annotations
+
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning, module="pandas")
 
 import argparse
 import os
 import sqlite3
+import sys
 from dataclasses import dataclass
 from datetime import date, datetime
-import pandas as pd
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Tuple
+
+if __package__ in (None, ""):
+    # Execução direta (python3 ai_vr/scripts/...): tornar o pacote ai_vr importável
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from ai_vr.core.execucoes import DEFAULT_LEDGER_PATH, RegistroExecucao
+from ai_vr.core.lotes import LOTE_PADRAO
+
+# pandas é importado sob demanda dentro das funções: importar este módulo
+# (ex.: apenas para PeriodoReferencia) não deve pagar o custo de carregá-lo.
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+MODOS_DIAS = ("proporcional", "exato")
+EPOCA = date(1970, 1, 1)
 
 
 @dataclass
@@ -54,104 +76,297 @@ def parse_args() -> argparse.Namespace:
         default="2025-05-15",
         help="Data de fim do período (YYYY-MM-DD). Ex.: 2025-05-15",
     )
+    parser.add_argument(
+        "--modo-dias",
+        choices=MODOS_DIAS,
+        default="proporcional",
+        help="Contagem de dias: 'proporcional' (dias corridos) ou 'exato' (dias úteis trabalhados)",
+    )
+    parser.add_argument(
+        "--validar",
+        action="store_true",
+        help="Valida as bases antes do cálculo e grava a aba 'Validações' na planilha",
+    )
+    parser.add_argument(
+        "--bloquear-erros",
+        action="store_true",
+        help="Com --validar, interrompe a geração se houver violações de severidade ERRO",
+    )
+    parser.add_argument(
+        "--forcar",
+        action="store_true",
+        help="Grava a planilha mesmo que a assinatura indique que nada mudou",
+    )
+    parser.add_argument(
+        "--gravar-calculos",
+        action="store_true",
+        help="Grava a competência calculada em calculos_vr (base do comparativo entre meses)",
+    )
+    parser.add_argument(
+        "--lote",
+        type=int,
+        help=f"Processa os colaboradores em lotes de N (ex.: {LOTE_PADRAO}): carga, cálculo e planilha "
+             "em streaming, com memória limitada pelo lote (não combina com --validar)",
+    )
+    parser.add_argument(
+        "--ledger",
+        default=DEFAULT_LEDGER_PATH,
+        help="Banco do histórico de execuções (runs/run_stages)",
+    )
+    parser.add_argument(
+        "--sem-ledger",
+        action="store_true",
+        help="Não registra esta execução no histórico",
+    )
     parser.add_argument(
         "--saida",
         default="/home/andersonnascimento/develop/github/projects/ai_vr/data/VR_MENSAL_GERADO.xlsx",
         help="Arquivo XLSX de saída",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.lote is not None and args.lote < 1:
+        parser.error("--lote deve ser positivo")
+    if args.lote and args.validar:
+        # As regras de validação olham a base inteira (ex.: matrículas duplicadas entre lotes)
+        parser.error("--validar não combina com --lote")
+    return args
 
 
 def to_date(value: str) -> date:
     return datetime.strptime(value, "%Y-%m-%d").date()
 
 
-def carregar_bases(conn: sqlite3.Connection, periodo: PeriodoReferencia):
-    # Colaboradores + cargos + sindicatos + estados (valor diário)
-    colaboradores = pd.read_sql_query(
-        """
-        SELECT 
-            c.id as colaborador_id,
-            c.matricula,
-            c.situacao,
-            c.data_admissao,
-            c.data_desligamento,
-            car.titulo as cargo,
-            car.categoria as categoria_cargo,
-            s.id as sindicato_id,
-            s.nome_abreviado as sindicato,
-            e.nome as estado,
-            e.valor_vr_diario
-        FROM colaboradores c
-        JOIN cargos car ON c.cargo_id = car.id
-        JOIN sindicatos s ON c.sindicato_id = s.id
-        JOIN estados e ON s.estado_id = e.id
+def _tem_indice_intervalos(conn: sqlite3.Connection, tabela: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"rtree_{tabela}",)
+    ).fetchone() is not None
+
+
+def _filtro_sobreposicao(conn: sqlite3.Connection, tabela: str, usar_indice=None) -> str:
+    """Condição SQL "intervalo de ``tabela`` sobreposto a [:inicio, :fim]".
+
+    Com o índice R*Tree (``rtree_<tabela>``, ver database_schema.sql) a busca
+    é logarítmica no histórico; bancos antigos sem o índice caem na varredura.
+    """
+    if usar_indice is None:
+        usar_indice = _tem_indice_intervalos(conn, tabela)
+    if usar_indice:
+        return f"id IN (SELECT id FROM rtree_{tabela} WHERE inicio <= :dia_fim AND fim >= :dia_inicio)"
+    return "(data_inicio <= :fim AND COALESCE(data_fim, :fim) >= :inicio)"
+
+
+def _parametros_periodo(periodo: PeriodoReferencia, faixa=None) -> dict:
+    parametros = {
+        "inicio": periodo.inicio.isoformat(),
+        "fim": periodo.fim.isoformat(),
+        # coordenadas dos índices R*Tree: dias desde 1970-01-01
+        "dia_inicio": (periodo.inicio - EPOCA).days,
+        "dia_fim": (periodo.fim - EPOCA).days,
+    }
+    if faixa is not None:
+        parametros["id_min"], parametros["id_max"] = faixa
+    return parametros
+
+
+def _filtro_faixa(faixa) -> str:
+    """Condição SQL "colaborador_id na ``faixa`` (id_min, id_max)"; sem faixa, todos."""
+    return "colaborador_id BETWEEN :id_min AND :id_max" if faixa is not None else "1"
+
+
+def compactar(df: pd.DataFrame, inteiros=(), categorias=(), datas=(), booleanos=()) -> pd.DataFrame:
+    """Converte as colunas de ``df`` para tipos compactos, no próprio quadro.
+
+    - ``inteiros``: int32 (Int32 se houver ausentes)
+    - ``categorias``: category (textos repetidos viram códigos de 1-2 bytes)
+    - ``datas``: datetime64[s], convertidas uma única vez na carga (o pandas
+      não tem resolução em dias; NaT para ausentes)
+    - ``booleanos``: boolean anulável
+
+    Colunas ausentes em ``df`` são ignoradas.
+    """
+    import pandas as pd
+
+    for coluna in inteiros:
+        if coluna in df.columns:
+            serie = pd.to_numeric(df[coluna])
+            df[coluna] = serie.astype("Int32" if serie.isna().any() else "int32")
+    for coluna in categorias:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("category")
+    for coluna in datas:
+        if coluna in df.columns:
+            df[coluna] = pd.to_datetime(df[coluna]).astype("datetime64[s]")
+    for coluna in booleanos:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("boolean")
+    return df
+
+
+def carregar_afastamentos(conn: sqlite3.Connection, periodo: PeriodoReferencia, usar_indice=None,
+                          faixa=None) -> pd.DataFrame:
+    """Afastamentos que se sobrepõem ao período (em aberto contam até o fim).
+
+    ``faixa`` (id_min, id_max) restringe aos colaboradores de um lote.
+    """
+    import pandas as pd
+
+    afastamentos = pd.read_sql_query(
+        f"""
+        SELECT colaborador_id, tipo_afastamento, data_inicio, data_fim
+        FROM afastamentos
+        WHERE {_filtro_sobreposicao(conn, "afastamentos", usar_indice)} AND {_filtro_faixa(faixa)}
         """,
         conn,
+        params=_parametros_periodo(periodo, faixa),
     )
-
-    # Dias úteis do período por sindicato
-    dias_uteis = pd.read_sql_query(
-        """
-        SELECT sindicato_id, dias_uteis
-        FROM dias_uteis
-        WHERE periodo_inicio = ? AND periodo_fim = ?
+    return compactar(afastamentos, inteiros=("colaborador_id",), categorias=("tipo_afastamento",),
+                     datas=("data_inicio", "data_fim"))
+
+
+def carregar_ferias(conn: sqlite3.Connection, periodo: PeriodoReferencia, usar_indice=None, faixa=None):
+    """Retorna (dias de férias por colaborador, intervalos recortados ao período).
+
+    Os intervalos [data_inicio, data_fim] são recortados ao período em SQL.
+    Linhas legadas (sem datas, gravadas para um período fixo) só valem no
+    período exato e entram apenas na contagem, como ``dias_ferias_sem_datas``.
+    ``faixa`` (id_min, id_max) restringe aos colaboradores de um lote.
+    """
+    import pandas as pd
+
+    params = _parametros_periodo(periodo, faixa)
+    filtro = _filtro_sobreposicao(conn, "ferias", usar_indice)
+    ids = _filtro_faixa(faixa)
+    ferias_intervalos = pd.read_sql_query(
+        f"""
+        SELECT colaborador_id,
+               MAX(data_inicio, :inicio) AS data_inicio,
+               MIN(data_fim, :fim) AS data_fim
+        FROM ferias
+        WHERE data_inicio IS NOT NULL AND {filtro} AND {ids}
         """,
         conn,
-        params=(periodo.inicio.isoformat(), periodo.fim.isoformat()),
+        params=params,
     )
-
-    # Férias no período (o modelo atual grava uma linha com dias do período)
     ferias = pd.read_sql_query(
-        """
-        SELECT colaborador_id, SUM(dias_ferias) as dias_ferias
+        f"""
+        SELECT colaborador_id,
+               SUM(CASE WHEN data_inicio IS NOT NULL
+                        THEN CAST(julianday(MIN(data_fim, :fim)) - julianday(MAX(data_inicio, :inicio)) AS INTEGER) + 1
+                        ELSE dias_ferias END) AS dias_ferias,
+               SUM(CASE WHEN data_inicio IS NULL THEN dias_ferias ELSE 0 END) AS dias_ferias_sem_datas
         FROM ferias
-        WHERE periodo_inicio = ? AND periodo_fim = ?
+        WHERE ((data_inicio IS NOT NULL AND {filtro})
+           OR (data_inicio IS NULL AND periodo_inicio = :inicio AND periodo_fim = :fim))
+          AND {ids}
         GROUP BY colaborador_id
         """,
         conn,
-        params=(periodo.inicio.isoformat(), periodo.fim.isoformat()),
+        params=params,
     )
+    compactar(ferias, inteiros=("colaborador_id", "dias_ferias", "dias_ferias_sem_datas"))
+    compactar(ferias_intervalos, inteiros=("colaborador_id",), datas=("data_inicio", "data_fim"))
+    return ferias, ferias_intervalos
+
+
+# Colaboradores + cargos + sindicatos + estados (valor diário)
+SQL_COLABORADORES = """
+    SELECT 
+        c.id as colaborador_id,
+        c.matricula,
+        c.situacao,
+        c.data_admissao,
+        c.data_desligamento,
+        c.sindicato_informado,
+        c.cargo_informado,
+        car.titulo as cargo,
+        car.categoria as categoria_cargo,
+        s.id as sindicato_id,
+        s.nome_abreviado as sindicato,
+        s.nome_completo as sindicato_nome_completo,
+        e.nome as estado,
+        e.valor_vr_diario
+    FROM colaboradores c
+    JOIN cargos car ON c.cargo_id = car.id
+    JOIN sindicatos s ON c.sindicato_id = s.id
+    JOIN estados e ON s.estado_id = e.id
+"""
+
+
+def _compactar_colaboradores(colaboradores: pd.DataFrame) -> pd.DataFrame:
+    return compactar(
+        colaboradores,
+        inteiros=("colaborador_id", "matricula", "sindicato_id"),
+        categorias=("situacao", "sindicato_informado", "cargo_informado", "cargo", "categoria_cargo",
+                    "sindicato", "sindicato_nome_completo", "estado"),
+        datas=("data_admissao", "data_desligamento"),
+    )
+
+
+def _carregar_calendario(conn: sqlite3.Connection, periodo: PeriodoReferencia):
+    """(dias úteis do período por sindicato, CalendarioUteis) — pequenos, comuns a todos os lotes."""
+    from ai_vr.core.calendario import CalendarioUteis, garantir_dias_uteis
+
+    # Dias úteis do período por sindicato (calendário de feriados preenche
+    # os períodos que ainda não têm linha em dias_uteis)
+    dias_uteis = garantir_dias_uteis(conn, periodo.inicio, periodo.fim)
+    calendario = CalendarioUteis.do_banco(conn, periodo.inicio, periodo.fim)
+    compactar(dias_uteis, inteiros=("sindicato_id", "dias_uteis"))
+    return dias_uteis, calendario
+
+
+def _carregar_por_colaborador(conn: sqlite3.Connection, periodo: PeriodoReferencia, faixa=None) -> dict:
+    """Tabelas ligadas a colaborador_id (férias, exclusões, afastamentos, admissões,
+    desligamentos), inteiras ou só da ``faixa`` (id_min, id_max) de um lote."""
+    import pandas as pd
+
+    params = _parametros_periodo(periodo, faixa)
+    ids = _filtro_faixa(faixa)
+
+    # Férias: intervalos recortados ao período (+ linhas legadas do período exato)
+    ferias, ferias_intervalos = carregar_ferias(conn, periodo, faixa=faixa)
 
     # Exclusões (estagiário, aprendiz, exterior)
     exclusoes = pd.read_sql_query(
-        """
+        f"""
         SELECT colaborador_id, tipo_exclusao, valor_especifico, observacoes
         FROM exclusoes
+        WHERE {ids}
         """,
         conn,
+        params=params,
     )
 
     # Afastamentos (qualquer overlapping no período implica exclusão)
-    afastamentos = pd.read_sql_query(
-        """
-        SELECT colaborador_id, tipo_afastamento, data_inicio, data_fim
-        FROM afastamentos
-        """,
-        conn,
-    )
+    afastamentos = carregar_afastamentos(conn, periodo, faixa=faixa)
 
     # Admissões (para proporcionalidade)
     admissoes = pd.read_sql_query(
-        """
+        f"""
         SELECT colaborador_id, data_admissao
         FROM admissoes
+        WHERE {ids}
         """,
         conn,
+        params=params,
     )
     # Desligamentos (regras até dia 15 e proporcional após)
     desligamentos = pd.read_sql_query(
-        """
+        f"""
         SELECT colaborador_id, data_desligamento, comunicado_ok
         FROM desligamentos
+        WHERE {ids}
         """,
         conn,
+        params=params,
     )
 
+    compactar(exclusoes, inteiros=("colaborador_id",), categorias=("tipo_exclusao",))
+    compactar(admissoes, inteiros=("colaborador_id",), datas=("data_admissao",))
+    compactar(desligamentos, inteiros=("colaborador_id",), datas=("data_desligamento",), booleanos=("comunicado_ok",))
+
     return {
-        "colaboradores": colaboradores,
-        "dias_uteis": dias_uteis,
         "ferias": ferias,
+        "ferias_intervalos": ferias_intervalos,
         "exclusoes": exclusoes,
         "afastamentos": afastamentos,
         "admissoes": admissoes,
@@ -159,6 +374,49 @@ def carregar_bases(conn: sqlite3.Connection, periodo: PeriodoReferencia):
     }
 
 
+def carregar_bases(conn: sqlite3.Connection, periodo: PeriodoReferencia):
+    import pandas as pd
+
+    colaboradores = pd.read_sql_query(SQL_COLABORADORES, conn)
+    dias_uteis, calendario = _carregar_calendario(conn, periodo)
+
+    # Tipos compactos: todas as etapas seguintes trabalham sobre eles
+    _compactar_colaboradores(colaboradores)
+
+    return {
+        "colaboradores": colaboradores,
+        "dias_uteis": dias_uteis,
+        "calendario": calendario,
+        **_carregar_por_colaborador(conn, periodo),
+    }
+
+
+def carregar_bases_em_lotes(conn: sqlite3.Connection, periodo: PeriodoReferencia,
+                            tamanho: int = LOTE_PADRAO) -> Iterator[dict]:
+    """Como ``carregar_bases``, mas em lotes de até ``tamanho`` colaboradores.
+
+    Os colaboradores são lidos por id com ``fetchmany`` (ai_vr/core/lotes.py)
+    e cada lote traz só as linhas das tabelas ligadas dos seus ids; dias
+    úteis e calendário, pequenos, são carregados uma vez. Como o cálculo de
+    um colaborador só depende das linhas dele, calcular lote a lote dá o
+    mesmo resultado com memória limitada pelo tamanho do lote.
+    """
+    from ai_vr.core.lotes import iterar_lotes
+
+    dias_uteis, calendario = _carregar_calendario(conn, periodo)
+    tipos = {"colaborador_id": "int32", "matricula": "int32", "sindicato_id": "int32",
+             "data_admissao": "datetime64[s]", "data_desligamento": "datetime64[s]"}
+    for colaboradores in iterar_lotes(conn, SQL_COLABORADORES + "    ORDER BY c.id", tamanho=tamanho, tipos=tipos):
+        _compactar_colaboradores(colaboradores)
+        ids = colaboradores["colaborador_id"]
+        yield {
+            "colaboradores": colaboradores,
+            "dias_uteis": dias_uteis,
+            "calendario": calendario,
+            **_carregar_por_colaborador(conn, periodo, faixa=(int(ids.min()), int(ids.max()))),
+        }
+
+
 def periodo_overlap(inicio_a: date, fim_a: date, inicio_b, fim_b) -> bool:
     # Trata valores ausentes/NaT com segurança
     import pandas as pd  # import local para evitar dependência global aqui
@@ -181,6 +439,9 @@ def periodo_overlap(inicio_a: date, fim_a: date, inicio_b, fim_b) -> bool:
 
 
 def montar_base_elegivel(bases: dict, periodo: PeriodoReferencia) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+
     col = bases["colaboradores"].copy()
 
     # Juntar dias úteis por sindicato
@@ -188,35 +449,20 @@ def montar_base_elegivel(bases: dict, periodo: PeriodoReferencia) -> pd.DataFram
 
     # Férias
     col = col.merge(bases["ferias"], on="colaborador_id", how="left")
-    col["dias_ferias"] = col["dias_ferias"].fillna(0).astype(int)
+    col["dias_ferias"] = pd.to_numeric(col["dias_ferias"]).fillna(0).astype(np.int32)
+    if "dias_ferias_sem_datas" in col.columns:
+        col["dias_ferias_sem_datas"] = pd.to_numeric(col["dias_ferias_sem_datas"]).fillna(0).astype(np.int32)
 
     # Flags de exclusão por tabela exclusoes
-    if not bases["exclusoes"].empty:
-        col = col.merge(
-            bases["exclusoes"][['colaborador_id']].drop_duplicates().assign(flag_excluido=True),
-            on="colaborador_id",
-            how="left",
-        )
-    else:
-        col["flag_excluido"] = False
-    col["flag_excluido"] = col["flag_excluido"].fillna(False).infer_objects(copy=False)
-
-    # Afastamentos: marcar quem tem overlap com o período
-    afast = bases["afastamentos"].copy()
-    afast["data_inicio"] = pd.to_datetime(afast["data_inicio"]).dt.date
-    afast["data_fim"] = pd.to_datetime(afast["data_fim"]).dt.date
-    # Garantir que data_inicio não seja NaT para cálculo de overlap
-    afast["data_inicio"] = afast["data_inicio"].fillna(periodo.inicio)
-    if not afast.empty:
-        afast["overlap"] = afast.apply(
-            lambda r: periodo_overlap(periodo.inicio, periodo.fim, r["data_inicio"], r["data_fim"]), axis=1
-        )
-        afast = afast[afast["overlap"]]
-        col = col.merge(afast[["colaborador_id"]].drop_duplicates().assign(flag_afastado=True),
-                        on="colaborador_id", how="left")
-    else:
-        col["flag_afastado"] = False
-    col["flag_afastado"] = col["flag_afastado"].fillna(False).infer_objects(copy=False)
+    col["flag_excluido"] = col["colaborador_id"].isin(bases["exclusoes"]["colaborador_id"])
+
+    # Afastamentos: marcar quem tem overlap com o período (data_inicio ausente
+    # conta desde o início do período, data_fim ausente é afastamento em aberto)
+    afast = bases["afastamentos"]
+    inicio = pd.to_datetime(afast["data_inicio"]).fillna(pd.Timestamp(periodo.inicio))
+    fim = pd.to_datetime(afast["data_fim"])
+    overlap = (inicio <= pd.Timestamp(periodo.fim)) & (fim.isna() | (fim >= pd.Timestamp(periodo.inicio)))
+    col["flag_afastado"] = col["colaborador_id"].isin(afast.loc[overlap.to_numpy(dtype=bool), "colaborador_id"])
 
     # Regras de categoria de cargo (excluir estagiário/aprendiz/diretor)
     col["flag_categoria_excluida"] = col["categoria_cargo"].isin(["ESTAGIARIO", "APRENDIZ", "DIRETOR"]) \
@@ -228,79 +474,227 @@ def montar_base_elegivel(bases: dict, periodo: PeriodoReferencia) -> pd.DataFram
     return elegiveis
 
 
-def calcular_dias_valores(df: pd.DataFrame, bases: dict, periodo: PeriodoReferencia) -> pd.DataFrame:
-    # Mapas auxiliares
-    adm = bases["admissoes"].copy()
-    des = bases["desligamentos"].copy()
-    adm["data_admissao"] = pd.to_datetime(adm["data_admissao"]).dt.date
-    des["data_desligamento"] = pd.to_datetime(des["data_desligamento"]).dt.date
-    des["comunicado_ok"] = des["comunicado_ok"].astype(bool)
-
-    adm_map = adm.set_index("colaborador_id")["data_admissao"].to_dict()
-    des_map = des.set_index("colaborador_id")["data_desligamento"].to_dict()
-    des_com_map = des.set_index("colaborador_id")["comunicado_ok"].to_dict()
-
-    resultados = []
-
-    for _, r in df.iterrows():
-        dias_uteis = int(r.get("dias_uteis", 0) or 0)
-        dias_ferias = int(r.get("dias_ferias", 0) or 0)
-        valor_diario = float(r.get("valor_vr_diario", 0) or 0)
-
-        # Base: dias úteis menos férias (não negativo)
-        dias_base = max(dias_uteis - dias_ferias, 0)
-
-        observacoes: list[str] = []
-
-        # Admissão proporcional dentro do período
-        data_adm = adm_map.get(r["colaborador_id"]) or r.get("data_admissao")
-        if pd.notna(data_adm):
-            data_adm_dt = data_adm if isinstance(data_adm, date) else pd.to_datetime(data_adm).date()
-            if periodo.inicio <= data_adm_dt <= periodo.fim:
-                dias_restantes = (periodo.fim - data_adm_dt).days + 1
-                proporcao = max(min(dias_restantes / periodo.dias_periodo, 1.0), 0.0)
-                dias_base = round(dias_base * proporcao)
-                observacoes.append(f"Admissão em {data_adm_dt.strftime('%d/%m/%Y')}")
-
-        # Desligamento: regra até dia 15 = 0 dias; após 15 proporcional
-        data_des = des_map.get(r["colaborador_id"]) or r.get("data_desligamento")
-        comunicado_ok = bool(des_com_map.get(r["colaborador_id"], False))
-        if pd.notna(data_des):
-            data_des_dt = data_des if isinstance(data_des, date) else pd.to_datetime(data_des).date()
-            if periodo.inicio <= data_des_dt <= periodo.fim:
-                if comunicado_ok and data_des_dt.day <= 15:
-                    dias_base = 0
-                    observacoes.append("Desligado c/ comunicado até dia 15")
-                else:
-                    dias_trabalhados = (data_des_dt - periodo.inicio).days + 1
-                    proporcao = max(min(dias_trabalhados / periodo.dias_periodo, 1.0), 0.0)
-                    dias_base = round(dias_base * proporcao)
-                    observacoes.append(
-                        f"Desligado em {data_des_dt.strftime('%d/%m/%Y')} (proporcional)"
-                    )
+def calcular_dias_valores(df: pd.DataFrame, bases: dict, periodo: PeriodoReferencia,
+                          modo: str = "proporcional") -> pd.DataFrame:
+    """Calcula dias, valores e observações de VR por colaborador elegível.
+
+    ``modo="proporcional"`` (padrão) reduz os dias úteis pela fração de dias
+    corridos após a admissão/até o desligamento. ``modo="exato"`` conta os dias
+    úteis efetivamente trabalhados (ver ``calcular_dias_exatos``).
+
+    Os dois modos são vetorizados sobre a base tipada de ``carregar_bases``.
+    """
+    import numpy as np
+
+    if modo not in MODOS_DIAS:
+        raise ValueError(f"Modo de contagem de dias inválido: {modo!r} (use {', '.join(MODOS_DIAS)})")
+    if modo == "exato":
+        return calcular_dias_exatos(df, bases, periodo)
+
+    vigencia = _vigencia(df, bases, periodo)
+    data_adm, data_des, admitido, desligado, zerado = vigencia
+    p_ini = np.datetime64(periodo.inicio, "D")
+    p_fim = np.datetime64(periodo.fim, "D")
+
+    # Base: dias úteis menos férias (não negativo)
+    dias_uteis = df["dias_uteis"].fillna(0).to_numpy(dtype=np.int64)
+    dias_ferias = df["dias_ferias"].fillna(0).to_numpy(dtype=np.int64)
+    dias = np.maximum(dias_uteis - dias_ferias, 0).astype(float)
+
+    # Admissão e desligamento no período: fração dos dias corridos, limitada a
+    # [0, 1], com o mesmo arredondamento (half-even) do round() do Python
+    with np.errstate(invalid="ignore"):
+        fracao_adm = np.clip(((p_fim - data_adm).astype(np.int64) + 1) / periodo.dias_periodo, 0.0, 1.0)
+        fracao_des = np.clip(((data_des - p_ini).astype(np.int64) + 1) / periodo.dias_periodo, 0.0, 1.0)
+    dias = np.where(admitido, np.round(dias * fracao_adm), dias)
+    dias = np.where(desligado, np.round(dias * fracao_des), dias)
+    # Desligamento com comunicado até o dia 15 = 0 dias
+    dias_vr = np.where(zerado, 0, dias).astype(np.int64)
+
+    return _quadro_saida(df, periodo, dias_vr, vigencia, sufixo_desligamento=" (proporcional)")
+
+
+def _vigencia(df: pd.DataFrame, bases: dict, periodo: PeriodoReferencia):
+    """Datas efetivas de admissão/desligamento de cada linha de ``df`` e as máscaras do período.
+
+    Retorna (data_adm, data_des, admitido, desligado, zerado) como arrays
+    NumPy; as tabelas admissoes/desligamentos têm precedência sobre as datas
+    do cadastro. ``zerado``: desligado no período com comunicado até o dia 15.
+    """
+    import numpy as np
+    import pandas as pd
+
+    ids = df["colaborador_id"].to_numpy()
+    p_ini = np.datetime64(periodo.inicio, "D")
+    p_fim = np.datetime64(periodo.fim, "D")
+
+    data_adm = _data_por_colaborador(bases["admissoes"], "data_admissao", ids)
+    data_adm = np.where(np.isnat(data_adm), pd.to_datetime(df["data_admissao"]).to_numpy(dtype="datetime64[D]"), data_adm)
+    data_des = _data_por_colaborador(bases["desligamentos"], "data_desligamento", ids)
+    data_des = np.where(np.isnat(data_des), pd.to_datetime(df["data_desligamento"]).to_numpy(dtype="datetime64[D]"), data_des)
+    comunicado = (
+        bases["desligamentos"].drop_duplicates("colaborador_id", keep="last")
+        .set_index("colaborador_id")["comunicado_ok"].astype("boolean").fillna(False)
+        .reindex(ids, fill_value=False).to_numpy(dtype=bool)
+    )
 
-        dias_vr = max(dias_base, 0)
-        total = round(dias_vr * valor_diario, 2)
-        custo_empresa = round(total * 0.8, 2)
-        desconto_prof = round(total * 0.2, 2)
-
-        resultados.append({
-            "MATRICULA": int(r["matricula"]),
-            "Admissão": "" if pd.isna(r.get("data_admissao")) else pd.to_datetime(r.get("data_admissao")).date().strftime("%d/%m/%Y"),
-            "Sindicato do Colaborador": r["sindicato"],
-            "Competência": periodo.competencia,
-            "Dias": dias_vr,
-            "VALOR DIÁRIO VR": round(valor_diario, 2),
-            "TOTAL": total,
-            "Custo empresa": custo_empresa,
-            "Desconto profissional": desconto_prof,
-            "OBS GERAL": "; ".join(observacoes),
-        })
+    admitido = (data_adm >= p_ini) & (data_adm <= p_fim)
+    desligado = (data_des >= p_ini) & (data_des <= p_fim)
+    dia_des = (data_des - data_des.astype("datetime64[M]")).astype(np.int64) + 1
+    zerado = desligado & comunicado & (dia_des <= 15)
+    return data_adm, data_des, admitido, desligado, zerado
+
+
+def _quadro_saida(df: pd.DataFrame, periodo: PeriodoReferencia, dias_vr, vigencia,
+                  sufixo_desligamento: str = "") -> pd.DataFrame:
+    """Monta a saída (colunas da planilha) a partir dos dias calculados por linha."""
+    import numpy as np
+    import pandas as pd
+
+    data_adm, data_des, admitido, desligado, zerado = vigencia
+    valor_diario = df["valor_vr_diario"].fillna(0).to_numpy(dtype=float)
+    total = (dias_vr * valor_diario).round(2)
+
+    # Observações montadas por máscara
+    texto_adm = _formatar_datas(data_adm, "Admissão em ")
+    texto_des = _formatar_datas(data_des, "Desligado em ")
+    if sufixo_desligamento:
+        texto_des = np.where(texto_des != "", texto_des + sufixo_desligamento, texto_des)
+    texto_des = np.where(zerado, "Desligado c/ comunicado até dia 15", texto_des)
+    texto_des = np.where(desligado, texto_des, "")
+    obs = np.where(admitido, texto_adm, texto_des)
+    ambos = admitido & desligado
+    obs[ambos] = texto_adm[ambos] + "; " + texto_des[ambos]
+
+    return pd.DataFrame({
+        "MATRICULA": df["matricula"].to_numpy(dtype=np.int64),
+        "Admissão": _formatar_datas(pd.to_datetime(df["data_admissao"]).to_numpy(dtype="datetime64[D]")),
+        "Sindicato do Colaborador": df["sindicato"].to_numpy(dtype=object),
+        "Competência": periodo.competencia,
+        "Dias": dias_vr,
+        "VALOR DIÁRIO VR": valor_diario.round(2),
+        "TOTAL": total,
+        "Custo empresa": (total * 0.8).round(2),
+        "Desconto profissional": (total * 0.2).round(2),
+        "OBS GERAL": obs,
+    })
 
-    return pd.DataFrame(resultados)
+
+def _data_por_colaborador(tabela: pd.DataFrame, coluna: str, ids) -> np.ndarray:
+    """Data de ``coluna`` por colaborador, alinhada a ``ids`` (NaT quando ausente).
+
+    Em caso de linhas repetidas vale a última, como no ``to_dict`` do modo proporcional.
+    """
+    import pandas as pd
+
+    serie = tabela.drop_duplicates("colaborador_id", keep="last").set_index("colaborador_id")[coluna]
+    return pd.to_datetime(serie).reindex(ids).to_numpy(dtype="datetime64[D]")
+
+
+def _formatar_datas(datas, prefixo: str = "") -> np.ndarray:
+    """Formata datas como ``prefixo + dd/mm/aaaa`` (vazio para NaT), uma vez por data distinta."""
+    import numpy as np
+    import pandas as pd
+
+    codigos, distintas = pd.factorize(datas)
+    textos = [prefixo + d.strftime("%d/%m/%Y") for d in pd.DatetimeIndex(distintas)]
+    return np.array(textos + [""], dtype=object)[codigos]
+
+
+def _descontar_intervalos(dias_fora, intervalos, ids, sindicatos, inicios, fins, calendario, fim_aberto) -> None:
+    """Soma em ``dias_fora`` os dias úteis de cada intervalo dentro da janela do colaborador.
+
+    ``intervalos`` tem (colaborador_id, data_inicio, data_fim); data_fim ausente é
+    um intervalo em aberto (até ``fim_aberto``). Tudo vetorizado: um join para
+    achar as linhas do colaborador e um bincount para somar por linha.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if intervalos is None or intervalos.empty:
+        return
+    pares = pd.DataFrame({"colaborador_id": ids, "linha": np.arange(len(ids))}).merge(
+        intervalos[["colaborador_id", "data_inicio", "data_fim"]], on="colaborador_id"
+    )
+    if pares.empty:
+        return
+    linhas = pares["linha"].to_numpy()
+    ini = pd.to_datetime(pares["data_inicio"]).to_numpy(dtype="datetime64[D]")
+    fim = pd.to_datetime(pares["data_fim"]).to_numpy(dtype="datetime64[D]")
+    fim = np.where(np.isnat(fim), fim_aberto, fim)
+    ini = np.where(np.isnat(ini), inicios[linhas], ini)
+
+    contagem = calendario.dias_uteis(
+        sindicatos[linhas], np.maximum(ini, inicios[linhas]), np.minimum(fim, fins[linhas])
+    )
+    dias_fora += np.bincount(linhas, weights=contagem, minlength=len(ids)).astype(dias_fora.dtype)
+
+
+def calcular_dias_exatos(df: pd.DataFrame, bases: dict, periodo: PeriodoReferencia) -> pd.DataFrame:
+    """Modo exato: dias úteis efetivamente trabalhados por colaborador.
+
+    A janela de cada colaborador vai de max(início, admissão) a min(fim,
+    desligamento); desligado com comunicado até o dia 15 fica com 0 dias. Os
+    dias úteis da janela vêm das somas acumuladas do ``CalendarioUteis`` por
+    sindicato, assim como os de férias e afastamentos, descontados como
+    intervalos (``bases["ferias_intervalos"]``, mais as férias legadas sem
+    datas; sem intervalos, a contagem ``dias_ferias``). Os dias úteis oficiais do sindicato continuam sendo a
+    base: desconta-se apenas o que cai fora da janela trabalhada.
+
+    Sem laços por colaborador: todas as contagens são operações vetorizadas.
+    """
+    import numpy as np
+
+    calendario = bases.get("calendario")
+    if calendario is None:
+        raise ValueError("Modo exato requer bases['calendario'] (ver carregar_bases)")
+
+    n = len(df)
+    ids = df["colaborador_id"].to_numpy()
+    sindicatos = df["sindicato_id"].to_numpy(dtype=np.int64)
+    p_ini = np.datetime64(periodo.inicio, "D")
+    p_fim = np.datetime64(periodo.fim, "D")
+
+    vigencia = _vigencia(df, bases, periodo)
+    data_adm, data_des, admitido, desligado, zerado = vigencia
+    inicios = np.where(admitido, data_adm, p_ini)
+    fins = np.where(desligado, data_des, p_fim)
+
+    # Dias úteis fora da janela trabalhada + dias em férias/afastamento dentro dela
+    dias_periodo = calendario.dias_uteis(sindicatos, np.full(n, p_ini), np.full(n, p_fim))
+    dias_fora = (dias_periodo - calendario.dias_uteis(sindicatos, inicios, fins)).astype(np.int64)
+
+    ferias_intervalos = bases.get("ferias_intervalos")
+    if ferias_intervalos is not None:
+        _descontar_intervalos(dias_fora, ferias_intervalos, ids, sindicatos, inicios, fins, calendario, p_fim)
+        if "dias_ferias_sem_datas" in df.columns:
+            # Férias legadas, sem datas de gozo: só há a contagem
+            dias_fora += df["dias_ferias_sem_datas"].fillna(0).to_numpy(dtype=np.int64)
+    else:
+        dias_fora += df["dias_ferias"].fillna(0).to_numpy(dtype=np.int64)
+    _descontar_intervalos(dias_fora, bases.get("afastamentos"), ids, sindicatos, inicios, fins, calendario, p_fim)
+
+    dias_uteis = df["dias_uteis"].fillna(0).to_numpy(dtype=np.int64)
+    dias_vr = np.where(zerado, 0, np.maximum(dias_uteis - dias_fora, 0))
+
+    return _quadro_saida(df, periodo, dias_vr, vigencia)
+
+
+def calcular_em_lotes(conn: sqlite3.Connection, periodo: PeriodoReferencia, modo: str = "proporcional",
+                      tamanho: int = LOTE_PADRAO) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Pipeline carregar -> elegíveis -> dias/valores, um lote de colaboradores por vez.
+
+    Gera (elegiveis, saida) por lote; concatenadas, as saídas são as de
+    ``calcular_dias_valores`` sobre ``carregar_bases`` (mesma ordem, por id).
+    """
+    for bases in carregar_bases_em_lotes(conn, periodo, tamanho):
+        elegiveis = montar_base_elegivel(bases, periodo)
+        yield elegiveis, calcular_dias_valores(elegiveis, bases, periodo, modo=modo)
 
 
 def gerar_validacoes(df_out: pd.DataFrame) -> pd.DataFrame:
+    import pandas as pd
+
     if df_out.empty:
         return pd.DataFrame({
             "Métrica": ["Total colaboradores", "Soma TOTAL", "Soma Custo empresa", "Soma Desconto profissional"],
@@ -323,15 +717,148 @@ def gerar_validacoes(df_out: pd.DataFrame) -> pd.DataFrame:
     })
 
 
-def salvar_planilha(df_saida: pd.DataFrame, df_valid: pd.DataFrame, saida: str, competencia: str) -> None:
+def salvar_planilha(df_saida: pd.DataFrame, df_valid: pd.DataFrame, saida: str, competencia: str,
+                    df_violacoes: pd.DataFrame | None = None) -> None:
+    import pandas as pd
+
     os.makedirs(os.path.dirname(saida), exist_ok=True)
     with pd.ExcelWriter(saida, engine="openpyxl") as writer:
         aba_vr = f"VR MENSAL {competencia.replace('/', '.')}"
         df_saida.to_excel(writer, sheet_name=aba_vr, index=False)
+        # Aba opcional com as violações do motor de validação (ai_vr/core/validacoes.py)
+        if df_violacoes is not None:
+            df_violacoes.to_excel(writer, sheet_name="Validações", index=False)
 
     print(f"✅ Planilha gerada: {saida}")
 
 
+class PlanilhaEmLotes:
+    """Planilha no formato de ``salvar_planilha`` gravada lote a lote.
+
+    Usa o modo write_only do openpyxl (as linhas vão para disco à medida que
+    chegam) num arquivo temporário ao lado de ``saida``: ``concluir`` o move
+    para ``saida`` e ``descartar`` o apaga, então uma geração interrompida não
+    deixa planilha pela metade.
+    """
+
+    def __init__(self, saida: str, competencia: str):
+        import tempfile
+        from openpyxl import Workbook
+
+        os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+        self.saida = saida
+        self.linhas = 0
+        self._livro = Workbook(write_only=True)
+        self._aba = self._livro.create_sheet(f"VR MENSAL {competencia.replace('/', '.')}")
+        self._cabecalho = None
+        fd, self._temporario = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(saida) or ".")
+        os.close(fd)
+
+    def _escrever_cabecalho(self, colunas) -> None:
+        # Mesmo estilo do cabeçalho do DataFrame.to_excel
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+
+        fina = Side(style="thin")
+        celulas = []
+        for coluna in colunas:
+            celula = WriteOnlyCell(self._aba, value=coluna)
+            celula.font = Font(bold=True)
+            celula.border = Border(left=fina, right=fina, top=fina, bottom=fina)
+            celula.alignment = Alignment(horizontal="center", vertical="top")
+            celulas.append(celula)
+        self._aba.append(celulas)
+        self._cabecalho = list(colunas)
+
+    def adicionar(self, df_saida: pd.DataFrame) -> None:
+        if self._cabecalho is None:
+            self._escrever_cabecalho(df_saida.columns)
+        for linha in df_saida.itertuples(index=False, name=None):
+            self._aba.append(linha)
+        self.linhas += len(df_saida)
+
+    def concluir(self, colunas=()) -> None:
+        """Fecha o arquivo e o publica em ``saida`` (``colunas``: cabeçalho se não veio nenhum lote)."""
+        if self._cabecalho is None:
+            self._escrever_cabecalho(colunas)
+        self._livro.save(self._temporario)
+        os.replace(self._temporario, self.saida)
+        print(f"✅ Planilha gerada: {self.saida}")
+
+    def descartar(self) -> None:
+        if not self._aba.closed:
+            self._aba.close()
+        if os.path.exists(self._temporario):
+            os.remove(self._temporario)
+
+
+def _linhas_calculos(df_saida: pd.DataFrame, elegiveis: pd.DataFrame, periodo: PeriodoReferencia) -> list:
+    import pandas as pd
+
+    mes, ano = periodo.fim.month, periodo.fim.year
+    extras = elegiveis[["matricula", "colaborador_id", "dias_uteis", "dias_ferias"]].drop_duplicates("matricula")
+    dados = df_saida.merge(extras, left_on="MATRICULA", right_on="matricula", how="inner")
+    linhas = list(zip(
+        dados["colaborador_id"].astype(int).tolist(),
+        [mes] * len(dados),
+        [ano] * len(dados),
+        pd.to_numeric(dados["dias_uteis"]).fillna(0).astype(int).tolist(),
+        pd.to_numeric(dados["dias_ferias"]).fillna(0).astype(int).tolist(),
+        dados["Dias"].astype(int).tolist(),
+        dados["Dias"].astype(int).tolist(),
+        dados["VALOR DIÁRIO VR"].astype(float).tolist(),
+        dados["TOTAL"].astype(float).tolist(),
+        dados["Custo empresa"].astype(float).tolist(),
+        dados["Desconto profissional"].astype(float).tolist(),
+        dados["OBS GERAL"].fillna("").astype(str).tolist(),
+    ))
+    return linhas
+
+
+SQL_INSERIR_CALCULO = """
+    INSERT INTO calculos_vr (
+        colaborador_id, periodo_mes, periodo_ano, dias_uteis_sindicato, dias_ferias,
+        dias_trabalhados, dias_vr_calculados, valor_diario, valor_total,
+        custo_empresa, desconto_colaborador, observacoes
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def gravar_calculos_vr(conn: sqlite3.Connection, df_saida: pd.DataFrame, elegiveis: pd.DataFrame,
+                       periodo: PeriodoReferencia) -> int:
+    """Grava a competência em ``calculos_vr`` (substitui as linhas do mesmo mês/ano).
+
+    ``elegiveis`` (saída de montar_base_elegivel) fornece o colaborador_id e
+    os dias úteis/férias de cada matrícula. Retorna o número de linhas gravadas.
+    """
+    linhas = _linhas_calculos(df_saida, elegiveis, periodo)
+    with conn:
+        conn.execute("DELETE FROM calculos_vr WHERE periodo_mes = ? AND periodo_ano = ?",
+                     (periodo.fim.month, periodo.fim.year))
+        conn.executemany(SQL_INSERIR_CALCULO, linhas)
+    print(f"💾 {len(linhas)} cálculo(s) gravado(s) em calculos_vr ({periodo.competencia})")
+    return len(linhas)
+
+
+def gravar_calculos_em_lotes(conn: sqlite3.Connection, lotes: Iterable[Tuple[pd.DataFrame, pd.DataFrame]],
+                             periodo: PeriodoReferencia) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Repassa os lotes de ``calcular_em_lotes`` gravando cada um em ``calculos_vr``.
+
+    Como ``gravar_calculos_vr``, substitui a competência, numa única
+    transação: ela só é confirmada depois do último lote.
+    """
+    gravadas = 0
+    with conn:
+        conn.execute("DELETE FROM calculos_vr WHERE periodo_mes = ? AND periodo_ano = ?",
+                     (periodo.fim.month, periodo.fim.year))
+        for elegiveis, df_saida in lotes:
+            linhas = _linhas_calculos(df_saida, elegiveis, periodo)
+            conn.executemany(SQL_INSERIR_CALCULO, linhas)
+            gravadas += len(linhas)
+            yield elegiveis, df_saida
+    print(f"💾 {gravadas} cálculo(s) gravado(s) em calculos_vr ({periodo.competencia})")
+
+
 def main():
     args = parse_args()
     periodo = PeriodoReferencia(inicio=to_date(args.inicio), fim=to_date(args.fim))
@@ -339,14 +866,78 @@ def main():
     if not os.path.exists(args.db):
         raise FileNotFoundError(f"Banco de dados não encontrado: {args.db}")
 
+    registro = RegistroExecucao(
+        "generate_vr_planilha",
+        parametros=vars(args),
+        competencia=periodo.competencia,
+        caminho=None if args.sem_ledger else args.ledger,
+    )
     conn = sqlite3.connect(args.db)
     try:
-        conn.row_factory = sqlite3.Row
-        bases = carregar_bases(conn, periodo)
-        elegiveis = montar_base_elegivel(bases, periodo)
-        df_saida = calcular_dias_valores(elegiveis, bases, periodo)
-        df_valid = gerar_validacoes(df_saida)
-        salvar_planilha(df_saida, df_valid, args.saida, periodo.competencia)
+        with registro as run:
+            run.entrada("banco", args.db)
+            conn.row_factory = sqlite3.Row
+            if args.gravar_calculos:
+                from ai_vr.core.calendario import garantir_dias_uteis
+
+                # Caminho de escrita: os dias úteis calculados pelo calendário ficam
+                # gravados junto com a competência (a leitura não grava nada)
+                with conn:
+                    garantir_dias_uteis(conn, periodo.inicio, periodo.fim, persistir=True)
+            if args.lote:
+                from ai_vr.core.assinaturas import salvar_se_alterado_em_lotes
+
+                # Uma única passada: cada lote é carregado, calculado, gravado e escrito na planilha
+                with run.etapa("calcular_em_lotes") as etapa:
+                    lotes = calcular_em_lotes(conn, periodo, modo=args.modo_dias, tamanho=args.lote)
+                    if args.gravar_calculos:
+                        lotes = gravar_calculos_em_lotes(conn, lotes, periodo)
+                    _, linhas = salvar_se_alterado_em_lotes(
+                        (df_saida for _, df_saida in lotes), PlanilhaEmLotes(args.saida, periodo.competencia),
+                        periodo.competencia, forcar=args.forcar,
+                    )
+                    etapa.linhas = linhas
+                run.saida = args.saida
+                run.linhas = linhas
+                return
+            with run.etapa("carregar_bases") as etapa:
+                bases = carregar_bases(conn, periodo)
+                etapa.linhas = len(bases["colaboradores"])
+            violacoes = None
+            if args.validar:
+                from ai_vr.core.validacoes import resumo_violacoes, tem_erros, validar_bases
+
+                with run.etapa("validar_bases") as etapa:
+                    violacoes = validar_bases(bases)
+                    etapa.linhas = len(violacoes)
+                print(f"🔎 Validações: {len(violacoes)} violação(ões)")
+                if not violacoes.empty:
+                    print(resumo_violacoes(violacoes).to_string(index=False))
+                if args.bloquear_erros and tem_erros(violacoes):
+                    raise SystemExit("❌ Geração interrompida: há violações de severidade ERRO")
+            with run.etapa("montar_base_elegivel") as etapa:
+                elegiveis = montar_base_elegivel(bases, periodo)
+                etapa.linhas = len(elegiveis)
+            with run.etapa("calcular_dias_valores") as etapa:
+                df_saida = calcular_dias_valores(elegiveis, bases, periodo, modo=args.modo_dias)
+                etapa.linhas = len(df_saida)
+            if args.gravar_calculos:
+                with run.etapa("gravar_calculos_vr") as etapa:
+                    etapa.linhas = gravar_calculos_vr(conn, df_saida, elegiveis, periodo)
+            # Grava só se a saída mudou desde a última exportação (assinatura ao lado do XLSX)
+            from ai_vr.core.assinaturas import salvar_se_alterado
+            import pandas as pd
+
+            with run.etapa("salvar_planilha") as etapa:
+                gravou = salvar_se_alterado(
+                    df_saida, args.saida, periodo.competencia,
+                    lambda: salvar_planilha(df_saida, pd.DataFrame(), args.saida, periodo.competencia,
+                                            df_violacoes=violacoes),
+                    df_violacoes=violacoes, forcar=args.forcar,
+                )
+                etapa.linhas = len(df_saida) if gravou else 0
+            run.saida = args.saida
+            run.linhas = len(df_saida)
     finally:
         conn.close()
 
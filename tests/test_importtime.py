@@ -0,0 +1,27 @@
+"""Orçamento de importação dos módulos de entrada (mesma medição de benchmark_importtime.py)."""
+
+import statistics
+
+import pytest
+
+from ai_vr.scripts.benchmark_importtime import (
+    DEPENDENCIAS_PESADAS,
+    MODULOS_PADRAO,
+    ORCAMENTO_MS,
+    medir_importacao,
+)
+
+REPETICOES = 3
+
+
+@pytest.mark.parametrize("modulo", MODULOS_PADRAO)
+def test_importacao_dentro_do_orcamento(modulo):
+    tempos = []
+    pacotes = set()
+    for _ in range(REPETICOES):
+        cumulativo_us, pacotes = medir_importacao(modulo)
+        tempos.append(cumulativo_us / 1000)
+
+    pesados = sorted(p for p in pacotes if p in DEPENDENCIAS_PESADAS)
+    assert not pesados, f"{modulo} importa {', '.join(pesados)}"
+    assert statistics.median(tempos) <= ORCAMENTO_MS, f"{modulo}: {tempos} ms (orçamento {ORCAMENTO_MS} ms)"